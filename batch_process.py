@@ -0,0 +1,263 @@
+"""
+Process many .xodr files concurrently.
+
+Every input file is parsed and its lane geometry is calculated in a worker process. Per-file outputs are written to
+"<output dir>/<file name>/" and a summary of timings, point counts and failures to "<output dir>/summary.json".
+A file that fails to process is recorded in the summary and does not abort the batch.
+
+Usage:
+    python batch_process.py "*.xodr" data --output-dir batch_output --workers 4 --plot
+    python batch_process.py data --profile  # Stage summary in every result.json, Chrome trace in profile.json
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from opendriveparser import profiling
+from parse_and_visualize import STEP, get_all_lanes, load_xodr_and_parse, plot_planes_of_roads
+
+
+def collect_input_files(inputs):
+    """
+    Expand files, directories (searched recursively for .xodr files) and glob patterns.
+    :param inputs: List of paths or patterns.
+    :return: Sorted list of unique files.
+    """
+    files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            files.extend(glob.glob(os.path.join(item, "**", "*.xodr"), recursive=True))
+        elif os.path.isfile(item):
+            files.append(item)
+        else:
+            files.extend(path for path in glob.glob(item, recursive=True) if os.path.isfile(path))
+    return sorted(set(os.path.normpath(file) for file in files))
+
+
+def get_output_names(files):
+    """
+    Name the output folder of every file after the file, with the lowest free numeric suffix for names already used,
+    also by the suffixed names of other files (a.xodr, a_1.xodr and x/a.xodr get a, a_1 and a_2).
+    :param files:
+    :return: List of unique folder names.
+    """
+    suffixes = dict()  # name => last suffix tried
+    used = set()
+    names = []
+    for file in files:
+        base = os.path.splitext(os.path.basename(file))[0]
+        name = base
+        while name in used:
+            suffixes[base] = suffixes.get(base, 0) + 1
+            name = "{}_{}".format(base, suffixes[base])
+        used.add(name)
+        names.append(name)
+    return names
+
+
+def count_points(total_areas):
+    """
+    Count the sections, lanes and boundary points of the "get_all_lanes" result.
+    :param total_areas:
+    :return: Dictionary of counts.
+    """
+    lanes = 0
+    reference_points = 0
+    boundary_points = 0
+    for section_data in total_areas.values():
+        for lanes_area in (section_data["left_lanes_area"], section_data["right_lanes_area"]):
+            for lane_area in lanes_area.values():
+                lanes += 1
+                boundary_points += len(lane_area["outer"])
+        reference_points += len(section_data["reference_points"].get("s_road", []))
+    return {
+        "sections": len(total_areas),
+        "lanes": lanes,
+        "reference_points": reference_points,
+        "boundary_points": boundary_points,
+    }
+
+
+def process_file_for_batch(file, save_folder, step=STEP, plot=False, export=None, validate=False, heal=False,
+                           profile=False):
+    """
+    Worker of the batch: process one file and write its outputs. Exceptions are reported in the result.
+    :param file: Input file.
+    :param save_folder: Output folder of this file.
+    :param step: Step of calculation.
+    :param plot: Also render "lanes.pdf".
+    :param export: Also export the lane geometry as "lanes.parquet" or "lanes.arrow".
+    :param validate: Validate the network first and fail the file if it has errors.
+    :param heal: Close small plan view gaps and heading jumps before the lane geometry is calculated.
+    :param profile: Record the stage spans and counters in the result and write a Chrome trace "profile.json".
+    :return: Dictionary of the file's timings, counts and error.
+    """
+    result = {"file": file, "output": save_folder, "ok": False, "timings": dict()}
+    timings = result["timings"]
+    start = time.perf_counter()
+    os.makedirs(save_folder, exist_ok=True)
+    if profile:
+        # Workers are reused across files.
+        profiling.reset()
+        profiling.enable()
+    try:
+        road_network = load_xodr_and_parse(file)
+        timings["parse"] = time.perf_counter() - start
+
+        if validate:
+            from validate_network import validate_network
+
+            report = validate_network(road_network)
+            timings["validate"] = report.seconds
+            result["validation"] = report.counts()
+            if not report.ok:
+                raise ValueError("Validation failed, {} errors: {}".format(
+                    len(report.errors), "; ".join(issue.message for issue in report.errors[:5])))
+
+        if heal:
+            from heal_geometry import heal_network
+
+            t = time.perf_counter()
+            result["healing"] = heal_network(road_network)
+            timings["heal"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        total_areas = get_all_lanes(road_network, step=step, progress=False)
+        timings["lanes"] = time.perf_counter() - t
+
+        result["roads"] = len(road_network.roads)
+        result["junctions"] = len(road_network.junctions)
+        result.update(count_points(total_areas))
+
+        if export:
+            from export_arrow import LaneGeometryWriter
+
+            t = time.perf_counter()
+            with LaneGeometryWriter(os.path.join(save_folder, "lanes." + export), file_format=export,
+                                    road_network=road_network) as writer:
+                writer.write_sections(total_areas)
+            timings["export"] = time.perf_counter() - t
+
+        if plot:
+            import matplotlib
+            matplotlib.use("Agg")
+
+            t = time.perf_counter()
+            plot_planes_of_roads(total_areas, save_folder)
+            timings["plot"] = time.perf_counter() - t
+
+        result["ok"] = True
+    except Exception as e:
+        result["error"] = "{}: {}".format(type(e).__name__, e)
+        result["traceback"] = traceback.format_exc()
+    timings["total"] = time.perf_counter() - start
+
+    if profile:
+        profiling.disable()
+        result["profile"] = {"spans": profiling.summary(), "counters": dict(profiling.PROFILER.counters)}
+        profiling.write_chrome_trace(os.path.join(save_folder, "profile.json"))
+
+    with open(os.path.join(save_folder, "result.json"), "w") as fh:
+        json.dump(result, fh, indent=2)
+    return result
+
+
+def process_files(files, output_dir, step=STEP, workers=None, queue_size=None, plot=False, export=None,
+                  validate=False, heal=False, profile=False):
+    """
+    Process files in a pool of worker processes. At most "queue_size" files are submitted at any time.
+    :param files: Input files.
+    :param output_dir: Root folder of the outputs.
+    :param step: Step of calculation.
+    :param workers: Number of worker processes, CPU count by default.
+    :param queue_size: Maximum number of submitted but unfinished files, twice the workers by default.
+    :param plot: Also render "lanes.pdf" of every file.
+    :param export: Also export the lane geometry of every file, "parquet" or "arrow".
+    :param validate: Validate every network first and fail files with errors.
+    :param heal: Heal small plan view discontinuities of every network.
+    :param profile: Profile the stages of every file.
+    :return: Summary dictionary.
+    """
+    workers = workers or os.cpu_count() or 1
+    queue_size = max(queue_size or 2 * workers, 1)
+    start = time.perf_counter()
+
+    jobs = iter(zip(files, get_output_names(files)))
+    results = []
+    pending = dict()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while True:
+            for file, name in jobs:
+                future = executor.submit(process_file_for_batch, file, os.path.join(output_dir, name), step, plot,
+                                         export, validate, heal, profile)
+                pending[future] = file
+                if len(pending) >= queue_size:
+                    break
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                file = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:  # The worker process died.
+                    result = {"file": file, "ok": False, "error": "{}: {}".format(type(e).__name__, e)}
+                results.append(result)
+                print("{} {}".format("done  " if result["ok"] else "FAILED", file), file=sys.stderr)
+
+    results.sort(key=lambda x: x["file"])
+    succeeded = [result for result in results if result["ok"]]
+    summary = {
+        "step": step,
+        "workers": workers,
+        "files": len(results),
+        "succeeded": len(succeeded),
+        "failed": [{"file": result["file"], "error": result["error"]} for result in results if not result["ok"]],
+        "total_seconds": time.perf_counter() - start,
+        "total_roads": sum(result["roads"] for result in succeeded),
+        "total_boundary_points": sum(result["boundary_points"] for result in succeeded),
+        "results": results,
+    }
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, "summary.json"), "w") as fh:
+        json.dump(summary, fh, indent=2)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parse .xodr files and calculate their lane geometry in parallel.")
+    parser.add_argument("inputs", nargs="+", help=".xodr files, directories or glob patterns.")
+    parser.add_argument("--output-dir", default="batch_output", help="Root folder of the outputs.")
+    parser.add_argument("--step", type=float, default=STEP, help="Sample step of the reference lines.")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes.")
+    parser.add_argument("--queue-size", type=int, default=None, help="Maximum number of files in flight.")
+    parser.add_argument("--plot", action="store_true", help="Render lanes.pdf for every file.")
+    parser.add_argument("--export", choices=("parquet", "arrow"), default=None,
+                        help="Export the lane geometry of every file.")
+    parser.add_argument("--validate", action="store_true", help="Skip files whose network fails validation.")
+    parser.add_argument("--heal", action="store_true", help="Heal small plan view gaps and heading jumps.")
+    parser.add_argument("--profile", action="store_true", help="Profile the stages of every file.")
+    args = parser.parse_args(argv)
+
+    files = collect_input_files(args.inputs)
+    if not files:
+        parser.error("No .xodr files found.")
+
+    summary = process_files(files, args.output_dir, step=args.step, workers=args.workers,
+                            queue_size=args.queue_size, plot=args.plot, export=args.export,
+                            validate=args.validate, heal=args.heal, profile=args.profile)
+    print("{} of {} files processed in {:.2f}s, summary in {}".format(
+        summary["succeeded"], summary["files"], summary["total_seconds"],
+        os.path.join(args.output_dir, "summary.json")))
+    return 0 if not summary["failed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+Fixtures of the benchmark suite.
+
+Networks are the bundled maps, tiled copies of Export20241128.xodr (see "scaling.py") and square grids of
+"generate_network.py". The scale factors and grid sizes can be set with the environment variables BENCHMARK_SCALES
+and BENCHMARK_GRIDS, e.g. BENCHMARK_SCALES=4,16,64 BENCHMARK_GRIDS=10,30.
+"""
+
+import io
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from lxml import etree  # noqa: E402
+
+from generate_network import generate_network  # noqa: E402
+from opendriveparser import parse_opendrive  # noqa: E402
+from scaling import tile_network  # noqa: E402
+
+try:
+    import pytest_benchmark  # noqa: F401
+    HAS_BENCHMARK = True
+except ImportError:
+    HAS_BENCHMARK = False
+
+BUNDLED_FILES = ("data/test.xodr", "Export20241128.xodr", "save_nansha - test.xodr")
+SCALED_FILE = "Export20241128.xodr"
+SCALES = tuple(int(scale) for scale in os.environ.get("BENCHMARK_SCALES", "4,16").split(",") if scale)
+GRIDS = tuple(int(size) for size in os.environ.get("BENCHMARK_GRIDS", "10").split(",") if size)
+
+NETWORKS = [os.path.splitext(os.path.basename(file))[0] for file in BUNDLED_FILES] + \
+           ["x{}".format(scale) for scale in SCALES] + ["grid{}".format(size) for size in GRIDS]
+
+_roots = dict()
+_networks = dict()
+
+
+def get_file(name):
+    """ Path of a bundled network by name. """
+    file = next(file for file in BUNDLED_FILES if os.path.splitext(os.path.basename(file))[0] == name)
+    return os.path.join(ROOT, file)
+
+
+def get_root(name):
+    """ Root element of a named benchmark network. """
+    if name not in _roots:
+        if name.startswith("x") and name[1:].isdigit():
+            _roots[name] = tile_network(get_root(os.path.splitext(SCALED_FILE)[0]), int(name[1:]))
+        elif name.startswith("grid"):
+            buffer = io.BytesIO()
+            generate_network(buffer, int(name[4:]), int(name[4:]))
+            _roots[name] = etree.fromstring(buffer.getvalue())
+        else:
+            _roots[name] = etree.parse(get_file(name)).getroot()
+    return _roots[name]
+
+
+def get_network(name):
+    """ Parsed named benchmark network, shared by all benchmarks. """
+    if name not in _networks:
+        _networks[name] = parse_opendrive(get_root(name))
+    return _networks[name]
+
+
+def pytest_collection_modifyitems(config, items):
+    """ Skip the tests using the "benchmark" fixture without pytest-benchmark, the plain tests still run. """
+    if HAS_BENCHMARK:
+        return
+    skip = pytest.mark.skip(reason="pytest-benchmark is not installed")
+    for item in items:
+        if "benchmark" in getattr(item, "fixturenames", ()):
+            item.add_marker(skip)
+
+
+@pytest.fixture(params=NETWORKS)
+def network_name(request):
+    return request.param
+
+
+@pytest.fixture(params=[os.path.splitext(os.path.basename(file))[0] for file in BUNDLED_FILES])
+def bundled_network_name(request):
+    return request.param
+
+
+@pytest.fixture
+def xml_root(network_name):
+    return get_root(network_name)
+
+
+@pytest.fixture
+def road_network(network_name):
+    return get_network(network_name)
+
+
+@pytest.fixture
+def bundled_road_network(bundled_network_name):
+    return get_network(bundled_network_name)
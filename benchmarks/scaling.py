@@ -0,0 +1,110 @@
+"""
+Scaled-up networks for the benchmarks: copies of a bundled network tiled side by side.
+
+Every copy gets its road and junction ids shifted past the ids of all previous copies, its signal, object and
+controller ids shifted the same way and its geometry translated next to them, so the copies are independent, valid
+networks in one document.
+"""
+
+import copy
+import math
+
+from lxml import etree
+
+# Attributes holding road or junction ids, by element tag.
+ID_ATTRIBUTES = {
+    "road": ("id", "junction"),
+    "predecessor": ("elementId",),
+    "successor": ("elementId",),
+    "neighbor": ("elementId",),
+    "junction": ("id",),
+    "connection": ("incomingRoad", "connectingRoad"),
+}
+
+# Attributes holding signal, object or controller ids, by element tag. The ids of references are the referenced ids.
+OBJECT_ID_ATTRIBUTES = {
+    "signal": ("id",),
+    "signalReference": ("id",),
+    "object": ("id",),
+    "objectReference": ("id",),
+    "controller": ("id",),
+    "control": ("signalId",),
+}
+
+# Top-level elements copied for every tile, the others are kept once.
+TILED_TAGS = ("road", "junction", "controller")
+
+# Free space between tiled copies in metres.
+MARGIN = 50.0
+
+
+def get_extent(root):
+    """ (min x, min y, max x, max y) of the geometry start points of a network. """
+    xs = [float(geometry.get("x")) for geometry in root.iter("geometry")]
+    ys = [float(geometry.get("y")) for geometry in root.iter("geometry")]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def get_id_span(root):
+    ids = [int(element.get("id")) for element in root if element.tag in ("road", "junction")]
+    return max(ids) + 1 if ids else 1
+
+
+def get_object_id_span(root):
+    ids = [int(value) for element in root.iter(*OBJECT_ID_ATTRIBUTES)
+           for value in (element.get(attribute) for attribute in OBJECT_ID_ATTRIBUTES[element.tag])
+           if value is not None and value.lstrip("-").isdigit()]
+    return max(ids) + 1 if ids else 1
+
+
+def offset_ids(element, attributes, offset, index):
+    """
+    Shift the ids of an element and its descendants.
+    :param attributes: Attributes holding the ids, by element tag.
+    :param offset: Added to numeric ids, other ids get the suffix "_<index>" of the copy.
+    """
+    for node in element.iter():
+        for attribute in attributes.get(node.tag, ()):
+            value = node.get(attribute)
+            # "junction" of a road is -1 outside of junctions.
+            if value is None or value == "-1" or index == 0:
+                continue
+            if value.lstrip("-").isdigit():
+                node.set(attribute, str(int(value) + offset))
+            else:
+                node.set(attribute, "{}_{}".format(value, index))
+
+
+def tile_network(root, copies):
+    """
+    Tile copies of a network in a square grid.
+    :param root: Root element of the xodr document.
+    :param copies: Number of copies.
+    :return: New root element with all copies.
+    """
+    min_x, min_y, max_x, max_y = get_extent(root)
+    width = max_x - min_x + MARGIN
+    height = max_y - min_y + MARGIN
+    id_span = get_id_span(root)
+    object_id_span = get_object_id_span(root)
+    columns = math.ceil(math.sqrt(copies))
+
+    res = etree.Element(root.tag, root.attrib)
+    for element in root:
+        if element.tag not in TILED_TAGS:
+            res.append(copy.deepcopy(element))
+
+    for index in range(copies):
+        dx = (index % columns) * width
+        dy = (index // columns) * height
+        for element in root:
+            if element.tag not in TILED_TAGS:
+                continue
+            element = copy.deepcopy(element)
+            offset_ids(element, ID_ATTRIBUTES, index * id_span, index)
+            offset_ids(element, OBJECT_ID_ATTRIBUTES, index * object_id_span, index)
+            for geometry in element.iter("geometry"):
+                geometry.set("x", repr(float(geometry.get("x")) + dx))
+                geometry.set("y", repr(float(geometry.get("y")) + dy))
+            res.append(element)
+    return res
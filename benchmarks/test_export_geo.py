@@ -0,0 +1,54 @@
+"""
+Checks of the georeferenced lane export, run without pytest-benchmark too.
+"""
+
+import json
+import os
+
+import numpy as np
+from lxml import etree
+
+from conftest import ROOT
+from export_geo import export_lane_features
+from geo_projection import TransverseMercator, get_inverse_offset
+from opendriveparser import parse_opendrive
+
+GEO_REFERENCE = "+proj=tmerc +lat_0=22.7 +lon_0=113.6 +k=1 +x_0=0 +y_0=0 +datum=WGS84 +units=m"
+
+
+def read_coordinates(file):
+    with open(file) as fh:
+        return [np.array(json.loads(line)["geometry"]["coordinates"][0]) for line in fh]
+
+
+def test_inverse_offset_rotates_then_translates():
+    x, y = get_inverse_offset(100.0, -50.0, np.pi / 2)(np.array([0.0, 1.0]), np.array([0.0, 0.0]))
+    np.testing.assert_allclose(x, [-100.0, -100.0], atol=1e-9)
+    np.testing.assert_allclose(y, [50.0, 49.0], atol=1e-9)
+
+
+def test_export_undoes_header_offset(tmp_path):
+    root = etree.parse(os.path.join(ROOT, "data/test.xodr")).getroot()
+    header = root.find("header")
+    for child in header.findall("geoReference") + header.findall("offset"):
+        header.remove(child)
+    etree.SubElement(header, "geoReference").text = GEO_REFERENCE
+    etree.SubElement(header, "offset", x="1000.0", y="-2000.0", z="0.0", hdg="0.3")
+    road_network = parse_opendrive(root)
+    road_network.roads[1:] = []
+
+    local_file, geo_file = str(tmp_path / "local.geojsonl"), str(tmp_path / "geo.geojsonl")
+    export_lane_features(road_network, local_file, step=2, georeference=False)
+    export_lane_features(road_network, geo_file, step=2)
+
+    local, geo = read_coordinates(local_file), read_coordinates(geo_file)
+    assert len(local) == len(geo) > 0
+    tmerc = TransverseMercator(lat_0=22.7, lon_0=113.6)
+    for local_ring, geo_ring in zip(local, geo):
+        # Rotate by -hdg, then translate by (-x, -y) before the inverse projection.
+        cos, sin = np.cos(0.3), np.sin(0.3)
+        x = cos * local_ring[:, 0] + sin * local_ring[:, 1] - 1000.0
+        y = -sin * local_ring[:, 0] + cos * local_ring[:, 1] + 2000.0
+        lon, lat = tmerc.inverse(x, y)
+        # Local coordinates are rounded to 3 decimals (mm), i.e. about 1e-8 degrees.
+        np.testing.assert_allclose(geo_ring, np.column_stack([lon, lat]), atol=1e-7)
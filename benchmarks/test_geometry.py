@@ -0,0 +1,50 @@
+"""
+Reference line evaluation benchmarks: PlanView.calc and calcPosition / calcPositions of every geometry type.
+"""
+
+import numpy as np
+import pytest
+
+from opendriveparser.elements.roadPlanView import Arc, Line, ParamPoly3, Spiral
+
+# Number of positions evaluated per benchmark round.
+SAMPLES = 1000
+
+GEOMETRIES = {
+    "line": lambda: Line([0.0, 0.0], 0.3, 100.0),
+    "arc": lambda: Arc([0.0, 0.0], 0.3, 100.0, 0.01),
+    "spiral": lambda: Spiral([0.0, 0.0], 0.3, 100.0, 0.0, 0.02),
+    "paramPoly3": lambda: ParamPoly3([0.0, 0.0], 0.3, 100.0, 0.0, 100.0, 1.0, -0.5, 0.0, 0.0, 3.0, -1.0, 1.0),
+}
+
+
+@pytest.fixture(params=list(GEOMETRIES))
+def geometry(request):
+    return GEOMETRIES[request.param]()
+
+
+def test_calc_position(benchmark, geometry):
+    s = np.linspace(0.0, geometry.getLength(), SAMPLES).tolist()
+    benchmark(lambda: [geometry.calcPosition(x) for x in s])
+
+
+def test_calc_positions(benchmark, geometry):
+    s = np.linspace(0.0, geometry.getLength(), SAMPLES)
+    positions, _ = benchmark(geometry.calcPositions, s)
+    assert positions.shape == (SAMPLES, 2)
+
+
+def get_longest_road(road_network):
+    return max(road_network.roads, key=lambda road: road.planView.getLength())
+
+
+def test_plan_view_calc(benchmark, bundled_road_network):
+    plan_view = get_longest_road(bundled_road_network).planView
+    s = np.linspace(0.0, plan_view.getLength(), SAMPLES).tolist()
+    benchmark(lambda: [plan_view.calc(x) for x in s])
+
+
+def test_plan_view_calc_positions(benchmark, bundled_road_network):
+    plan_view = get_longest_road(bundled_road_network).planView
+    s = np.linspace(0.0, plan_view.getLength(), SAMPLES)
+    benchmark(plan_view.calcPositions, s)
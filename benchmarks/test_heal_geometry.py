@@ -0,0 +1,41 @@
+"""
+Regression checks of the plan view healing, run without pytest-benchmark too.
+"""
+
+import numpy as np
+
+from heal_geometry import heal_plan_view
+from opendriveparser.elements.roadPlanView import PlanView
+
+
+def get_kinked_plan_view():
+    """ Three lines, the second one with a heading jump of 0.005 rad, the third one starting at its end. """
+    plan_view = PlanView()
+    plan_view.addLine([0.0, 0.0], 0.0, 100.0)
+    plan_view.addLine([100.0, 0.0], 0.005, 100.0)
+    plan_view.addLine([100.0 + 100.0 * np.cos(0.005), 100.0 * np.sin(0.005)], 0.005, 5.0)
+    return plan_view
+
+
+def test_heading_snap_keeps_later_joints_continuous():
+    plan_view = get_kinked_plan_view()
+    healed, shift, restored = heal_plan_view(plan_view, end_tolerance=1.0)
+    gaps, heading_jumps = plan_view.getDiscontinuities()
+    assert (healed, restored) == (1, False)
+    np.testing.assert_allclose(gaps, [0.0, 0.0], atol=1e-9)
+    np.testing.assert_allclose(heading_jumps, [0.0, 0.0], atol=1e-9)
+    # The tail turned by 0.005 rad about the joint.
+    assert abs(shift - 105.0 * 0.005) < 1e-3
+
+
+def test_heading_snap_moving_the_end_too_far_is_restored():
+    plan_view = get_kinked_plan_view()
+    starts = [(tuple(geometry.getStartPosition()), geometry.getStartHeading()) for geometry in plan_view._geometries]
+    healed, shift, restored = heal_plan_view(plan_view)
+    assert (healed, restored) == (0, True)
+    assert shift > 0.05
+    assert [(tuple(geometry.getStartPosition()), geometry.getStartHeading())
+            for geometry in plan_view._geometries] == starts
+    gaps, heading_jumps = plan_view.getDiscontinuities()
+    np.testing.assert_allclose(gaps, [0.0, 0.0], atol=1e-9)
+    np.testing.assert_allclose(heading_jumps, [0.005, 0.0], atol=1e-9)
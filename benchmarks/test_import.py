@@ -0,0 +1,36 @@
+"""
+Import time benchmarks of the command line entry points. Every round imports in a fresh interpreter, compare with
+"test_interpreter_startup" for the share of the imports.
+"""
+
+import subprocess
+import sys
+
+import pytest
+
+from conftest import ROOT
+
+MODULES = ("opendriveparser", "parse_and_visualize", "batch_process", "validate_network", "export_arrow")
+# Dependencies only imported on first use, e.g. lxml when a file is loaded and eulerspiral for the first spiral.
+LAZY_DEPENDENCIES = ("lxml", "tqdm", "eulerspiral", "eulerlib", "matplotlib", "pyarrow")
+
+
+def run_python(code):
+    return subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True, capture_output=True,
+                          text=True).stdout
+
+
+def test_interpreter_startup(benchmark):
+    benchmark.pedantic(run_python, args=("pass",), rounds=10, iterations=1)
+
+
+@pytest.mark.parametrize("module", MODULES)
+def test_import(benchmark, module):
+    benchmark.pedantic(run_python, args=("import " + module,), rounds=10, iterations=1)
+
+
+@pytest.mark.parametrize("module", MODULES)
+def test_lazy_dependencies(module):
+    code = "import sys, {}; print(' '.join(sys.modules))".format(module)
+    loaded = {name.split(".")[0] for name in run_python(code).split()}
+    assert not loaded & set(LAZY_DEPENDENCIES)
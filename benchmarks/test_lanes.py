@@ -0,0 +1,26 @@
+"""
+Lane extraction and rendering benchmarks.
+"""
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+from parse_and_visualize import STEP, get_all_lanes, get_lane_area_of_one_road, plot_planes_of_roads  # noqa: E402
+
+
+def test_get_lane_area_of_one_road(benchmark, bundled_road_network):
+    road = max(bundled_road_network.roads, key=lambda x: x.planView.getLength())
+    assert benchmark(get_lane_area_of_one_road, road, STEP)
+
+
+def test_get_all_lanes(benchmark, road_network):
+    total_areas = benchmark.pedantic(get_all_lanes, args=(road_network,), kwargs={"step": STEP, "progress": False},
+                                     rounds=3, iterations=1)
+    assert total_areas
+
+
+def test_plot_planes_of_roads(benchmark, bundled_road_network, tmp_path):
+    total_areas = get_all_lanes(bundled_road_network, step=STEP, progress=False)
+    benchmark.pedantic(plot_planes_of_roads, args=(total_areas, str(tmp_path)), rounds=3, iterations=1)
+    assert (tmp_path / "lanes.pdf").exists()
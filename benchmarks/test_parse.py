@@ -0,0 +1,27 @@
+"""
+Parsing benchmarks.
+"""
+
+from lxml import etree
+
+from conftest import get_file
+from opendriveparser import parse_opendrive, read_header
+
+
+def test_parse_opendrive(benchmark, xml_root):
+    road_network = benchmark(parse_opendrive, xml_root)
+    assert road_network.roads
+
+
+def test_load_and_parse_file(benchmark, bundled_network_name):
+    file = get_file(bundled_network_name)
+
+    def load():
+        with open(file, "rb") as fh:
+            return parse_opendrive(etree.parse(fh).getroot())
+
+    assert benchmark(load).roads
+
+
+def test_read_header(benchmark, bundled_network_name):
+    assert benchmark(read_header, get_file(bundled_network_name)) is not None
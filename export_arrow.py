@@ -0,0 +1,260 @@
+"""
+Columnar export of lane geometry as Parquet or Arrow IPC.
+
+One row is written per lane section with list columns for the coordinates:
+    road_id, lane_section, n_points           int32
+    reference_s, reference_x, reference_y     list<float64>   sampled reference line
+    center_x, center_y                        list<float64>   center lane
+    lane_ids                                  list<int32>     lanes from the innermost left / right lane outwards
+    lane_types                                list<string>
+    inner_x, inner_y, outer_x, outer_y        list<list<float64>>, one inner list per lane
+    road_mark_type, road_mark_color           list<list<string>>   road mark of every lane at every point
+    road_mark_width, max_speed                list<list<float64>>  road mark width in m and maximum speed in m/s
+The lane attributes are evaluated from the road mark and speed tables of the road network given to the writer, without
+it they are null / NaN. Rows are written in batches while the roads are processed, so the whole network is never held in memory. The
+Parquet row group size can be tuned for downstream Spark / DuckDB reads.
+
+pyarrow is only needed by this module (pip install pyarrow).
+
+Usage:
+    python export_arrow.py Export20241128.xodr --output lanes.parquet --row-group-size 1024
+"""
+
+import argparse
+
+import numpy as np
+
+from opendriveparser import profiling
+from opendriveparser.elements.roadLanes import LaneRoadMarks
+from parse_and_visualize import (STEP, get_lane_area_of_one_road, get_lane_attributes_of_section, iterate_lane_areas,
+                                 load_xodr_and_parse)
+
+EXPORT_FORMATS = ("parquet", "arrow")
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("Exporting Parquet / Arrow needs pyarrow: pip install pyarrow")
+    return pyarrow
+
+
+def get_lane_geometry_schema():
+    pa = _import_pyarrow()
+    coordinates = pa.list_(pa.float64())
+    return pa.schema([
+        ("road_id", pa.int32()),
+        ("lane_section", pa.int32()),
+        ("n_points", pa.int32()),
+        ("reference_s", coordinates),
+        ("reference_x", coordinates),
+        ("reference_y", coordinates),
+        ("center_x", coordinates),
+        ("center_y", coordinates),
+        ("lane_ids", pa.list_(pa.int32())),
+        ("lane_types", pa.list_(pa.string())),
+        ("inner_x", pa.list_(coordinates)),
+        ("inner_y", pa.list_(coordinates)),
+        ("outer_x", pa.list_(coordinates)),
+        ("outer_y", pa.list_(coordinates)),
+        ("road_mark_type", pa.list_(pa.list_(pa.string()))),
+        ("road_mark_color", pa.list_(pa.list_(pa.string()))),
+        ("road_mark_width", pa.list_(coordinates)),
+        ("max_speed", pa.list_(coordinates)),
+    ])
+
+
+class LaneGeometryWriter:
+    """
+    Buffers lane sections and writes them as record batches / row groups of "row_group_size" rows.
+
+    with LaneGeometryWriter("lanes.parquet", road_network=road_network) as writer:
+        for road in road_network.roads:
+            writer.write_sections(get_lane_area_of_one_road(road, step))
+    """
+
+    def __init__(self, file, file_format="parquet", row_group_size=1024, compression=None, road_network=None):
+        """
+        :param file: Output file.
+        :param file_format: "parquet" or "arrow".
+        :param row_group_size: Rows (lane sections) per row group / record batch.
+        :param compression: Codec, zstd for Parquet and none for Arrow IPC (memory-mappable) by default.
+        :param road_network: Parsed road network of the sections, for the road mark and speed columns.
+        """
+        if file_format not in EXPORT_FORMATS:
+            raise ValueError("Format must be one of {}".format(EXPORT_FORMATS))
+        pa = _import_pyarrow()
+        self._pa = pa
+        self.schema = get_lane_geometry_schema()
+        self.row_group_size = max(int(row_group_size), 1)
+        self.rows_written = 0
+        self._rows = []
+        self._roads = {road.id: road for road in road_network.roads} if road_network is not None else {}
+
+        if file_format == "parquet":
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(file, self.schema, compression=compression or "zstd")
+        else:
+            import pyarrow.ipc
+            options = pyarrow.ipc.IpcWriteOptions(compression=compression)
+            self._writer = pyarrow.ipc.new_file(file, self.schema, options=options)
+        self._file_format = file_format
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @profiling.profiled("export_arrow")
+    def write_sections(self, sections):
+        """
+        Add the sections of one or more roads, flushing a batch whenever "row_group_size" rows are buffered.
+        :param sections: {(road id, lane section id): section data} in list or array form.
+        :return:
+        """
+        for (road_id, section_id), section_data in sections.items():
+            reference_points = section_data["reference_points"]
+            position = np.asarray(reference_points.get("position", []), dtype=np.float64).reshape(-1, 2)
+            center = np.asarray(reference_points.get("position_center_lane", []), dtype=np.float64).reshape(-1, 2)
+            lanes = list(iterate_lane_areas(section_data))
+            attributes = self._get_lane_attributes(road_id, section_id, reference_points,
+                                                   [lane_id for lane_id, _, _, _ in lanes])
+            self._rows.append((
+                road_id, section_id, len(position),
+                np.asarray(reference_points.get("s_road", []), dtype=np.float64), position, center,
+                [lane_id for lane_id, _, _, _ in lanes],
+                [type_of_lane for _, type_of_lane, _, _ in lanes],
+                [inner for _, _, inner, _ in lanes],
+                [outer for _, _, _, outer in lanes],
+                attributes,
+            ))
+            if len(self._rows) >= self.row_group_size:
+                self.flush()
+
+    def _get_lane_attributes(self, road_id, section_id, reference_points, lane_ids):
+        """
+        Road mark type, color, width and maximum speed of lanes at the points of their section.
+        :return: List of (types, colors, widths, speeds) per lane, None / NaN if the road network does not have the lane.
+        """
+        s_lane_section = np.asarray(reference_points.get("s_lane_section", []), dtype=np.float64)
+        road = self._roads.get(road_id)
+        lane_section = road.lanes.getLaneSection(section_id) if road is not None else None
+        attributes = get_lane_attributes_of_section(lane_section, s_lane_section) if lane_section is not None else {}
+
+        missing_text = [None] * len(s_lane_section)
+        missing_values = np.full(len(s_lane_section), np.nan)
+        res = []
+        for lane_id in lane_ids:
+            lane_attributes = attributes.get(lane_id)
+            if lane_attributes is None:
+                res.append((missing_text, missing_text, missing_values, missing_values))
+                continue
+            res.append((LaneRoadMarks.decode("type", lane_attributes["road_mark_type"]),
+                        LaneRoadMarks.decode("color", lane_attributes["road_mark_color"]),
+                        lane_attributes["road_mark_width"], lane_attributes["max_speed"]))
+        return res
+
+    def flush(self):
+        if not self._rows:
+            return
+        pa = self._pa
+        rows = self._rows
+        self._rows = []
+
+        def offsets_of(lengths):
+            return pa.array(np.concatenate([[0], np.cumsum(lengths)]).astype(np.int32))
+
+        def list_column(arrays):
+            values = np.concatenate(arrays) if arrays else np.zeros(0)
+            return pa.ListArray.from_arrays(offsets_of([len(a) for a in arrays]), pa.array(values, pa.float64()))
+
+        def string_list_column(lists):
+            return pa.ListArray.from_arrays(offsets_of([len(values) for values in lists]),
+                                            pa.array([value for values in lists for value in values], pa.string()))
+
+        def nested_column(lists_of_values, values_column=list_column):
+            inner = values_column([values for lists in lists_of_values for values in lists])
+            return pa.ListArray.from_arrays(offsets_of([len(lists) for lists in lists_of_values]), inner)
+
+        def nested_list_column(lists_of_arrays, axis):
+            return nested_column([[a[:, axis] for a in arrays] for arrays in lists_of_arrays])
+
+        def attribute_column(index, values_column=list_column):
+            return nested_column([[lane[index] for lane in row[10]] for row in rows], values_column)
+
+        lane_ids = [row[6] for row in rows]
+        lane_types = [row[7] for row in rows]
+        columns = [
+            pa.array([row[0] for row in rows], pa.int32()),
+            pa.array([row[1] for row in rows], pa.int32()),
+            pa.array([row[2] for row in rows], pa.int32()),
+            list_column([row[3] for row in rows]),
+            list_column([row[4][:, 0] for row in rows]),
+            list_column([row[4][:, 1] for row in rows]),
+            list_column([row[5][:, 0] for row in rows]),
+            list_column([row[5][:, 1] for row in rows]),
+            pa.ListArray.from_arrays(offsets_of([len(ids) for ids in lane_ids]),
+                                     pa.array([i for ids in lane_ids for i in ids], pa.int32())),
+            pa.ListArray.from_arrays(offsets_of([len(types) for types in lane_types]),
+                                     pa.array([t for types in lane_types for t in types], pa.string())),
+            nested_list_column([row[8] for row in rows], 0),
+            nested_list_column([row[8] for row in rows], 1),
+            nested_list_column([row[9] for row in rows], 0),
+            nested_list_column([row[9] for row in rows], 1),
+            attribute_column(0, string_list_column),
+            attribute_column(1, string_list_column),
+            attribute_column(2),
+            attribute_column(3),
+        ]
+        batch = pa.RecordBatch.from_arrays(columns, schema=self.schema)
+        if self._file_format == "parquet":
+            self._writer.write_batch(batch, row_group_size=self.row_group_size)
+        else:
+            self._writer.write_batch(batch)
+        self.rows_written += len(rows)
+
+    def close(self):
+        if self._writer is None:
+            return
+        self.flush()
+        self._writer.close()
+        self._writer = None
+
+
+def export_lane_geometry(road_network, file, step=STEP, file_format="parquet", row_group_size=1024):
+    """
+    Calculate the lanes road by road and stream them into a Parquet / Arrow IPC file.
+    :param road_network: Parsed road network.
+    :param file: Output file.
+    :param step: Step of calculation.
+    :param file_format: "parquet" or "arrow".
+    :param row_group_size: Rows (lane sections) per row group / record batch.
+    :return: Number of written rows.
+    """
+    with LaneGeometryWriter(file, file_format=file_format, row_group_size=row_group_size,
+                            road_network=road_network) as writer:
+        for road in road_network.roads:
+            writer.write_sections(get_lane_area_of_one_road(road, step=step))
+    return writer.rows_written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the lane geometry of a .xodr file as Parquet / Arrow IPC.")
+    parser.add_argument("file", help="Input .xodr file.")
+    parser.add_argument("--output", default=None, help="Output file, <file name>.<format> by default.")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="parquet")
+    parser.add_argument("--step", type=float, default=STEP, help="Sample step of the reference lines.")
+    parser.add_argument("--row-group-size", type=int, default=1024, help="Lane sections per row group.")
+    args = parser.parse_args(argv)
+
+    output = args.output or "{}.{}".format(args.file.rsplit(".", 1)[0], args.format)
+    road_network = load_xodr_and_parse(args.file)
+    rows = export_lane_geometry(road_network, output, step=args.step, file_format=args.format,
+                                row_group_size=args.row_group_size)
+    print("{} lane sections written to {}".format(rows, output))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Streaming export of lane polygons and lines as newline-delimited GeoJSON or WKB.
+
+Every lane becomes a Polygon feature, and optionally its outer boundary, the center lane and the reference line of
+every lane section become LineString features. Features are written road by road, so no FeatureCollection of the
+whole network is ever built:
+    geojson   One GeoJSON Feature per line (GeoJSON text sequence, readable by GDAL / QGIS / DuckDB).
+    wkb       CSV with the properties and the geometry as hex-encoded WKB, e.g. for COPY into PostGIS.
+
+If the header has a <geoReference>, all coordinates of a road are moved back by the <offset> of the header and
+projected to WGS84 longitude / latitude in one vectorized call, otherwise the local x/y coordinates in metres are
+written.
+
+Usage:
+    python export_geo.py Export20241128.xodr --output lanes.geojsonl --lines
+"""
+
+import argparse
+import json
+import struct
+
+import numpy as np
+
+from geo_projection import get_inverse_projection
+from opendriveparser import profiling
+from parse_and_visualize import STEP, get_lane_area_of_one_road, iterate_lane_areas, load_xodr_and_parse
+
+EXPORT_FORMATS = ("geojson", "wkb")
+FILE_EXTENSIONS = {"geojson": "geojsonl", "wkb": "csv"}
+
+WKB_LINESTRING = 2
+WKB_POLYGON = 3
+
+
+def get_section_features(section_index, section_data, lines=False):
+    """
+    Get the features of one lane section.
+    :param section_index: (road id, lane section id)
+    :param section_data: Section data in list or array form.
+    :param lines: Also get the lane boundaries, the center lane and the reference line.
+    :return: List of (geometry type, coordinate array of shape (n, 2), properties).
+    """
+    road_id, section_id = section_index
+    features = []
+    for lane_id, type_of_lane, inner_points, outer_points in iterate_lane_areas(section_data):
+        if len(inner_points) < 2:
+            continue
+        properties = {"road_id": road_id, "lane_section": section_id, "lane_id": lane_id, "type": type_of_lane}
+        ring = np.concatenate([inner_points, outer_points[::-1], inner_points[:1]])
+        features.append(("Polygon", ring, {**properties, "kind": "lane"}))
+        if lines:
+            features.append(("LineString", outer_points, {**properties, "kind": "lane_boundary"}))
+
+    reference_points = section_data["reference_points"]
+    if lines and len(reference_points.get("position", [])) >= 2:
+        properties = {"road_id": road_id, "lane_section": section_id, "lane_id": 0, "type": None}
+        for kind, key in (("center_lane", "position_center_lane"), ("reference_line", "position")):
+            points = np.asarray(reference_points[key], dtype=np.float64).reshape(-1, 2)
+            features.append(("LineString", points, {**properties, "kind": kind}))
+    return features
+
+
+def project_features(features, inverse_projection):
+    """
+    Project the coordinates of many features with a single call of the projection.
+    :param features: List of (geometry type, coordinates, properties).
+    :param inverse_projection: Function (x, y) => (longitude, latitude), see "geo_projection.get_inverse_projection".
+    :return: Features with projected coordinates.
+    """
+    if not features:
+        return features
+    points = np.concatenate([coordinates for _, coordinates, _ in features])
+    lon, lat = inverse_projection(points[:, 0], points[:, 1])
+    projected = np.column_stack([lon, lat])
+    splits = np.cumsum([len(coordinates) for _, coordinates, _ in features])[:-1]
+    return [(geometry_type, coordinates, properties)
+            for (geometry_type, _, properties), coordinates in zip(features, np.split(projected, splits))]
+
+
+def to_wkb(geometry_type, coordinates):
+    """
+    Encode a LineString or single-ring Polygon as little-endian WKB.
+    :param geometry_type: "LineString" or "Polygon".
+    :param coordinates: Array of shape (n, 2).
+    :return: bytes
+    """
+    data = np.ascontiguousarray(coordinates, dtype="<f8").tobytes()
+    if geometry_type == "Polygon":
+        return struct.pack("<BIII", 1, WKB_POLYGON, 1, len(coordinates)) + data
+    return struct.pack("<BII", 1, WKB_LINESTRING, len(coordinates)) + data
+
+
+class LaneFeatureWriter:
+    """
+    Writes the features of lane sections as newline-delimited GeoJSON or as CSV with WKB geometries. Every call of
+    "write_sections" projects its features in one batch and writes them at once.
+    """
+
+    def __init__(self, file, file_format="geojson", geo_reference=None, lines=False, precision=None, offset=None):
+        """
+        :param file: Output file.
+        :param file_format: "geojson" or "wkb".
+        :param geo_reference: PROJ string of the header. If given, coordinates are written as WGS84 lon / lat.
+        :param offset: HeaderOffset of the header, undone before projecting.
+        :param lines: Also write the lane boundaries, center lanes and reference lines.
+        :param precision: Decimals of the GeoJSON coordinates, 8 for degrees and 3 for metres by default.
+        """
+        if file_format not in EXPORT_FORMATS:
+            raise ValueError("Format must be one of {}".format(EXPORT_FORMATS))
+        self.file_format = file_format
+        self.lines = lines
+        self.inverse_projection = get_inverse_projection(geo_reference, offset) if geo_reference else None
+        if precision is None:
+            precision = 8 if self.inverse_projection else 3
+        self.precision = precision
+        self.features_written = 0
+        self._fh = open(file, "w", encoding="utf-8", newline="\n")
+        if file_format == "wkb":
+            self._fh.write("road_id,lane_section,lane_id,type,kind,wkb\n")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @profiling.profiled("export_geo")
+    def write_sections(self, sections):
+        """
+        Write the features of the sections of one or more roads.
+        :param sections: {(road id, lane section id): section data}
+        :return:
+        """
+        features = []
+        for section_index, section_data in sections.items():
+            features.extend(get_section_features(section_index, section_data, lines=self.lines))
+        if self.inverse_projection is not None:
+            features = project_features(features, self.inverse_projection)
+
+        if self.file_format == "geojson":
+            rows = [json.dumps({
+                "type": "Feature",
+                "geometry": {"type": geometry_type, "coordinates": self._round(geometry_type, coordinates)},
+                "properties": properties,
+            }, separators=(",", ":")) for geometry_type, coordinates, properties in features]
+        else:
+            rows = ["{road_id},{lane_section},{lane_id},{type},{kind},".format(
+                **{**properties, "type": properties["type"] or ""}) + to_wkb(geometry_type, coordinates).hex()
+                    for geometry_type, coordinates, properties in features]
+        if rows:
+            self._fh.write("\n".join(rows) + "\n")
+        self.features_written += len(rows)
+
+    def _round(self, geometry_type, coordinates):
+        coordinates = np.round(coordinates, self.precision).tolist()
+        return [coordinates] if geometry_type == "Polygon" else coordinates
+
+    def flush(self):
+        self._fh.flush()
+
+    def close(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+
+def export_lane_features(road_network, file, step=STEP, file_format="geojson", lines=False, georeference=True):
+    """
+    Calculate the lanes road by road and write their features, flushing after every road.
+    :param road_network: Parsed road network.
+    :param file: Output file.
+    :param step: Step of calculation.
+    :param file_format: "geojson" or "wkb".
+    :param lines: Also write the lane boundaries, center lanes and reference lines.
+    :param georeference: Project to WGS84 if the header has a <geoReference>.
+    :return: Number of written features.
+    """
+    header = road_network.header
+    geo_reference = header.geoReference if georeference and header is not None else None
+    offset = header.offset if header is not None else None
+    with LaneFeatureWriter(file, file_format=file_format, geo_reference=geo_reference, lines=lines,
+                           offset=offset) as writer:
+        for road in road_network.roads:
+            writer.write_sections(get_lane_area_of_one_road(road, step=step))
+            writer.flush()
+    return writer.features_written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the lanes of a .xodr file as GeoJSON lines or WKB.")
+    parser.add_argument("file", help="Input .xodr file.")
+    parser.add_argument("--output", default=None, help="Output file, <file name>.<geojsonl|csv> by default.")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="geojson")
+    parser.add_argument("--step", type=float, default=STEP, help="Sample step of the reference lines.")
+    parser.add_argument("--lines", action="store_true", help="Also export lane boundaries and center lines.")
+    parser.add_argument("--local", action="store_true", help="Keep local x/y even if a geoReference is given.")
+    args = parser.parse_args(argv)
+
+    output = args.output or "{}.{}".format(args.file.rsplit(".", 1)[0], FILE_EXTENSIONS[args.format])
+    road_network = load_xodr_and_parse(args.file)
+    features = export_lane_features(road_network, output, step=args.step, file_format=args.format, lines=args.lines,
+                                    georeference=not args.local)
+    print("{} features written to {}".format(features, output))
+
+
+if __name__ == "__main__":
+    main()
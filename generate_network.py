@@ -0,0 +1,458 @@
+"""
+Generator of synthetic OpenDRIVE grid networks of arbitrary size, for scale testing.
+
+The network is a grid of rows x columns nodes. Neighbouring nodes are joined by two-way roads (west to east and south
+to north). Every node with at least two roads becomes a junction with a connecting road, and a lane link, from every
+incoming to every other outgoing road. Each road has:
+    geometry       Line padding around a bump of Line / Arc / Spiral / ParamPoly3 segments, see GEOMETRY_TYPES
+    lane sections  two: sidewalk, driving | driving, sidewalk, then sidewalk, driving | driving, driving, sidewalk
+    lane offset    zero at both ends with a smooth 0.5 m shift in the middle
+The bumps are symmetric, so every road ends exactly on the junction boundary with the heading it started with.
+
+The file is written element by element with lxml's incremental writer. Roads and junctions are derived from their
+grid position when they are written, so memory does not grow with the size of the network.
+
+Usage:
+    python generate_network.py grid.xodr --rows 100 --columns 100 --geometry mixed
+"""
+
+import argparse
+import math
+
+import numpy as np
+from lxml import etree
+
+GEOMETRY_TYPES = ("line", "arc", "spiral", "paramPoly3")
+
+SPACING = 200.0  # Distance of neighbouring nodes in metres.
+JUNCTION_SIZE = 15.0  # Distance of the junction boundary from its node in metres.
+LANE_WIDTH = 3.5
+SIDEWALK_WIDTH = 2.0
+LANE_OFFSET = 0.5
+
+# Curvature (1/m), segment lengths (m) and lateral amplitude (m) of the bumps.
+CURVATURE = 0.02
+SEGMENT_LENGTH = 10.0
+POLY_LENGTH = 30.0
+POLY_AMPLITUDE = 2.0
+
+# Sample points of the numeric integration of spirals and parametric cubics.
+INTEGRATION_STEPS = 257
+
+
+def format_number(value):
+    """ Shortest exact text of a number, also for numpy scalars. """
+    return repr(float(value))
+
+
+def integrate_curve(x, y, headings, length):
+    """ End position of a curve from the headings at equally spaced samples (Simpson's rule). """
+    weights = np.ones(len(headings))
+    weights[1:-1:2] = 4
+    weights[2:-1:2] = 2
+    scale = length / (len(headings) - 1) / 3
+    return (x + scale * np.dot(weights, np.cos(headings)), y + scale * np.dot(weights, np.sin(headings)))
+
+
+def advance(state, segment):
+    """
+    State at the end of a segment.
+    :param state: (x, y, heading) at the start.
+    :param segment: ("line", length), ("arc", length, curvature), ("spiral", length, curvature start, curvature end)
+        or ("paramPoly3", length, (aU, bU, cU, dU), (aV, bV, cV, dV)) with normalized p.
+    :return: (x, y, heading)
+    """
+    x, y, heading = state
+    kind, length = segment[0], segment[1]
+    if kind == "line":
+        return x + length * math.cos(heading), y + length * math.sin(heading), heading
+    if kind == "arc":
+        curvature = segment[2]
+        end_heading = heading + curvature * length
+        return (x + (math.sin(end_heading) - math.sin(heading)) / curvature,
+                y - (math.cos(end_heading) - math.cos(heading)) / curvature, end_heading)
+    if kind == "spiral":
+        curvature_start, curvature_end = segment[2], segment[3]
+        s = np.linspace(0.0, length, INTEGRATION_STEPS)
+        headings = heading + curvature_start * s + (curvature_end - curvature_start) / (2 * length) * s ** 2
+        return integrate_curve(x, y, headings, length) + (float(headings[-1]),)
+    if kind == "paramPoly3":
+        (aU, bU, cU, dU), (aV, bV, cV, dV) = segment[2], segment[3]
+        u = aU + bU + cU + dU
+        v = aV + bV + cV + dV
+        end_heading = heading + math.atan2(bV + 2 * cV + 3 * dV, bU + 2 * cU + 3 * dU)
+        return (x + u * math.cos(heading) - v * math.sin(heading),
+                y + u * math.sin(heading) + v * math.cos(heading), end_heading)
+    raise ValueError("Unknown segment {}".format(kind))
+
+
+def get_poly_length(coefficients_u, coefficients_v):
+    """ Arc length of a parametric cubic with p in [0, 1]. """
+    p = np.linspace(0.0, 1.0, INTEGRATION_STEPS)
+    du = np.polynomial.polynomial.polyval(p, np.arange(1, 4) * np.array(coefficients_u[1:]))
+    dv = np.polynomial.polynomial.polyval(p, np.arange(1, 4) * np.array(coefficients_v[1:]))
+    speeds = np.hypot(du, dv)
+    weights = np.ones(len(p))
+    weights[1:-1:2] = 4
+    weights[2:-1:2] = 2
+    return float(np.dot(weights, speeds) / (len(p) - 1) / 3)
+
+
+def get_bump(geometry_type):
+    """
+    Segments of a bump that starts at (0, 0) with heading 0 and ends on the x axis with heading 0.
+    :return: List of segments, see "advance".
+    """
+    k, a = CURVATURE, SEGMENT_LENGTH
+    if geometry_type == "line":
+        return []
+    if geometry_type == "arc":
+        return [("arc", a, k), ("arc", 2 * a, -k), ("arc", a, k)]
+    if geometry_type == "spiral":
+        # Curvature is symmetric about the middle and integrates to zero over each half.
+        return [("spiral", a, 0.0, k), ("spiral", a, k, -k), ("arc", a, -k), ("spiral", a, -k, k),
+                ("spiral", a, k, 0.0)]
+    if geometry_type == "paramPoly3":
+        segments = []
+        for amplitude in (POLY_AMPLITUDE, -POLY_AMPLITUDE):
+            coefficients_u = (0.0, POLY_LENGTH, 0.0, 0.0)
+            coefficients_v = (0.0, 0.0, 3 * amplitude, -2 * amplitude)  # Smoothstep, flat at both ends.
+            segments.append(("paramPoly3", get_poly_length(coefficients_u, coefficients_v), coefficients_u,
+                             coefficients_v))
+        return segments
+    raise ValueError("Geometry type must be one of {}".format(GEOMETRY_TYPES))
+
+
+class GridNetworkGenerator:
+    """
+    Ids: horizontal roads, then vertical roads, then junctions, then the connecting roads of every node (12 ids per
+    node, one per ordered pair of its 4 arms).
+    """
+
+    def __init__(self, rows, columns, geometry="mixed", spacing=SPACING, junction_size=JUNCTION_SIZE):
+        """
+        :param rows: Number of node rows.
+        :param columns: Number of node columns.
+        :param geometry: One of GEOMETRY_TYPES or "mixed" to cycle through them road by road.
+        :param spacing: Distance of neighbouring nodes in metres.
+        :param junction_size: Distance of the junction boundaries from their node in metres.
+        """
+        if rows * columns < 2:
+            raise ValueError("The grid needs at least two nodes.")
+        if geometry != "mixed" and geometry not in GEOMETRY_TYPES:
+            raise ValueError("Geometry must be mixed or one of {}".format(GEOMETRY_TYPES))
+        self.rows = rows
+        self.columns = columns
+        self.geometry = geometry
+        self.spacing = spacing
+        self.junction_size = junction_size
+
+        self.n_horizontal = rows * (columns - 1)
+        self.n_vertical = (rows - 1) * columns
+        self.first_junction = self.n_horizontal + self.n_vertical
+        self.first_connecting_road = self.first_junction + rows * columns
+
+        # Bumps and their length along the x axis, in local coordinates.
+        self.bumps = dict()
+        for geometry_type in GEOMETRY_TYPES:
+            segments = get_bump(geometry_type)
+            state = (0.0, 0.0, 0.0)
+            for segment in segments:
+                state = advance(state, segment)
+            self.bumps[geometry_type] = (segments, state[0])
+
+    def get_node_position(self, row, column):
+        return column * self.spacing, row * self.spacing
+
+    def get_arms(self, row, column):
+        """
+        Roads touching a node.
+        :return: List of (road id, contact point, boundary point, heading of traffic entering the junction).
+        """
+        x, y = self.get_node_position(row, column)
+        size = self.junction_size
+        arms = []
+        if column > 0:
+            arms.append((row * (self.columns - 1) + column - 1, "end", (x - size, y), 0.0))
+        if row > 0:
+            arms.append((self.n_horizontal + (row - 1) * self.columns + column, "end", (x, y - size), math.pi / 2))
+        if column < self.columns - 1:
+            arms.append((row * (self.columns - 1) + column, "start", (x + size, y), math.pi))
+        if row < self.rows - 1:
+            arms.append((self.n_horizontal + row * self.columns + column, "start", (x, y + size), -math.pi / 2))
+        return arms
+
+    def is_junction(self, row, column):
+        return len(self.get_arms(row, column)) >= 2
+
+    def get_junction_id(self, row, column):
+        return self.first_junction + row * self.columns + column
+
+    @property
+    def n_roads(self):
+        return self.n_horizontal + self.n_vertical
+
+    def iterate_grid_roads(self):
+        """ (road id, start node, end node) of all roads between nodes. """
+        for row in range(self.rows):
+            for column in range(self.columns - 1):
+                yield row * (self.columns - 1) + column, (row, column), (row, column + 1)
+        for row in range(self.rows - 1):
+            for column in range(self.columns):
+                yield self.n_horizontal + row * self.columns + column, (row, column), (row + 1, column)
+
+    def get_geometry_type(self, road_id):
+        return GEOMETRY_TYPES[road_id % len(GEOMETRY_TYPES)] if self.geometry == "mixed" else self.geometry
+
+    def build_road(self, road_id, start_node, end_node):
+        start_size = self.junction_size if self.is_junction(*start_node) else 0.0
+        end_size = self.junction_size if self.is_junction(*end_node) else 0.0
+        (x0, y0), (x1, y1) = self.get_node_position(*start_node), self.get_node_position(*end_node)
+        heading = math.atan2(y1 - y0, x1 - x0)
+        distance = math.hypot(x1 - x0, y1 - y0) - start_size - end_size
+        start = (x0 + start_size * math.cos(heading), y0 + start_size * math.sin(heading), heading)
+
+        segments, bump_length = self.bumps[self.get_geometry_type(road_id)]
+        if not segments or distance < bump_length + 2.0:
+            segments = [("line", distance)]
+        else:
+            padding = (distance - bump_length) / 2
+            segments = [("line", padding)] + segments + [("line", padding)]
+
+        links = []
+        if start_size:
+            links.append(("predecessor", "junction", self.get_junction_id(*start_node), None))
+        if end_size:
+            links.append(("successor", "junction", self.get_junction_id(*end_node), None))
+        return build_road_element(road_id, "Road {}".format(road_id), -1, start, segments, links, connecting=False)
+
+    def iterate_connecting_roads(self, row, column):
+        """ (connecting road id, incoming arm, outgoing arm) of one junction. """
+        arms = self.get_arms(row, column)
+        base = self.first_connecting_road + 12 * (row * self.columns + column)
+        index = 0
+        for incoming in arms:
+            for outgoing in arms:
+                if incoming is not outgoing:
+                    yield base + index, incoming, outgoing
+                    index += 1
+
+    def build_connecting_road(self, road_id, junction_id, incoming, outgoing):
+        incoming_road, incoming_contact, (x0, y0), heading = incoming
+        outgoing_road, outgoing_contact, (x1, y1), outgoing_heading = outgoing
+        turn = (outgoing_heading + math.pi - heading + math.pi) % (2 * math.pi) - math.pi
+        if abs(turn) < 1e-9:
+            segments = [("line", math.hypot(x1 - x0, y1 - y0))]
+        else:
+            # The boundary points of perpendicular arms lie on a circle of radius junction_size.
+            segments = [("arc", self.junction_size * abs(turn), math.copysign(1 / self.junction_size, turn))]
+        links = [("predecessor", "road", incoming_road, incoming_contact),
+                 ("successor", "road", outgoing_road, outgoing_contact)]
+        lane_link = (get_incoming_lane(incoming_contact), get_outgoing_lane(outgoing_contact))
+        return build_road_element(road_id, "Connecting road {}".format(road_id), junction_id, (x0, y0, heading),
+                                  segments, links, connecting=True, lane_link=lane_link)
+
+    def build_junction(self, row, column):
+        junction_id = self.get_junction_id(row, column)
+        junction = etree.Element("junction", id=str(junction_id), name="Junction {}".format(junction_id))
+        for index, (road_id, incoming, _) in enumerate(self.iterate_connecting_roads(row, column)):
+            connection = etree.SubElement(junction, "connection", id=str(index), incomingRoad=str(incoming[0]),
+                                          connectingRoad=str(road_id), contactPoint="start")
+            etree.SubElement(connection, "laneLink", to="-1", **{"from": str(get_incoming_lane(incoming[1]))})
+        return junction
+
+    def build_header(self):
+        size = self.junction_size
+        return etree.Element("header", revMajor="1", revMinor="4", name="grid {}x{}".format(self.rows, self.columns),
+                             version="1", vendor="generate_network.py",
+                             north=format_number((self.rows - 1) * self.spacing + size), south=format_number(-size),
+                             east=format_number((self.columns - 1) * self.spacing + size), west=format_number(-size))
+
+    def write(self, file, progress=None):
+        """
+        Write the network.
+        :param file: Path or binary file object.
+        :param progress: Optional callback called with the number of written roads every 10000 roads.
+        :return: Dictionary of counts.
+        """
+        counts = {"roads": 0, "connecting_roads": 0, "junctions": 0}
+        with etree.xmlfile(file, encoding="utf-8") as xf:
+            xf.write_declaration()
+            with xf.element("OpenDRIVE"):
+                xf.write("\n")
+                xf.write(self.build_header(), pretty_print=True)
+                for road_id, start_node, end_node in self.iterate_grid_roads():
+                    xf.write(self.build_road(road_id, start_node, end_node), pretty_print=True)
+                    counts["roads"] += 1
+                    if progress and counts["roads"] % 10000 == 0:
+                        progress(counts["roads"])
+                for row in range(self.rows):
+                    for column in range(self.columns):
+                        if not self.is_junction(row, column):
+                            continue
+                        junction_id = self.get_junction_id(row, column)
+                        for road_id, incoming, outgoing in self.iterate_connecting_roads(row, column):
+                            xf.write(self.build_connecting_road(road_id, junction_id, incoming, outgoing),
+                                     pretty_print=True)
+                            counts["connecting_roads"] += 1
+                for row in range(self.rows):
+                    for column in range(self.columns):
+                        if self.is_junction(row, column):
+                            xf.write(self.build_junction(row, column), pretty_print=True)
+                            counts["junctions"] += 1
+        return counts
+
+
+def get_incoming_lane(contact_point):
+    """ Lane of a road carrying traffic into the junction at a contact point. """
+    return -1 if contact_point == "end" else 1
+
+
+def get_outgoing_lane(contact_point):
+    """ Lane of a road carrying traffic out of the junction at a contact point. """
+    return 1 if contact_point == "end" else -1
+
+
+def _set_coefficients(element, a, b=0.0, c=0.0, d=0.0):
+    for name, value in zip("abcd", (a, b, c, d)):
+        element.set(name, format_number(value))
+
+
+def build_road_element(road_id, name, junction_id, start, segments, links, connecting=False, lane_link=None):
+    """
+    Build one <road>.
+    :param road_id:
+    :param name:
+    :param junction_id: -1 outside of junctions.
+    :param start: (x, y, heading) of the reference line start.
+    :param segments: Plan view segments, see "advance".
+    :param links: List of (predecessor or successor, element type, element id, contact point or None).
+    :param connecting: Connecting roads have a single lane -1 and no lane offset.
+    :param lane_link: (predecessor lane id, successor lane id) of the lane of a connecting road.
+    :return: Element
+    """
+    length = sum(segment[1] for segment in segments)
+    road = etree.Element("road", name=name, length=format_number(length), id=str(road_id), junction=str(junction_id))
+    link = etree.SubElement(road, "link")
+    for tag, element_type, element_id, contact_point in links:
+        attributes = {"elementType": element_type, "elementId": str(element_id)}
+        if contact_point:
+            attributes["contactPoint"] = contact_point
+        etree.SubElement(link, tag, **attributes)
+    etree.SubElement(road, "type", s="0.0", type="town")
+
+    plan_view = etree.SubElement(road, "planView")
+    state, s = start, 0.0
+    for segment in segments:
+        geometry = etree.SubElement(plan_view, "geometry", s=format_number(s), x=format_number(state[0]),
+                                    y=format_number(state[1]), hdg=format_number(state[2]),
+                                    length=format_number(segment[1]))
+        kind = segment[0]
+        if kind == "line":
+            etree.SubElement(geometry, "line")
+        elif kind == "arc":
+            etree.SubElement(geometry, "arc", curvature=format_number(segment[2]))
+        elif kind == "spiral":
+            etree.SubElement(geometry, "spiral", curvStart=format_number(segment[2]),
+                             curvEnd=format_number(segment[3]))
+        else:
+            attributes = {name + axis: format_number(value)
+                          for axis, coefficients in (("U", segment[2]), ("V", segment[3]))
+                          for name, value in zip("abcd", coefficients)}
+            etree.SubElement(geometry, "paramPoly3", pRange="normalized", **attributes)
+        state = advance(state, segment)
+        s += segment[1]
+
+    lanes = etree.SubElement(road, "lanes")
+    if connecting:
+        _set_coefficients(etree.SubElement(lanes, "laneOffset", s="0.0"), 0.0)
+        lane_section = etree.SubElement(lanes, "laneSection", s="0.0")
+        _add_lane(etree.SubElement(lane_section, "center"), 0, "none", None, None)
+        _add_lane(etree.SubElement(lane_section, "right"), -1, "driving", LANE_WIDTH, lane_link, speed=30)
+        return road
+
+    # Smooth shift of the lanes by LANE_OFFSET in the middle of the road, zero at both ends.
+    quarter = length / 4
+    for s, a, c, d in ((0.0, 0.0, 0.0, 0.0),
+                       (quarter, 0.0, 3 * LANE_OFFSET / quarter ** 2, -2 * LANE_OFFSET / quarter ** 3),
+                       (2 * quarter, LANE_OFFSET, -3 * LANE_OFFSET / quarter ** 2, 2 * LANE_OFFSET / quarter ** 3),
+                       (3 * quarter, 0.0, 0.0, 0.0)):
+        _set_coefficients(etree.SubElement(lanes, "laneOffset", s=format_number(s)), a, 0.0, c, d)
+
+    # Junction ends: lane -1 and 1 link to the connecting roads, the junction holds those links.
+    middle = length / 2
+    first = etree.SubElement(lanes, "laneSection", s="0.0")
+    _add_lane(etree.SubElement(first, "left"), 2, "sidewalk", SIDEWALK_WIDTH, (None, 2))
+    _add_lane(first.find("left"), 1, "driving", LANE_WIDTH, (None, 1), speed=50)
+    _add_lane(etree.SubElement(first, "center"), 0, "none", None, None)
+    right = etree.SubElement(first, "right")
+    _add_lane(right, -1, "driving", LANE_WIDTH, (None, -1), speed=50)
+    _add_lane(right, -2, "sidewalk", SIDEWALK_WIDTH, (None, -3))
+
+    second = etree.SubElement(lanes, "laneSection", s=format_number(middle))
+    _add_lane(etree.SubElement(second, "left"), 2, "sidewalk", SIDEWALK_WIDTH, (2, None))
+    _add_lane(second.find("left"), 1, "driving", LANE_WIDTH, (1, None), speed=50)
+    _add_lane(etree.SubElement(second, "center"), 0, "none", None, None)
+    right = etree.SubElement(second, "right")
+    _add_lane(right, -1, "driving", LANE_WIDTH, (-1, None), speed=50)
+    _add_lane(right, -2, "driving", LANE_WIDTH - 0.5, None, speed=50)
+    _add_lane(right, -3, "sidewalk", SIDEWALK_WIDTH, (-2, None))
+    return road
+
+
+def _add_lane(side, lane_id, lane_type, width, lane_link, speed=None):
+    lane = etree.SubElement(side, "lane", id=str(lane_id), type=lane_type, level="false")
+    link = etree.SubElement(lane, "link")
+    if lane_link is not None:
+        predecessor, successor = lane_link
+        if predecessor is not None:
+            etree.SubElement(link, "predecessor", id=str(predecessor))
+        if successor is not None:
+            etree.SubElement(link, "successor", id=str(successor))
+    if width is not None:
+        _set_coefficients(etree.SubElement(lane, "width", sOffset="0.0"), width)
+    mark_type = "solid" if lane_id == 0 or lane_type == "sidewalk" else "broken"
+    etree.SubElement(lane, "roadMark", sOffset="0.0", type=mark_type, weight="standard",
+                     color="yellow" if lane_id == 0 else "white", width="0.15", laneChange="none")
+    if speed is not None:
+        etree.SubElement(lane, "speed", sOffset="0.0", max=str(speed), unit="km/h")
+
+
+def generate_network(file, rows, columns, geometry="mixed", spacing=SPACING, junction_size=JUNCTION_SIZE,
+                     progress=None):
+    """
+    Write a synthetic grid network.
+    :param file: Path or binary file object.
+    :param rows: Number of node rows.
+    :param columns: Number of node columns.
+    :param geometry: One of GEOMETRY_TYPES or "mixed".
+    :param spacing: Distance of neighbouring nodes in metres.
+    :param junction_size: Distance of the junction boundaries from their node in metres.
+    :param progress: Optional callback called with the number of written roads every 10000 roads.
+    :return: Dictionary of counts.
+    """
+    generator = GridNetworkGenerator(rows, columns, geometry=geometry, spacing=spacing, junction_size=junction_size)
+    return generator.write(file, progress=progress)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic grid network as xodr.")
+    parser.add_argument("output", help="Output xodr file.")
+    parser.add_argument("--rows", type=int, default=10, help="Number of node rows.")
+    parser.add_argument("--columns", type=int, default=10, help="Number of node columns.")
+    parser.add_argument("--geometry", choices=("mixed",) + GEOMETRY_TYPES, default="mixed",
+                        help="Geometry of the roads, mixed cycles through all types.")
+    parser.add_argument("--spacing", type=float, default=SPACING, help="Distance of neighbouring nodes in metres.")
+    parser.add_argument("--junction-size", type=float, default=JUNCTION_SIZE,
+                        help="Distance of the junction boundaries from their node in metres.")
+    args = parser.parse_args(argv)
+
+    counts = generate_network(args.output, args.rows, args.columns, geometry=args.geometry, spacing=args.spacing,
+                              junction_size=args.junction_size,
+                              progress=lambda n: print("{} roads written".format(n), flush=True))
+    print("{roads} roads, {connecting_roads} connecting roads and {junctions} junctions written".format(**counts),
+          "to", args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Continuity healing of the plan views of a road network.
+
+Consecutive plan view geometries should join without a gap and without a heading jump, but exported files often
+carry small jumps from rounded start values. They show up as kinks in the sampled reference lines. Healing snaps the
+start of every geometry to the end of its predecessor (position and / or heading) where the jump is within
+tolerance, evaluating the geometry ends with the vectorized "calcPositions". Larger jumps are left alone and reported.
+A snap moves and turns the rest of the road rigidly about the joint, so no other joint opens up. If the end of a road
+would move by more than "end_tolerance" or any joint would get worse, the road is restored, so the links to the next
+road are not broken.
+
+Usage:
+    report = heal_network(road_network)  # Before sampling the lanes.
+    print(report["healed"], report["max_gap_after"])
+    python heal_geometry.py Export20241128.xodr --report-only
+"""
+
+import argparse
+
+import numpy as np
+
+from parse_and_visualize import load_xodr_and_parse
+
+POSITION_TOLERANCE = 0.05  # m
+HEADING_TOLERANCE = 0.01  # rad
+END_TOLERANCE = 0.05  # m
+# Joints with smaller gaps (m) and heading jumps (rad) count as continuous, e.g. floating point noise.
+CONTINUITY_EPS = 1e-9
+
+
+def wrap_angle(angle):
+    """ Angle in [-pi, pi). """
+    return (angle + np.pi) % (2 * np.pi) - np.pi
+
+
+def measure_discontinuities(road_network):
+    """
+    Position gaps and heading jumps of all joints between consecutive geometries of a network.
+    :param road_network: Parsed road network.
+    :return: Dictionary of arrays with one entry per joint: road_ids, geometries (index of the geometry before the
+        joint), gaps (m) and heading_jumps (rad).
+    """
+    road_ids, geometries, gaps, heading_jumps = [], [], [], []
+    for road in road_network.roads:
+        road_gaps, road_heading_jumps = road.planView.getDiscontinuities()
+        road_ids.append(np.full(len(road_gaps), road.id, dtype=np.int64))
+        geometries.append(np.arange(len(road_gaps), dtype=np.int64))
+        gaps.append(road_gaps)
+        heading_jumps.append(road_heading_jumps)
+    return {
+        "road_ids": np.concatenate(road_ids) if road_ids else np.zeros(0, dtype=np.int64),
+        "geometries": np.concatenate(geometries) if geometries else np.zeros(0, dtype=np.int64),
+        "gaps": np.concatenate(gaps) if gaps else np.zeros(0),
+        "heading_jumps": np.concatenate(heading_jumps) if heading_jumps else np.zeros(0),
+    }
+
+
+def get_end(geometry):
+    positions, tangents = geometry.calcPositions([geometry.getLength()])
+    return positions[0], tangents[0]
+
+
+def heal_plan_view(plan_view, position_tolerance=POSITION_TOLERANCE, heading_tolerance=HEADING_TOLERANCE,
+                   end_tolerance=END_TOLERANCE):
+    """
+    Snap the geometries of one plan view to the ends of their predecessors. A snap moves and turns the rest of the
+    plan view rigidly about the joint, so the other joints keep their gaps and heading jumps.
+    :param plan_view: PlanView, changed in place.
+    :param position_tolerance: Gaps up to this (m) are closed.
+    :param heading_tolerance: Heading jumps up to this (rad) are removed.
+    :param end_tolerance: Largest accepted shift of the end of the plan view (m), otherwise nothing is changed.
+    :return: (number of healed joints, shift of the end of the plan view in m, whether the plan view was restored
+        because its end moved too far or a joint got worse)
+    """
+    geometries = plan_view._geometries
+    if len(geometries) < 2:
+        return 0, 0.0, False
+
+    starts = [(np.array(geometry.getStartPosition(), dtype=np.float64), geometry.getStartHeading())
+              for geometry in geometries]
+    end_before, _ = get_end(geometries[-1])
+    gaps_before, heading_jumps_before = plan_view.getDiscontinuities()
+
+    healed = 0
+    for index, (previous, geometry) in enumerate(zip(geometries[:-1], geometries[1:])):
+        end_position, end_heading = get_end(previous)
+        start_position = np.array(geometry.getStartPosition(), dtype=np.float64)
+        start_heading = geometry.getStartHeading()
+        gap = np.hypot(*(start_position - end_position))
+        heading_jump = wrap_angle(start_heading - end_heading)
+        if gap <= CONTINUITY_EPS and abs(heading_jump) <= CONTINUITY_EPS:
+            continue
+
+        snap_position = gap <= position_tolerance
+        snap_heading = abs(heading_jump) <= heading_tolerance
+        if not (snap_position or snap_heading):
+            continue
+        # Rigid transform of the geometries from the joint on: turn about the start, then move it to the snap point.
+        rotation = -heading_jump if snap_heading else 0.0
+        target = end_position if snap_position else start_position
+        cos, sin = np.cos(rotation), np.sin(rotation)
+        for following in geometries[index + 1:]:
+            offset = np.array(following.getStartPosition(), dtype=np.float64) - start_position
+            following.setStart(target + (cos * offset[0] - sin * offset[1], sin * offset[0] + cos * offset[1]),
+                               following.getStartHeading() + rotation)
+        healed += 1
+
+    end_after, _ = get_end(geometries[-1])
+    shift = float(np.hypot(*(end_after - end_before)))
+    gaps_after, heading_jumps_after = plan_view.getDiscontinuities()
+    worse = np.any(gaps_after > gaps_before + CONTINUITY_EPS) or \
+        np.any(np.abs(heading_jumps_after) > np.abs(heading_jumps_before) + CONTINUITY_EPS)
+    if shift > end_tolerance or worse:
+        for geometry, (start_position, start_heading) in zip(geometries, starts):
+            geometry.setStart(start_position, start_heading)
+        return 0, shift, True
+    return healed, shift, False
+
+
+def heal_network(road_network, position_tolerance=POSITION_TOLERANCE, heading_tolerance=HEADING_TOLERANCE,
+                 end_tolerance=END_TOLERANCE, report_only=False):
+    """
+    Measure and heal the discontinuities of all plan views of a network.
+    :param road_network: Parsed road network, changed in place unless report_only.
+    :param position_tolerance: Gaps up to this (m) are closed.
+    :param heading_tolerance: Heading jumps up to this (rad) are removed.
+    :param end_tolerance: Largest accepted shift of the end of a road (m), roads moving more are left unchanged.
+    :param report_only: Only measure.
+    :return: Dictionary with the number of joints, discontinuous and healed joints, restored roads and the largest
+        jumps before and after healing.
+    """
+    before = measure_discontinuities(road_network)
+    report = {
+        "joints": len(before["gaps"]),
+        "discontinuous": int(np.count_nonzero((before["gaps"] > CONTINUITY_EPS) |
+                                              (np.abs(before["heading_jumps"]) > CONTINUITY_EPS))),
+        "max_gap_before": float(before["gaps"].max(initial=0.0)),
+        "max_heading_jump_before": float(np.abs(before["heading_jumps"]).max(initial=0.0)),
+        "healed": 0,
+        "restored_roads": [],
+        "max_end_shift": 0.0,
+    }
+    if report_only:
+        return report
+
+    for road in road_network.roads:
+        healed, shift, restored = heal_plan_view(road.planView, position_tolerance, heading_tolerance, end_tolerance)
+        report["healed"] += healed
+        if restored:
+            report["restored_roads"].append(road.id)
+        else:
+            report["max_end_shift"] = max(report["max_end_shift"], shift)
+
+    after = measure_discontinuities(road_network)
+    report["max_gap_after"] = float(after["gaps"].max(initial=0.0))
+    report["max_heading_jump_after"] = float(np.abs(after["heading_jumps"]).max(initial=0.0))
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure and heal plan view discontinuities of a xodr file.")
+    parser.add_argument("file", help="xodr file")
+    parser.add_argument("--position-tolerance", type=float, default=POSITION_TOLERANCE,
+                        help="Gaps up to this (m) are closed.")
+    parser.add_argument("--heading-tolerance", type=float, default=HEADING_TOLERANCE,
+                        help="Heading jumps up to this (rad) are removed.")
+    parser.add_argument("--end-tolerance", type=float, default=END_TOLERANCE,
+                        help="Largest accepted shift of the end of a road (m).")
+    parser.add_argument("--report-only", action="store_true", help="Only measure the discontinuities.")
+    args = parser.parse_args(argv)
+
+    report = heal_network(load_xodr_and_parse(args.file), position_tolerance=args.position_tolerance,
+                          heading_tolerance=args.heading_tolerance, end_tolerance=args.end_tolerance,
+                          report_only=args.report_only)
+    for key, value in report.items():
+        print("{:<24} {}".format(key, value))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Diff-aware re-evaluation of an edited .xodr file.
+
+Every <road> and <junction> subtree is hashed. On each update only the changed elements are parsed again, and lane
+geometry is recomputed only for changed roads and the roads linked to them. Everything else is reused from the
+previous run and the lane geometry cache.
+
+Usage:
+    network = IncrementalNetwork("Export.xodr", step=0.1)
+    total_areas = network.update()  # Full run.
+    ...  # The file is saved again by the map editor.
+    total_areas = network.update()  # Only the edited roads are recomputed.
+    print(network.last_report)
+"""
+
+import hashlib
+import os
+import time
+
+from lxml import etree
+
+from opendriveparser.elements.openDrive import OpenDrive
+from opendriveparser.elements.roadObjects import RoadSignal, RoadSignalReference
+from opendriveparser.parser import (parse_opendrive_header, parse_opendrive_junction, parse_opendrive_road,
+                                    resolve_signal_references)
+from lane_geometry_cache import LANE_GEOMETRY_CACHE
+from parse_and_visualize import get_all_lanes
+
+
+def hash_element(node):
+    """
+    Hash the serialized subtree of one xml element.
+    :param node:
+    :return: Digest bytes.
+    """
+    return hashlib.blake2b(etree.tostring(node, with_tail=False), digest_size=16).digest()
+
+
+def get_linked_road_ids(road, junctions):
+    """
+    Get the ids of all roads linked to one road, either directly or through the connections of a junction.
+    :param road:
+    :param junctions: Dictionary of junction id => Junction.
+    :return: Set of road ids.
+    """
+    res = set()
+    for link in (road.link.predecessor, road.link.successor):
+        if link is None:
+            continue
+        if link.elementType == "road":
+            res.add(link.elementId)
+        elif link.elementType == "junction" and link.elementId in junctions:
+            for connection in junctions[link.elementId].connections:
+                if road.id in (connection.incomingRoad, connection.connectingRoad):
+                    res.update((connection.incomingRoad, connection.connectingRoad))
+    for neighbor in road.link.neighbors:
+        res.add(neighbor.elementId)
+    res.discard(road.id)
+    return res
+
+
+class IncrementalNetwork:
+    """
+    Keeps the parsed elements, their hashes and the lane geometry of one .xodr file between updates.
+    """
+
+    def __init__(self, file, step=0.1, cache=None):
+        self.file = file
+        self.step = step
+        self.cache = LANE_GEOMETRY_CACHE if cache is None else cache
+        self.namespace = os.path.abspath(file)
+
+        self.road_network = None
+        self.last_report = None
+        self._road_hashes = dict()  # road id => digest
+        self._junction_hashes = dict()  # junction id => digest
+        self._roads = dict()  # road id => Road
+        self._junctions = dict()  # junction id => Junction
+
+    def update(self):
+        """
+        Reload the file, parse the changed roads and junctions and recompute the affected lane geometry.
+        :return: The "get_all_lanes" result of the whole network.
+        """
+        start = time.perf_counter()
+        with open(self.file, "rb") as fh:
+            root_node = etree.parse(fh, etree.XMLParser()).getroot()
+
+        old_roads, old_junctions = self._roads, self._junctions
+        roads, junctions = dict(), dict()
+        road_hashes, junction_hashes = dict(), dict()
+        changed_junctions = set()
+        for junction in root_node.findall("junction"):
+            junction_id = int(junction.get("id"))
+            digest = hash_element(junction)
+            junction_hashes[junction_id] = digest
+            if self._junction_hashes.get(junction_id) == digest:
+                junctions[junction_id] = old_junctions[junction_id]
+            else:
+                junctions[junction_id] = parse_opendrive_junction(junction)
+                changed_junctions.add(junction_id)
+        changed_junctions.update(set(old_junctions) - set(junctions))
+
+        road_order = []
+        changed_roads = set()
+        for road in root_node.findall("road"):
+            road_id = int(road.get("id"))
+            digest = hash_element(road)
+            road_hashes[road_id] = digest
+            road_order.append(road_id)
+            if self._road_hashes.get(road_id) == digest:
+                roads[road_id] = old_roads[road_id]
+            else:
+                roads[road_id] = parse_opendrive_road(road)
+                changed_roads.add(road_id)
+        removed_roads = set(old_roads) - set(roads)
+
+        # Roads to recompute: changed roads, roads linked to them before or after the edit and roads of changed junctions.
+        dirty_roads = set(changed_roads) | removed_roads
+        for road_id in changed_roads | removed_roads:
+            if road_id in roads:
+                dirty_roads.update(get_linked_road_ids(roads[road_id], junctions))
+            if road_id in old_roads:
+                dirty_roads.update(get_linked_road_ids(old_roads[road_id], old_junctions))
+        for road_id, road in roads.items():
+            if get_linked_road_ids(road, junctions) & (changed_roads | removed_roads):
+                dirty_roads.add(road_id)
+        for junction_id in changed_junctions:
+            for junction in (junctions.get(junction_id), old_junctions.get(junction_id)):
+                if junction is None:
+                    continue
+                for connection in junction.connections:
+                    dirty_roads.update((connection.incomingRoad, connection.connectingRoad))
+
+        self.cache.invalidate_roads(dirty_roads, namespace=self.namespace)
+
+        # Signal references of parsed roads and references to the signals of changed or removed roads.
+        changed_signals = {signal.id for road_id in changed_roads | removed_roads
+                           for road in (roads.get(road_id), old_roads.get(road_id)) if road is not None
+                           for signal in road.signals if isinstance(signal, RoadSignal)}
+        resolve_signal_references(
+            [road for road_id, road in roads.items() if road_id in changed_roads or any(
+                isinstance(signal, RoadSignalReference) and signal.id in changed_signals for signal in road.signals)],
+            roads.values())
+
+        road_network = OpenDrive()
+        if root_node.find("header") is not None:
+            road_network.header = parse_opendrive_header(root_node.find("header"))
+        road_network.junctions.extend(junctions.values())
+        road_network.roads.extend(roads[road_id] for road_id in road_order)
+        parse_time = time.perf_counter() - start
+
+        total_areas = get_all_lanes(road_network, step=self.step, cache=self.cache, namespace=self.namespace)
+
+        self.road_network = road_network
+        self._roads, self._junctions = roads, junctions
+        self._road_hashes, self._junction_hashes = road_hashes, junction_hashes
+        self.last_report = {
+            "changed_roads": sorted(changed_roads),
+            "removed_roads": sorted(removed_roads),
+            "changed_junctions": sorted(changed_junctions),
+            "recomputed_roads": sorted(dirty_roads & set(roads)),
+            "reused_roads": len(roads) - len(dirty_roads & set(roads)),
+            "parse_seconds": parse_time,
+            "total_seconds": time.perf_counter() - start,
+        }
+        return total_areas
@@ -0,0 +1,309 @@
+"""
+Conflict areas of the lanes inside junctions.
+
+The lanes of the connecting roads of a junction are sampled once and cut into quads (two consecutive points of the
+inner and of the outer boundary). Two lanes conflict where their quads overlap; the overlaps are clipped with
+Sutherland-Hodgman, so the conflict area of a lane pair is a list of convex polygons. Pairs are pruned in two stages:
+first by the bounding boxes of whole lanes, then by the bounding boxes of the quads of the remaining pairs.
+A conflict is classified with the lane graph as
+    "diverging"  both lanes come from the same lane
+    "merging"    both lanes lead into the same lane
+    "crossing"   otherwise
+
+All junctions are computed once per network and step by "get_junction_conflicts", queries by junction id are a dict
+lookup.
+
+Usage:
+    conflicts = get_junction_conflicts(road_network)
+    for conflict in conflicts.get(junction_id):
+        print(conflict.lane_a, conflict.lane_b, conflict.kind, conflict.area)
+    python junction_conflicts.py Export20241128.xodr
+"""
+
+import argparse
+import weakref
+
+import numpy as np
+
+from lane_graph import DRIVABLE_TYPES, get_lane_graph
+from parse_and_visualize import STEP, get_lane_area_of_one_road, iterate_lane_areas, load_xodr_and_parse
+
+# Overlaps smaller than this (square metres) are ignored, e.g. lanes that only touch along a boundary.
+MIN_CONFLICT_AREA = 0.01
+
+_JUNCTION_CONFLICTS = weakref.WeakKeyDictionary()
+
+
+def get_signed_area(polygon):
+    """ Shoelace area of a polygon of shape (n, 2), positive if counterclockwise. """
+    x, y = polygon[:, 0], polygon[:, 1]
+    return 0.5 * float(np.dot(x, np.roll(y, -1)) - np.dot(np.roll(x, -1), y))
+
+
+def clip_polygon(subject, clip):
+    """
+    Sutherland-Hodgman clipping of a polygon by a convex counterclockwise polygon.
+    :param subject: Array of shape (n, 2).
+    :param clip: Convex counterclockwise array of shape (m, 2).
+    :return: Intersection as an array of shape (k, 2), k < 3 if empty.
+    """
+    output = [tuple(point) for point in subject]
+    for i in range(len(clip)):
+        if not output:
+            break
+        (ax, ay), (bx, by) = clip[i - 1], clip[i]
+        points, output = output, []
+        # Positive if a point lies left of the clip edge a -> b, i.e. inside.
+        sides = [(bx - ax) * (y - ay) - (by - ay) * (x - ax) for x, y in points]
+        for j in range(len(points)):
+            previous, current = points[j - 1], points[j]
+            side_previous, side_current = sides[j - 1], sides[j]
+            if side_current >= 0:
+                if side_previous < 0:
+                    output.append(_intersect(previous, current, side_previous, side_current))
+                output.append(current)
+            elif side_previous >= 0:
+                output.append(_intersect(previous, current, side_previous, side_current))
+    return np.array(output, dtype=np.float64).reshape(-1, 2)
+
+
+def _intersect(p, q, side_p, side_q):
+    t = side_p / (side_p - side_q)
+    return p[0] + t * (q[0] - p[0]), p[1] + t * (q[1] - p[1])
+
+
+class LaneStrip:
+    """
+    One lane of a connecting road as quads. quads[i] spans the sampled points i and i + 1.
+    """
+
+    def __init__(self, key, lane_type, inner_points, outer_points, s_positions):
+        self.key = key
+        self.type = lane_type
+        # (n - 1, 4, 2): inner i, inner i + 1, outer i + 1, outer i.
+        self.quads = np.stack([inner_points[:-1], inner_points[1:], outer_points[1:], outer_points[:-1]], axis=1)
+        self.s_positions = s_positions
+        self.quad_min = self.quads.min(axis=1)
+        self.quad_max = self.quads.max(axis=1)
+        self.bounds = np.concatenate([self.quad_min.min(axis=0), self.quad_max.max(axis=0)])
+
+    def get_clip_quad(self, i):
+        """ Quad i counterclockwise, None if it is degenerate or not convex. """
+        quad = self.quads[i]
+        area = get_signed_area(quad)
+        if abs(area) < 1e-9:
+            return None
+        if area < 0:
+            quad = quad[::-1]
+        edges = np.roll(quad, -1, axis=0) - quad
+        turns = edges[:, 0] * np.roll(edges[:, 1], -1) - edges[:, 1] * np.roll(edges[:, 0], -1)
+        return quad if np.all(turns >= -1e-9) else None
+
+
+class ConflictArea:
+    """
+    Overlap of two lanes of a junction.
+    """
+
+    def __init__(self, junction_id, lane_a, lane_b, kind, polygons, s_range_a, s_range_b):
+        """
+        :param junction_id:
+        :param lane_a: (road id, lane section id, lane id)
+        :param lane_b: (road id, lane section id, lane id)
+        :param kind: "crossing", "merging" or "diverging".
+        :param polygons: Convex polygons of the overlap, arrays of shape (k, 2).
+        :param s_range_a: (first s, last s) of the overlap along the road of lane a.
+        :param s_range_b: (first s, last s) of the overlap along the road of lane b.
+        """
+        self.junction_id = junction_id
+        self.lane_a = lane_a
+        self.lane_b = lane_b
+        self.kind = kind
+        self.polygons = polygons
+        self.area = sum(abs(get_signed_area(polygon)) for polygon in polygons)
+        points = np.concatenate(polygons)
+        self.bounds = np.concatenate([points.min(axis=0), points.max(axis=0)])
+        self.s_range_a = s_range_a
+        self.s_range_b = s_range_b
+
+    def __repr__(self):
+        return "<ConflictArea {} {} {} {:.1f} m2>".format(self.kind, self.lane_a, self.lane_b, self.area)
+
+
+def get_junction_lane_strips(roads, step=STEP, drivable_only=True):
+    """
+    Sample the lanes of the connecting roads of one junction.
+    :param roads: Connecting roads of the junction.
+    :param step: Step of calculation.
+    :param drivable_only: Skip lanes whose type is not in "lane_graph.DRIVABLE_TYPES".
+    :return: List of LaneStrip.
+    """
+    strips = []
+    for road in roads:
+        for (road_id, section_id), section_data in get_lane_area_of_one_road(road, step=step).items():
+            s_positions = np.asarray(section_data["reference_points"].get("s_road", []), dtype=np.float64)
+            for lane_id, lane_type, inner_points, outer_points in iterate_lane_areas(section_data):
+                if len(inner_points) < 2 or (drivable_only and lane_type not in DRIVABLE_TYPES):
+                    continue
+                strips.append(LaneStrip((road_id, section_id, lane_id), lane_type, inner_points, outer_points,
+                                        s_positions))
+    return strips
+
+
+def get_strip_overlap(strip_a, strip_b, min_area=MIN_CONFLICT_AREA):
+    """
+    Overlap of two lane strips.
+    :return: (list of convex polygons, quad indexes of a, quad indexes of b), empty if they do not overlap.
+    """
+    # Candidate quad pairs by bounding boxes, all pairs at once.
+    candidates = np.argwhere(
+        (strip_a.quad_min[:, None, 0] <= strip_b.quad_max[None, :, 0]) &
+        (strip_b.quad_min[None, :, 0] <= strip_a.quad_max[:, None, 0]) &
+        (strip_a.quad_min[:, None, 1] <= strip_b.quad_max[None, :, 1]) &
+        (strip_b.quad_min[None, :, 1] <= strip_a.quad_max[:, None, 1]))
+
+    polygons, indexes_a, indexes_b = [], [], []
+    clip_quads = dict()
+    for i, j in candidates:
+        if j not in clip_quads:
+            clip_quads[j] = strip_b.get_clip_quad(j)
+        clip = clip_quads[j]
+        subject = strip_a.quads[i]
+        if clip is None:
+            # Strongly curved quads of b are not convex, clip by the quad of a instead.
+            clip, subject = strip_a.get_clip_quad(i), strip_b.quads[j]
+            if clip is None:
+                continue
+        polygon = clip_polygon(subject, clip)
+        if len(polygon) >= 3 and abs(get_signed_area(polygon)) >= min_area:
+            polygons.append(polygon)
+            indexes_a.append(i)
+            indexes_b.append(j)
+    return polygons, indexes_a, indexes_b
+
+
+def _get_s_range(strip, indexes):
+    s = strip.s_positions
+    if len(s) < 2:
+        return None
+    return float(s[min(indexes)]), float(s[min(max(indexes) + 1, len(s) - 1)])
+
+
+class JunctionConflicts:
+    """
+    Conflict areas of all junctions of a road network, by junction id.
+    """
+
+    def __init__(self, road_network, step=STEP, drivable_only=True, min_area=MIN_CONFLICT_AREA):
+        """
+        :param road_network: Parsed road network.
+        :param step: Step of calculation.
+        :param drivable_only: Only lanes whose type is in "lane_graph.DRIVABLE_TYPES".
+        :param min_area: Smallest overlap in square metres that counts as a conflict.
+        """
+        self.step = step
+        self.graph = get_lane_graph(road_network)
+        connecting_roads = dict()  # junction id => [road]
+        for road in road_network.roads:
+            if road.junction is not None:
+                connecting_roads.setdefault(road.junction, []).append(road)
+
+        self.strips = dict()  # junction id => [LaneStrip]
+        self.conflicts = dict()  # junction id => [ConflictArea]
+        for junction in road_network.junctions:
+            strips = get_junction_lane_strips(connecting_roads.get(junction.id, []), step, drivable_only)
+            self.strips[junction.id] = strips
+            self.conflicts[junction.id] = self._get_conflicts(junction.id, strips, min_area)
+
+    def _get_conflicts(self, junction_id, strips, min_area):
+        if len(strips) < 2:
+            return []
+
+        # Candidate lane pairs by bounding boxes, all pairs at once.
+        bounds = np.array([strip.bounds for strip in strips])
+        overlapping = ((bounds[:, None, 0] <= bounds[None, :, 2]) & (bounds[None, :, 0] <= bounds[:, None, 2]) &
+                       (bounds[:, None, 1] <= bounds[None, :, 3]) & (bounds[None, :, 1] <= bounds[:, None, 3]))
+        conflicts = []
+        for a, b in zip(*np.nonzero(np.triu(overlapping, k=1))):
+            strip_a, strip_b = strips[a], strips[b]
+            # Lanes of the same road only touch along their boundaries.
+            if strip_a.key[:2] == strip_b.key[:2]:
+                continue
+            polygons, indexes_a, indexes_b = get_strip_overlap(strip_a, strip_b, min_area)
+            if not polygons:
+                continue
+            conflicts.append(ConflictArea(junction_id, strip_a.key, strip_b.key,
+                                          self._get_kind(strip_a.key, strip_b.key), polygons,
+                                          _get_s_range(strip_a, indexes_a), _get_s_range(strip_b, indexes_b)))
+        conflicts.sort(key=lambda conflict: -conflict.area)
+        return conflicts
+
+    def _get_kind(self, key_a, key_b):
+        graph = self.graph
+        node_a, node_b = graph.get_node(*key_a), graph.get_node(*key_b)
+        if node_a is None or node_b is None:
+            return "crossing"
+        if np.intersect1d(graph.predecessors(node_a, 0), graph.predecessors(node_b, 0)).size:
+            return "diverging"
+        if np.intersect1d(graph.successors(node_a, 0), graph.successors(node_b, 0)).size:
+            return "merging"
+        return "crossing"
+
+    @property
+    def junction_ids(self):
+        return list(self.conflicts)
+
+    def get(self, junction_id, kind=None):
+        """
+        Conflict areas of one junction, largest first.
+        :param junction_id:
+        :param kind: "crossing", "merging", "diverging" or None for all.
+        :return: List of ConflictArea, empty for unknown junctions.
+        """
+        conflicts = self.conflicts.get(junction_id, [])
+        if kind is None:
+            return conflicts
+        return [conflict for conflict in conflicts if conflict.kind == kind]
+
+    def get_lane_conflicts(self, key):
+        """
+        Conflict areas of one connecting lane.
+        :param key: (road id, lane section id, lane id)
+        :return: List of ConflictArea.
+        """
+        res = []
+        for conflicts in self.conflicts.values():
+            res.extend(conflict for conflict in conflicts if key in (conflict.lane_a, conflict.lane_b))
+        return res
+
+
+def get_junction_conflicts(road_network, step=STEP):
+    """
+    Conflict areas of a parsed network, computed on the first call and cached as long as the network is alive.
+    :param road_network: Parsed road network.
+    :param step: Step of calculation.
+    :return: JunctionConflicts
+    """
+    cached = _JUNCTION_CONFLICTS.setdefault(road_network, dict())
+    if step not in cached:
+        cached[step] = JunctionConflicts(road_network, step=step)
+    return cached[step]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute the lane conflict areas of all junctions of a xodr file.")
+    parser.add_argument("file", help="xodr file")
+    parser.add_argument("--step", type=float, default=STEP, help="Step of calculation.")
+    args = parser.parse_args(argv)
+
+    conflicts = get_junction_conflicts(load_xodr_and_parse(args.file), step=args.step)
+    for junction_id in conflicts.junction_ids:
+        junction_conflicts = conflicts.get(junction_id)
+        counts = {kind: len(conflicts.get(junction_id, kind)) for kind in ("crossing", "merging", "diverging")}
+        print("junction {}: {} lanes, {} conflicts {}, {:.1f} m2".format(
+            junction_id, len(conflicts.strips[junction_id]), len(junction_conflicts), counts,
+            sum(conflict.area for conflict in junction_conflicts)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+"""
+Flat binary lane geometry format, readable with np.memmap.
+
+Simulators loading the same map many times can open the file written here instead of parsing the .xodr file and
+running "get_all_lanes" again. Every block starts at a multiple of 64 bytes and all numbers are little-endian:
+
+    header      HEADER_DTYPE, one record: magic, version, coordinate item size, step, counts and block offsets
+    boundaries  (n_points, 2) coordinates, float64 or float32. Every lane section stores its boundaries as one
+                contiguous (n_left + n_right + 1, m, 2) block of m points per boundary: the center lane, the outer
+                boundaries of the left lanes from the inside out, then those of the right lanes.
+    reference   (n_reference, 4) coordinates: s_road, tangent, x, y of the sampled reference line.
+    roads       ROAD_DTYPE, one record per road, sorted by road id.
+    sections    SECTION_DTYPE, one record per lane section.
+    lanes       LANE_DTYPE, one record per lane, in the order of the boundaries.
+    types       Lane type names, utf-8, separated by "\\n".
+
+Opening a file only reads the header and the small tables; the coordinates of a road are views into the mapping.
+
+Usage:
+    python lane_binary.py Export20241128.xodr --output Export20241128.lanes
+    lanes = LaneGeometryFile("Export20241128.lanes")
+    sections = lanes.get_road(12)  # {(road id, lane section id): section data}, like "get_lane_area_of_one_road".
+"""
+
+import argparse
+
+import numpy as np
+
+from opendriveparser import profiling
+from parse_and_visualize import STEP, get_lane_area_of_one_road, get_lane_line, load_xodr_and_parse
+
+MAGIC = b"XODRLANE"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+
+HEADER_DTYPE = np.dtype([
+    ("magic", "S8"),
+    ("version", "<u4"),
+    ("coordinate_size", "<u4"),  # 8 for float64, 4 for float32.
+    ("step", "<f8"),
+    ("n_roads", "<u8"),
+    ("n_sections", "<u8"),
+    ("n_lanes", "<u8"),
+    ("n_points", "<u8"),
+    ("n_reference", "<u8"),
+    ("boundaries_offset", "<u8"),
+    ("reference_offset", "<u8"),
+    ("roads_offset", "<u8"),
+    ("sections_offset", "<u8"),
+    ("lanes_offset", "<u8"),
+    ("types_offset", "<u8"),
+    ("types_nbytes", "<u8"),
+    ("file_size", "<u8"),
+])
+HEADER_SIZE = 192  # Bytes reserved for the header, room for later versions.
+
+ROAD_DTYPE = np.dtype([
+    ("road_id", "<i8"),
+    ("first_section", "<u8"),
+    ("n_sections", "<u8"),
+])
+
+SECTION_DTYPE = np.dtype([
+    ("road_id", "<i8"),
+    ("section_idx", "<i8"),
+    ("first_lane", "<u8"),
+    ("n_left", "<u4"),
+    ("n_right", "<u4"),
+    ("n_points", "<u8"),  # Points per boundary, equal to the reference points of the section.
+    ("boundaries_start", "<u8"),  # First row in the boundaries block.
+    ("reference_start", "<u8"),  # First row in the reference block.
+])
+
+LANE_DTYPE = np.dtype([
+    ("lane_id", "<i4"),
+    ("type_index", "<i4"),
+])
+
+COORDINATE_DTYPES = {"float64": np.dtype("<f8"), "float32": np.dtype("<f4")}
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+class LaneGeometryBinaryWriter:
+    """
+    Writes lane sections as they are calculated. The boundary coordinates are streamed to the file, the small tables
+    and the reference samples are written by "close", followed by the header.
+
+    with LaneGeometryBinaryWriter("network.lanes", step=0.1) as writer:
+        for road in road_network.roads:
+            writer.write_sections(get_lane_area_of_one_road(road, step))
+    """
+
+    def __init__(self, file, step=STEP, dtype="float64"):
+        """
+        :param file: Output file.
+        :param step: Step the sections were calculated with, stored in the header.
+        :param dtype: "float64" or "float32" coordinates.
+        """
+        if dtype not in COORDINATE_DTYPES:
+            raise ValueError("Coordinate type must be one of {}".format(tuple(COORDINATE_DTYPES)))
+        self.step = step
+        self.dtype = COORDINATE_DTYPES[dtype]
+        self._fh = open(file, "wb")
+        self._fh.write(bytes(HEADER_SIZE))
+
+        self._n_points = 0
+        self._reference = []
+        self._n_reference = 0
+        self._sections = []
+        self._lanes = []
+        self._type_indexes = dict()
+
+    @property
+    def sections_written(self):
+        return len(self._sections)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @profiling.profiled("export_binary")
+    def write_sections(self, sections):
+        """
+        Add the sections of one or more roads.
+        :param sections: {(road id, lane section id): section data} in list or array form.
+        :return:
+        """
+        for (road_id, section_idx), section_data in sections.items():
+            reference_points = section_data["reference_points"]
+            center = np.asarray(reference_points.get("position_center_lane", []), dtype=np.float64).reshape(-1, 2)
+            boundaries = [center]
+            first_lane = len(self._lanes)
+            types = section_data["types"]
+            for side in ("left_lanes_area", "right_lanes_area"):
+                for lane_id, lane_area in section_data[side].items():
+                    boundaries.append(np.asarray(lane_area["outer"], dtype=np.float64).reshape(-1, 2))
+                    type_index = self._type_indexes.setdefault(types[lane_id], len(self._type_indexes))
+                    self._lanes.append((lane_id, type_index))
+            block = np.concatenate(boundaries).astype(self.dtype, copy=False)
+
+            reference = np.column_stack([
+                np.asarray(reference_points.get("s_road", []), dtype=np.float64),
+                np.asarray(reference_points.get("tangent", []), dtype=np.float64),
+                np.asarray(reference_points.get("position", []), dtype=np.float64).reshape(-1, 2),
+            ]).astype(self.dtype, copy=False)
+
+            self._sections.append((road_id, section_idx, first_lane, len(section_data["left_lanes_area"]),
+                                   len(section_data["right_lanes_area"]), len(center), self._n_points,
+                                   self._n_reference))
+            self._fh.write(block.tobytes())
+            self._n_points += len(block)
+            self._reference.append(reference)
+            self._n_reference += len(reference)
+
+    def _write_block(self, data):
+        offset = _align(self._fh.tell())
+        self._fh.write(bytes(offset - self._fh.tell()))
+        self._fh.write(data)
+        return offset
+
+    def close(self):
+        if self._fh is None:
+            return
+        fh = self._fh
+        header = np.zeros(1, dtype=HEADER_DTYPE)[0]
+
+        reference = np.concatenate(self._reference) if self._reference else np.zeros((0, 4), dtype=self.dtype)
+        header["reference_offset"] = self._write_block(reference.tobytes())
+
+        sections = np.array(self._sections, dtype=SECTION_DTYPE)
+        order = np.argsort(sections["road_id"], kind="stable")
+        sections = sections[order]
+        road_ids, first_sections, n_sections = np.unique(sections["road_id"], return_index=True, return_counts=True)
+        roads = np.zeros(len(road_ids), dtype=ROAD_DTYPE)
+        roads["road_id"], roads["first_section"], roads["n_sections"] = road_ids, first_sections, n_sections
+
+        header["roads_offset"] = self._write_block(roads.tobytes())
+        header["sections_offset"] = self._write_block(sections.tobytes())
+        header["lanes_offset"] = self._write_block(np.array(self._lanes, dtype=LANE_DTYPE).tobytes())
+        types = "\n".join(self._type_indexes).encode("utf-8")
+        header["types_offset"] = self._write_block(types)
+
+        header["magic"] = MAGIC
+        header["version"] = FORMAT_VERSION
+        header["coordinate_size"] = self.dtype.itemsize
+        header["step"] = self.step
+        header["n_roads"] = len(roads)
+        header["n_sections"] = len(sections)
+        header["n_lanes"] = len(self._lanes)
+        header["n_points"] = self._n_points
+        header["n_reference"] = len(reference)
+        header["boundaries_offset"] = HEADER_SIZE
+        header["types_nbytes"] = len(types)
+        header["file_size"] = fh.tell()
+        fh.seek(0)
+        fh.write(header.tobytes())
+        fh.close()
+        self._fh = None
+        self._reference = []
+
+
+class LaneGeometryFile:
+    """
+    Read-only, memory-mapped access to a file of "LaneGeometryBinaryWriter".
+    """
+
+    def __init__(self, file):
+        self.file = file
+        self._map = np.memmap(file, dtype=np.uint8, mode="r")
+        if len(self._map) < HEADER_SIZE:
+            raise ValueError("{} is too small to be a lane geometry file.".format(file))
+        header = self._map[:HEADER_DTYPE.itemsize].view(HEADER_DTYPE)[0]
+        if header["magic"] != MAGIC:
+            raise ValueError("{} is not a lane geometry file.".format(file))
+        if header["version"] != FORMAT_VERSION:
+            raise ValueError("Unsupported lane geometry file version {}.".format(header["version"]))
+        if header["file_size"] != len(self._map):
+            raise ValueError("{} is truncated.".format(file))
+        self.header = header
+        self.step = float(header["step"])
+
+        coordinate_dtype = np.dtype("<f8") if header["coordinate_size"] == 8 else np.dtype("<f4")
+        self.boundaries = self._view(header["boundaries_offset"], coordinate_dtype, header["n_points"] * 2)
+        self.boundaries = self.boundaries.reshape(-1, 2)
+        self.reference = self._view(header["reference_offset"], coordinate_dtype, header["n_reference"] * 4)
+        self.reference = self.reference.reshape(-1, 4)
+        self.roads = self._view(header["roads_offset"], ROAD_DTYPE, header["n_roads"])
+        self.sections = self._view(header["sections_offset"], SECTION_DTYPE, header["n_sections"])
+        self.lanes = self._view(header["lanes_offset"], LANE_DTYPE, header["n_lanes"])
+        types = bytes(self._map[header["types_offset"]:header["types_offset"] + header["types_nbytes"]])
+        self.types = types.decode("utf-8").split("\n") if types else []
+
+    def _view(self, offset, dtype, count):
+        offset = int(offset)
+        return self._map[offset:offset + int(count) * dtype.itemsize].view(dtype)
+
+    def __len__(self):
+        return len(self.roads)
+
+    def __contains__(self, road_id):
+        return self._find_road(road_id) is not None
+
+    @property
+    def road_ids(self):
+        return self.roads["road_id"]
+
+    def _find_road(self, road_id):
+        index = int(np.searchsorted(self.roads["road_id"], road_id))
+        if index < len(self.roads) and self.roads[index]["road_id"] == road_id:
+            return index
+        return None
+
+    def get_section(self, section_index):
+        """
+        Build the section data of one record of the section table. All arrays are views into the mapped file.
+        :param section_index: Row in the section table.
+        :return: ((road id, lane section id), section data in array form)
+        """
+        section = self.sections[section_index]
+        m = int(section["n_points"])
+        n_left, n_right = int(section["n_left"]), int(section["n_right"])
+        start = int(section["boundaries_start"])
+        boundaries = self.boundaries[start:start + (n_left + n_right + 1) * m].reshape(-1, m, 2) if m else None
+        lanes = self.lanes[int(section["first_lane"]):int(section["first_lane"]) + n_left + n_right]
+
+        def boundary(row):
+            return boundaries[row] if m else self.boundaries[:0]
+
+        res = {"types": {int(lane["lane_id"]): self.types[lane["type_index"]] for lane in lanes}}
+        for side, most_key, rows in (("left_lanes_area", "most_left_points", range(1, n_left + 1)),
+                                     ("right_lanes_area", "most_right_points", range(n_left + 1, n_left + n_right + 1))):
+            lanes_area = dict()
+            inner_row = 0
+            for row in rows:
+                lanes_area[int(lanes[row - 1]["lane_id"])] = {"inner": boundary(inner_row), "outer": boundary(row)}
+                inner_row = row
+            res[side] = lanes_area
+            res[most_key] = boundary(inner_row)
+
+        reference_start = int(section["reference_start"])
+        reference = self.reference[reference_start:reference_start + m]
+        res["reference_points"] = {
+            "s_road": reference[:, 0],
+            "tangent": reference[:, 1],
+            "position": reference[:, 2:4],
+            "position_center_lane": boundary(0),
+        }
+        res.update(get_lane_line(res))
+        return (int(section["road_id"]), int(section["section_idx"])), res
+
+    def get_road(self, road_id):
+        """
+        Get the sections of one road.
+        :param road_id:
+        :return: {(road id, lane section id): section data}, empty if the road is not in the file.
+        """
+        index = self._find_road(road_id)
+        if index is None:
+            return dict()
+        road = self.roads[index]
+        first = int(road["first_section"])
+        return dict(self.get_section(i) for i in range(first, first + int(road["n_sections"])))
+
+    def get_all_lanes(self):
+        """
+        Get all sections, the same structure as "parse_and_visualize.get_all_lanes".
+        :return: {(road id, lane section id): section data}
+        """
+        return dict(self.get_section(i) for i in range(len(self.sections)))
+
+
+def export_lane_binary(road_network, file, step=STEP, dtype="float64"):
+    """
+    Calculate the lanes road by road and write them as flat binary lane geometry.
+    :param road_network: Parsed road network.
+    :param file: Output file.
+    :param step: Step of calculation.
+    :param dtype: "float64" or "float32" coordinates.
+    :return: Number of written lane sections.
+    """
+    with LaneGeometryBinaryWriter(file, step=step, dtype=dtype) as writer:
+        for road in road_network.roads:
+            writer.write_sections(get_lane_area_of_one_road(road, step=step))
+    return writer.sections_written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write the lane geometry of a .xodr file as flat binary file.")
+    parser.add_argument("file", help="Input .xodr file.")
+    parser.add_argument("--output", default=None, help="Output file, <file name>.lanes by default.")
+    parser.add_argument("--step", type=float, default=STEP, help="Sample step of the reference lines.")
+    parser.add_argument("--dtype", choices=tuple(COORDINATE_DTYPES), default="float64")
+    args = parser.parse_args(argv)
+
+    output = args.output or args.file.rsplit(".", 1)[0] + ".lanes"
+    road_network = load_xodr_and_parse(args.file)
+    sections = export_lane_binary(road_network, output, step=args.step, dtype=args.dtype)
+    print("{} lane sections written to {}".format(sections, output))
+
+
+if __name__ == "__main__":
+    main()
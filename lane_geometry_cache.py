@@ -0,0 +1,168 @@
+"""
+Process-wide LRU cache of evaluated lane geometry.
+
+Entries are keyed by (namespace, road id, step, lane section id) and hold the array-form section data produced by
+"parse_and_visualize.section_data_to_arrays", so repeated queries for the same roads at the same resolution become
+dictionary lookups. The cache is bounded by a byte budget and evicts the least recently used sections first.
+All methods are thread-safe.
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Default byte budget of the process-wide cache.
+DEFAULT_MAX_BYTES = 256 * 1024 ** 2
+
+
+def estimate_nbytes(value, _seen=None):
+    """
+    Estimate the memory held by one cache entry. Arrays shared between several lanes are counted once.
+    :param value: Nested dict / list / tuple / ndarray structure.
+    :return: Size in bytes.
+    """
+    if _seen is None:
+        _seen = set()
+    if id(value) in _seen:
+        return 0
+    _seen.add(id(value))
+
+    if isinstance(value, np.ndarray):
+        # "getsizeof" only includes the data buffer for arrays owning their memory.
+        return sys.getsizeof(value) + (0 if value.base is None else value.nbytes)
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for k, v in value.items():
+            size += estimate_nbytes(k, _seen) + estimate_nbytes(v, _seen)
+    elif isinstance(value, (list, tuple, set)):
+        for v in value:
+            size += estimate_nbytes(v, _seen)
+    return size
+
+
+class LaneGeometryCache:
+    """
+    LRU cache of lane section geometry with a byte budget and hit / miss counters.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self._entries = OrderedDict()  # key => (value, nbytes)
+        # Guards the entries and counters, "get" reorders the entries as well.
+        self._lock = threading.RLock()
+        self._max_bytes = int(max_bytes)
+        self._current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def max_bytes(self):
+        return self._max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, value):
+        with self._lock:
+            self._max_bytes = int(value)
+            self._evict()
+
+    @property
+    def current_bytes(self):
+        return self._current_bytes
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        """
+        Look up one entry and mark it as most recently used.
+        :param key: (namespace, road id, step, lane section id)
+        :param default: Returned on a miss.
+        :return:
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        """
+        Insert one entry. Entries larger than the whole budget are not stored.
+        :param key: (namespace, road id, step, lane section id)
+        :param value: Array-form section data.
+        :return: True if the entry was stored.
+        """
+        nbytes = estimate_nbytes(value)
+        with self._lock:
+            if key in self._entries:
+                self._current_bytes -= self._entries.pop(key)[1]
+            if nbytes > self._max_bytes:
+                return False
+            self._entries[key] = (value, nbytes)
+            self._current_bytes += nbytes
+            self._evict()
+            return True
+
+    def _evict(self):
+        while self._current_bytes > self._max_bytes and self._entries:
+            _, (_, nbytes) = self._entries.popitem(last=False)
+            self._current_bytes -= nbytes
+            self.evictions += 1
+
+    def invalidate(self, road_id=None, namespace=None):
+        """
+        Drop the entries of one road (all roads if road_id is None) within one namespace.
+        :param road_id: Road id, or None for every road.
+        :param namespace: Namespace given when the entries were stored.
+        :return: Number of dropped entries.
+        """
+        return self.invalidate_roads(None if road_id is None else [road_id], namespace=namespace)
+
+    def invalidate_roads(self, road_ids, namespace=None):
+        """
+        Drop the entries of several roads within one namespace in a single pass.
+        :param road_ids: Iterable of road ids, or None for every road.
+        :param namespace: Namespace given when the entries were stored.
+        :return: Number of dropped entries.
+        """
+        road_ids = None if road_ids is None else set(road_ids)
+        with self._lock:
+            keys = [key for key in self._entries
+                    if key[0] == namespace and (road_ids is None or key[1] in road_ids)]
+            for key in keys:
+                self._current_bytes -= self._entries.pop(key)[1]
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._current_bytes = 0
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._current_bytes,
+            "max_bytes": self._max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+# The process-wide cache used by "parse_and_visualize.get_lane_area_of_one_road_cached".
+LANE_GEOMETRY_CACHE = LaneGeometryCache()
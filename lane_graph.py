@@ -0,0 +1,206 @@
+"""
+Lane-level connectivity graph of a road network.
+
+Every lane (id != 0) of every lane section is a node with an integer id. Directed edges follow the driving direction
+(right lanes towards increasing s, left lanes towards decreasing s):
+    EDGE_FOLLOW       to the next lane, from lane links inside a road, road links and junction connections
+    EDGE_LANE_CHANGE  to the neighbouring lane of the same direction in the same lane section
+The edges are stored as CSR arrays (indptr / indices) for successors and for predecessors, so the neighbours of a node
+are one slice. The graph is built once per parsed network and cached alongside it by "get_lane_graph".
+
+Usage:
+    graph = get_lane_graph(road_network)
+    node = graph.get_node(road_id, section_idx, lane_id)
+    for next_node in graph.successors(node):
+        print(graph.get_key(next_node))
+"""
+
+import weakref
+
+import numpy as np
+
+EDGE_FOLLOW = 0
+EDGE_LANE_CHANGE = 1
+
+# Lane types a vehicle can drive on, used by "LaneGraph.drivable".
+DRIVABLE_TYPES = ("driving", "entry", "exit", "onRamp", "offRamp", "bidirectional", "parking", "stop")
+
+_LANE_GRAPHS = weakref.WeakKeyDictionary()
+
+
+def get_section_at_contact(road, contact_point):
+    """
+    Lane section of a road touching a contact point.
+    :param road:
+    :param contact_point: "start" or "end".
+    :return: LaneSection
+    """
+    lane_sections = road.lanes.laneSections
+    return lane_sections[0] if contact_point == "start" else lane_sections[-1]
+
+
+def get_exit_side(lane_id):
+    """ Side of the lane section where traffic of a lane leaves it. """
+    return "end" if lane_id < 0 else "start"
+
+
+class LaneGraph:
+    """
+    Directed lane graph in CSR form. Node attributes are numpy arrays indexed by node id.
+    """
+
+    def __init__(self, road_network):
+        keys = []
+        types = []
+        lengths = []
+        for road in road_network.roads:
+            for lane_section in road.lanes.laneSections:
+                for lane in lane_section.allLanes:
+                    if lane.id == 0:
+                        continue
+                    keys.append((road.id, lane_section.idx, lane.id))
+                    types.append(lane.type)
+                    lengths.append(lane_section.length)
+
+        self.keys = keys
+        self.index = {key: node for node, key in enumerate(keys)}
+        key_array = np.array(keys, dtype=np.int64).reshape(-1, 3)
+        self.road_ids = key_array[:, 0]
+        self.section_ids = key_array[:, 1]
+        self.lane_ids = key_array[:, 2]
+        self.type_names = sorted(set(types))
+        self.types = np.array([self.type_names.index(lane_type) for lane_type in types], dtype=np.int16)
+        self.lengths = np.array(lengths, dtype=np.float64)
+        self.drivable = np.isin(self.types, [i for i, name in enumerate(self.type_names) if name in DRIVABLE_TYPES])
+
+        sources, targets, kinds = self._collect_edges(road_network)
+        self.n_edges = len(sources)
+        self.indptr, self.indices, self.edge_kinds = self._to_csr(sources, targets, kinds)
+        self.reverse_indptr, self.reverse_indices, self.reverse_edge_kinds = self._to_csr(targets, sources, kinds)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _collect_edges(self, road_network):
+        contacts = set()  # ((road, section, lane), side), ((road, section, lane), side)
+
+        def add_contact(road, section, lane_id, side, other_road, other_section, other_lane_id, other_side):
+            a = ((road.id, section.idx, lane_id), side)
+            b = ((other_road.id, other_section.idx, other_lane_id), other_side)
+            if a[0] in self.index and b[0] in self.index:
+                contacts.add((a, b) if a <= b else (b, a))
+
+        roads = {road.id: road for road in road_network.roads}
+        junctions = {junction.id: junction for junction in road_network.junctions}
+        lane_changes = []
+        for road in road_network.roads:
+            lane_sections = road.lanes.laneSections
+            for position, lane_section in enumerate(lane_sections):
+                for lane in lane_section.allLanes:
+                    if lane.id == 0:
+                        continue
+                    link = lane.link
+                    if link.successorId is not None and position + 1 < len(lane_sections):
+                        add_contact(road, lane_section, lane.id, "end",
+                                    road, lane_sections[position + 1], link.successorId, "start")
+                    if link.predecessorId is not None and position > 0:
+                        add_contact(road, lane_section, lane.id, "start",
+                                    road, lane_sections[position - 1], link.predecessorId, "end")
+
+                    # Neighbouring lanes of the same direction.
+                    neighbour = lane.id + (1 if lane.id > 0 else -1)
+                    if lane_section.getLane(neighbour) is not None:
+                        lane_changes.append(((road.id, lane_section.idx, lane.id), (road.id, lane_section.idx, neighbour)))
+
+            # Links to other roads and through junctions.
+            for road_link, side in ((road.link.successor, "end"), (road.link.predecessor, "start")):
+                if road_link is None:
+                    continue
+                section = get_section_at_contact(road, side)
+                if road_link.elementType == "road" and road_link.elementId in roads:
+                    other_road = roads[road_link.elementId]
+                    other_section = get_section_at_contact(other_road, road_link.contactPoint or "start")
+                    for lane in section.allLanes:
+                        other_lane_id = lane.link.successorId if side == "end" else lane.link.predecessorId
+                        if lane.id != 0 and other_lane_id is not None:
+                            add_contact(road, section, lane.id, side, other_road, other_section, other_lane_id,
+                                        road_link.contactPoint or "start")
+                elif road_link.elementType == "junction" and road_link.elementId in junctions:
+                    for connection in junctions[road_link.elementId].connections:
+                        if connection.incomingRoad != road.id or connection.connectingRoad not in roads:
+                            continue
+                        connecting_road = roads[connection.connectingRoad]
+                        connecting_section = get_section_at_contact(connecting_road, connection.contactPoint)
+                        for lane_link in connection.laneLinks:
+                            add_contact(road, section, lane_link.fromId, side,
+                                        connecting_road, connecting_section, lane_link.toId, connection.contactPoint)
+
+        # A contact becomes an edge in the direction in which traffic leaves one lane and enters the other one.
+        sources, targets, kinds = [], [], []
+        for (a, side_a), (b, side_b) in contacts:
+            for (u, side_u), (v, side_v) in (((a, side_a), (b, side_b)), ((b, side_b), (a, side_a))):
+                if get_exit_side(u[2]) == side_u and get_exit_side(v[2]) != side_v:
+                    sources.append(self.index[u])
+                    targets.append(self.index[v])
+                    kinds.append(EDGE_FOLLOW)
+        for u, v in lane_changes:
+            for a, b in ((u, v), (v, u)):
+                sources.append(self.index[a])
+                targets.append(self.index[b])
+                kinds.append(EDGE_LANE_CHANGE)
+        return (np.array(sources, dtype=np.int64), np.array(targets, dtype=np.int64),
+                np.array(kinds, dtype=np.int8))
+
+    def _to_csr(self, sources, targets, kinds):
+        order = np.lexsort((targets, sources))
+        indptr = np.zeros(len(self.keys) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=len(self.keys)), out=indptr[1:])
+        return indptr, targets[order], kinds[order]
+
+    def get_node(self, road_id, section_idx, lane_id):
+        """ Node id of a lane, None if the lane is not in the graph. """
+        return self.index.get((road_id, section_idx, lane_id))
+
+    def get_key(self, node):
+        """ (road id, lane section id, lane id) of a node. """
+        return self.keys[node]
+
+    def get_type(self, node):
+        return self.type_names[self.types[node]]
+
+    def successors(self, node, kind=None):
+        """
+        Nodes reachable from a node by one edge, a slice of the CSR arrays.
+        :param node:
+        :param kind: EDGE_FOLLOW, EDGE_LANE_CHANGE or None for both.
+        :return: Array of node ids.
+        """
+        start, end = self.indptr[node], self.indptr[node + 1]
+        if kind is None:
+            return self.indices[start:end]
+        return self.indices[start:end][self.edge_kinds[start:end] == kind]
+
+    def predecessors(self, node, kind=None):
+        start, end = self.reverse_indptr[node], self.reverse_indptr[node + 1]
+        if kind is None:
+            return self.reverse_indices[start:end]
+        return self.reverse_indices[start:end][self.reverse_edge_kinds[start:end] == kind]
+
+    def out_degree(self):
+        return np.diff(self.indptr)
+
+    def in_degree(self):
+        return np.diff(self.reverse_indptr)
+
+
+def get_lane_graph(road_network):
+    """
+    Lane graph of a parsed network, built on the first call and cached as long as the network is alive.
+    :param road_network: Parsed road network.
+    :return: LaneGraph
+    """
+    graph = _LANE_GRAPHS.get(road_network)
+    if graph is None:
+        graph = LaneGraph(road_network)
+        _LANE_GRAPHS[road_network] = graph
+    return graph
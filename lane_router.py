@@ -0,0 +1,255 @@
+"""
+Lane-level shortest-path routing on the lane graph.
+
+The cost of following a lane is its length (the length of its lane section along the reference line). A lane change
+costs "lane_change_cost" metres. Routes are searched with
+    Dijkstra       heuristic=None
+    A*             heuristic="euclidean": straight-line distance between the points where traffic enters a lane and
+                   the goal lane, on the reference line, scaled down so that it never exceeds the edge costs
+    ALT            heuristic="landmarks": A* with landmark / triangle-inequality bounds, after "prepare_landmarks".
+                   Always admissible and much tighter than the straight line, for fast repeated queries.
+"many_to_many" runs one search per source and stops as soon as all targets are settled.
+
+Usage:
+    router = LaneRouter(road_network)
+    router.prepare_landmarks(8)
+    cost, keys = router.route_keys((8, 0, -1), (15, 0, -1), heuristic="landmarks")
+"""
+
+import heapq
+import math
+
+import numpy as np
+
+from lane_graph import EDGE_LANE_CHANGE, get_lane_graph
+
+HEURISTICS = (None, "euclidean", "landmarks")
+
+
+class LaneRouter:
+
+    def __init__(self, road_network, lane_change_cost=10.0, drivable_only=True):
+        """
+        :param road_network: Parsed road network.
+        :param lane_change_cost: Cost of one lane change in metres.
+        :param drivable_only: Only route over drivable lanes, see "lane_graph.DRIVABLE_TYPES".
+        """
+        self.graph = graph = get_lane_graph(road_network)
+        self.lane_change_cost = lane_change_cost
+
+        sources = np.repeat(np.arange(len(graph)), np.diff(graph.indptr))
+        weights = np.where(graph.edge_kinds == EDGE_LANE_CHANGE, lane_change_cost, graph.lengths[sources])
+        if drivable_only:
+            weights = np.where(graph.drivable[sources] & graph.drivable[graph.indices], weights, np.inf)
+        self.weights = weights
+        reverse_sources = np.repeat(np.arange(len(graph)), np.diff(graph.reverse_indptr))
+        # Weight of every reverse edge v <- u, i.e. of the forward edge u -> v.
+        reverse_weights = np.where(graph.reverse_edge_kinds == EDGE_LANE_CHANGE, lane_change_cost,
+                                   graph.lengths[graph.reverse_indices])
+        if drivable_only:
+            reverse_weights = np.where(graph.drivable[reverse_sources] & graph.drivable[graph.reverse_indices],
+                                       reverse_weights, np.inf)
+        self.reverse_weights = reverse_weights
+
+        # Plain lists are much faster than numpy scalars inside the search loops.
+        self._adjacency = (graph.indptr.tolist(), graph.indices.tolist(), weights.tolist())
+        self._reverse_adjacency = (graph.reverse_indptr.tolist(), graph.reverse_indices.tolist(),
+                                   reverse_weights.tolist())
+
+        self.exit_points, self.entry_points = self._get_lane_end_points(road_network)
+        self._entry_xs = self.entry_points[:, 0].tolist()
+        self._entry_ys = self.entry_points[:, 1].tolist()
+
+        # Largest factor keeping the straight-line heuristic consistent: following a lane must cost at least the scaled
+        # distance between the entry points of the two lanes (reference lines of linked roads need not touch).
+        follow = (graph.edge_kinds != EDGE_LANE_CHANGE) & np.isfinite(weights)
+        differences = self.entry_points[sources[follow]] - self.entry_points[graph.indices[follow]]
+        chords = np.hypot(differences[:, 0], differences[:, 1])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratios = np.where(chords > 0, weights[follow] / chords, np.inf)
+        self.euclidean_scale = float(min(1.0, ratios.min(initial=np.inf)))
+        self.landmarks = None
+        self._landmark_from = None  # (k, n) distances landmark -> node
+        self._landmark_to = None  # (k, n) distances node -> landmark
+        # Per node lists of the same distances for the lazy bounds of the search.
+        self._landmark_from_nodes = None
+        self._landmark_to_nodes = None
+
+    def _get_lane_end_points(self, road_network):
+        graph = self.graph
+        roads = {road.id: road for road in road_network.roads}
+        exit_points = np.zeros((len(graph), 2))
+        entry_points = np.zeros((len(graph), 2))
+        section_points = dict()
+        for node, (road_id, section_idx, lane_id) in enumerate(graph.keys):
+            if (road_id, section_idx) not in section_points:
+                road = roads[road_id]
+                lane_section = road.lanes.getLaneSection(section_idx)
+                length = road.planView.getLength()
+                start = min(lane_section.sPos, length)
+                end = min(lane_section.sPos + lane_section.length, length)
+                section_points[(road_id, section_idx)] = (road.planView.calc(start)[0], road.planView.calc(end)[0])
+            start_point, end_point = section_points[(road_id, section_idx)]
+            exit_points[node], entry_points[node] = (end_point, start_point) if lane_id < 0 else (start_point, end_point)
+        return exit_points, entry_points
+
+    def _search(self, start, goals, heuristic=None, reverse=False):
+        """
+        Dijkstra / A* from start until all goals are settled.
+        :return: (distances {node: cost}, parents {node: parent node})
+        """
+        indptr, indices, weights = self._reverse_adjacency if reverse else self._adjacency
+        goals = set(goals)
+        distances = {start: 0.0}
+        parents = {start: None}
+        settled = set()
+        heap = [(heuristic(start) if heuristic else 0.0, 0.0, start)]
+        while heap and goals:
+            _, distance, node = heapq.heappop(heap)
+            if node in settled:
+                continue
+            settled.add(node)
+            goals.discard(node)
+            for edge in range(indptr[node], indptr[node + 1]):
+                next_distance = distance + weights[edge]
+                next_node = indices[edge]
+                if next_distance < distances.get(next_node, math.inf):
+                    distances[next_node] = next_distance
+                    parents[next_node] = node
+                    priority = next_distance + heuristic(next_node) if heuristic else next_distance
+                    heapq.heappush(heap, (priority, next_distance, next_node))
+        return distances, parents
+
+    def _get_heuristic(self, goal, heuristic):
+        """ Lower bound of the cost from a node to goal, evaluated lazily per node reached by the search. """
+        if heuristic is None:
+            return None
+        if heuristic == "euclidean":
+            xs, ys = self._entry_xs, self._entry_ys
+            goal_x, goal_y = xs[goal], ys[goal]
+            scale = self.euclidean_scale
+
+            def bound(node):
+                return scale * math.hypot(xs[node] - goal_x, ys[node] - goal_y)
+        elif heuristic == "landmarks":
+            if self.landmarks is None:
+                raise ValueError("Call prepare_landmarks before routing with landmarks.")
+            landmark_from, landmark_to = self._landmark_from_nodes, self._landmark_to_nodes
+            from_goal, to_goal = landmark_from[goal], landmark_to[goal]
+            bounds = {goal: 0.0}
+
+            def bound(node):
+                value = bounds.get(node)
+                if value is None:
+                    # Triangle inequality bounds; inf - inf (nan) never compares greater and is skipped.
+                    value = 0.0
+                    for landmark_goal, landmark_node, node_landmark, goal_landmark in zip(
+                            from_goal, landmark_from[node], landmark_to[node], to_goal):
+                        candidate = landmark_goal - landmark_node
+                        if candidate > value and candidate != math.inf:
+                            value = candidate
+                        candidate = node_landmark - goal_landmark
+                        if candidate > value and candidate != math.inf:
+                            value = candidate
+                    bounds[node] = value
+                return value
+        else:
+            raise ValueError("Heuristic must be one of {}".format(HEURISTICS))
+        return bound
+
+    def route(self, start, goal, heuristic="euclidean"):
+        """
+        Shortest route between two lanes.
+        :param start: Start node id.
+        :param goal: Goal node id.
+        :param heuristic: None (Dijkstra), "euclidean" (A*) or "landmarks" (ALT).
+        :return: (cost, list of node ids from start to goal), (inf, []) if the goal is unreachable.
+        """
+        distances, parents = self._search(start, [goal], self._get_heuristic(goal, heuristic))
+        if goal not in distances or math.isinf(distances[goal]):
+            return math.inf, []
+        path = [goal]
+        while parents[path[-1]] is not None:
+            path.append(parents[path[-1]])
+        return distances[goal], path[::-1]
+
+    def route_keys(self, start, goal, heuristic="euclidean"):
+        """
+        Same as "route" with (road id, lane section id, lane id) keys.
+        :return: (cost, list of keys)
+        """
+        graph = self.graph
+        start_node, goal_node = graph.get_node(*start), graph.get_node(*goal)
+        if start_node is None or goal_node is None:
+            raise KeyError("Lane {} is not in the lane graph".format(start if start_node is None else goal))
+        cost, path = self.route(start_node, goal_node, heuristic)
+        return cost, [graph.get_key(node) for node in path]
+
+    def many_to_many(self, sources, targets):
+        """
+        Route costs between every source and every target.
+        :param sources: Node ids.
+        :param targets: Node ids.
+        :return: Array of shape (len(sources), len(targets)), inf where unreachable.
+        """
+        res = np.full((len(sources), len(targets)), np.inf)
+        for i, source in enumerate(sources):
+            distances, _ = self._search(source, targets)
+            res[i] = [distances.get(target, np.inf) for target in targets]
+        return res
+
+    def _distances_from(self, node, reverse=False):
+        distances, _ = self._search(node, range(len(self.graph)), reverse=reverse)
+        res = np.full(len(self.graph), np.inf)
+        res[list(distances)] = list(distances.values())
+        return res
+
+    def prepare_landmarks(self, count=8):
+        """
+        Select landmarks by farthest-point selection and precompute the distances from and to each of them.
+        Landmarks are drivable nodes (all nodes unless drivable_only) of the part of the graph reached from and to
+        a seed lane, so isolated lanes such as sidewalks never become landmarks.
+        :param count: Number of landmarks.
+        :return: Landmark node ids.
+        """
+        graph = self.graph
+        n = len(graph)
+        # Candidates are nodes with a finite edge in both directions, i.e. nodes which reach more than themselves.
+        has_out = np.zeros(n, dtype=bool)
+        has_out[np.repeat(np.arange(n), np.diff(graph.indptr))[np.isfinite(self.weights)]] = True
+        has_in = np.zeros(n, dtype=bool)
+        has_in[np.repeat(np.arange(n), np.diff(graph.reverse_indptr))[np.isfinite(self.reverse_weights)]] = True
+        candidates = has_out & has_in
+        if not np.any(candidates):
+            self.landmarks = None
+            return []
+
+        # Seed with the candidate farthest from the center, the first landmark is the node farthest from the seed
+        # within its component.
+        distances = np.where(candidates, np.hypot(*(self.exit_points - self.exit_points.mean(axis=0)).T), -1.0)
+        seed = int(np.argmax(distances))
+        reach = np.fmin(self._distances_from(seed), self._distances_from(seed, reverse=True))
+        component = candidates & np.isfinite(reach)
+        candidate = int(np.argmax(np.where(component, reach, -1.0)))
+
+        landmarks = []
+        landmark_from = []
+        landmark_to = []
+        closest = np.full(n, np.inf)
+        for _ in range(min(count, int(component.sum()))):
+            landmarks.append(candidate)
+            landmark_from.append(self._distances_from(candidate))
+            landmark_to.append(self._distances_from(candidate, reverse=True))
+            closest = np.fmin(closest, np.fmin(landmark_from[-1], landmark_to[-1]))
+            # The next landmark is the node of the component farthest from all landmarks so far.
+            scores = np.where(component & np.isfinite(closest), closest, -1.0)
+            scores[landmarks] = -1.0
+            candidate = int(np.argmax(scores))
+            if scores[candidate] <= 0:
+                break
+        self.landmarks = landmarks
+        self._landmark_from = np.array(landmark_from)
+        self._landmark_to = np.array(landmark_to)
+        self._landmark_from_nodes = self._landmark_from.T.tolist()
+        self._landmark_to_nodes = self._landmark_to.T.tolist()
+        return landmarks
@@ -0,0 +1,554 @@
+"""
+Local map service keeping parsed road networks and their lane geometry in memory.
+
+Networks are parsed once at startup and their lane geometry is computed into the lane geometry cache, so queries from
+many short-lived tools are answered from memory instead of re-running the pipeline per process. The service speaks
+plain HTTP/1.1 with json responses over TCP or a Unix socket (asyncio, no dependencies). Point queries of concurrent
+clients are collected for up to "max_delay" seconds and answered with one vectorized NumPy call per network and kind.
+
+Endpoints (GET):
+    /networks                                                   names, files and sizes of the loaded networks
+    /road?network=&road=                                        reference line and lane boundaries of one road
+    /lane_boundary?network=&road=&lane=&s=[&side=outer]         point of a lane boundary at s of the road (batched)
+    /locate?network=&x=&y=                                      (x, y) => road, s, t on its reference line (batched)
+    /bbox?network=&min_x=&min_y=&max_x=&max_y=                  ids of the roads intersecting a box (batched)
+    /stats                                                      request, batch and cache counters
+The network parameter can be left out if only one network is loaded.
+
+Usage:
+    python map_service.py Export20241128.xodr grid=grid.xodr --port 8765
+    curl "http://127.0.0.1:8765/locate?network=Export20241128&x=10&y=20"
+    python map_service.py Export20241128.xodr --unix /tmp/map.sock
+    curl --unix-socket /tmp/map.sock "http://localhost/bbox?min_x=0&min_y=0&max_x=100&max_y=100"
+"""
+
+import argparse
+import asyncio
+import json
+import os
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from lane_geometry_cache import LaneGeometryCache
+from parse_and_visualize import STEP, get_lane_area_of_one_road_cached, load_xodr_and_parse
+
+# Default batching of concurrent point queries.
+MAX_BATCH = 1024
+MAX_DELAY = 0.002  # s
+# Smallest cell of the reference line grid in metres, cells are at least twice the sample step.
+CELL_SIZE = 16.0
+DEFAULT_CACHE_MB = 1024
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+class ServiceError(Exception):
+    """ Error answered with an HTTP status. """
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ReferenceLineIndex:
+    """
+    Uniform grid of the segments of all sampled reference lines. A point is projected on the segments of its 3x3
+    cell neighbourhood, which always contains the nearest segment if it is closer than one cell; points farther away
+    from every road fall back to all segments.
+    """
+
+    def __init__(self, road_network, step=STEP):
+        starts, ends, s_starts, roads = [], [], [], []
+        self.road_ids = []
+        self.road_ranges = dict()  # road id => (first, end) segment of the road
+        n_segments = 0
+        for road in road_network.roads:
+            length = road.planView.getLength()
+            if length <= 0:
+                continue
+            s = np.append(np.arange(0.0, length, step), length)
+            positions, _ = road.planView.calcPositions(s)
+            starts.append(positions[:-1])
+            ends.append(positions[1:])
+            s_starts.append(s[:-1])
+            roads.append(np.full(len(s) - 1, len(self.road_ids), dtype=np.int64))
+            self.road_ids.append(road.id)
+            self.road_ranges[road.id] = (n_segments, n_segments + len(s) - 1)
+            n_segments += len(s) - 1
+
+        self.starts = np.concatenate(starts) if starts else np.zeros((0, 2))
+        self.directions = (np.concatenate(ends) if ends else np.zeros((0, 2))) - self.starts
+        self.lengths = np.hypot(*self.directions.T)
+        self.s_starts = np.concatenate(s_starts) if s_starts else np.zeros(0)
+        self.roads = np.concatenate(roads) if roads else np.zeros(0, dtype=np.int64)
+        self.road_ids = np.array(self.road_ids, dtype=np.int64)
+
+        self.cell_size = max(CELL_SIZE, 2 * step)
+        ends = self.starts + self.directions
+        self.origin = np.minimum(self.starts, ends).min(axis=0) if len(self.starts) else np.zeros(2)
+        low = self._get_cells(np.minimum(self.starts, ends))
+        high = self._get_cells(np.maximum(self.starts, ends))
+        self.n_rows = int(high[:, 1].max()) + 2 if len(high) else 1
+
+        # Segments are shorter than a cell, so they cover at most 2 x 2 cells.
+        keys, segments = [], []
+        for dx in (0, 1):
+            for dy in (0, 1):
+                mask = (low[:, 0] + dx <= high[:, 0]) & (low[:, 1] + dy <= high[:, 1])
+                keys.append(self._get_keys(low[mask] + (dx, dy)))
+                segments.append(np.flatnonzero(mask))
+        keys = np.concatenate(keys)
+        order = np.argsort(keys, kind="stable")
+        self.cell_keys = keys[order]
+        self.cell_segments = np.concatenate(segments)[order]
+
+    def __len__(self):
+        return len(self.starts)
+
+    def _get_cells(self, points):
+        return np.floor((points - self.origin) / self.cell_size).astype(np.int64)
+
+    def _get_keys(self, cells):
+        return cells[:, 0] * self.n_rows + cells[:, 1]
+
+    def _project(self, points, queries, segments):
+        """ Distance, s and t of points[queries] projected on segments. """
+        starts = self.starts[segments]
+        directions = self.directions[segments]
+        lengths = self.lengths[segments]
+        delta = points[queries] - starts
+        squared = np.maximum(lengths ** 2, 1e-18)
+        u = np.clip(np.einsum("ij,ij->i", delta, directions) / squared, 0.0, 1.0)
+        distances = np.hypot(*(delta - u[:, None] * directions).T)
+        t = (directions[:, 0] * delta[:, 1] - directions[:, 1] * delta[:, 0]) / np.maximum(lengths, 1e-9)
+        return distances, self.s_starts[segments] + u * lengths, t
+
+    def locate(self, points):
+        """
+        Nearest reference line position of many points.
+        :param points: Array (n, 2).
+        :return: (road ids, s, t, distances), arrays of length n. t is positive left of the reference line.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        n = len(points)
+        best_distance = np.full(n, np.inf)
+        best_segment = np.zeros(n, dtype=np.int64)
+        best_s = np.zeros(n)
+        best_t = np.zeros(n)
+        if not len(self.starts):
+            return np.full(n, -1, dtype=np.int64), best_s, best_t, best_distance
+
+        def update(queries, segments):
+            distances, s, t = self._project(points, queries, segments)
+            # Nearest candidate per query.
+            order = np.lexsort((distances, queries))
+            queries, first = np.unique(queries[order], return_index=True)
+            rows = order[first]
+            better = distances[rows] < best_distance[queries]
+            queries, rows = queries[better], rows[better]
+            best_distance[queries] = distances[rows]
+            best_segment[queries] = segments[rows]
+            best_s[queries] = s[rows]
+            best_t[queries] = t[rows]
+
+        cells = self._get_cells(points)
+        queries, segments = [], []
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                keys = self._get_keys(cells + (dx, dy))
+                lo = np.searchsorted(self.cell_keys, keys, side="left")
+                counts = np.searchsorted(self.cell_keys, keys, side="right") - lo
+                total = counts.sum()
+                if not total:
+                    continue
+                queries.append(np.repeat(np.arange(n), counts))
+                offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+                segments.append(self.cell_segments[np.repeat(lo, counts) + offsets])
+        if queries:
+            update(np.concatenate(queries), np.concatenate(segments))
+
+        for query in np.flatnonzero(best_distance > self.cell_size):
+            update(np.full(len(self.starts), query), np.arange(len(self.starts)))
+
+        return self.road_ids[self.roads[best_segment]], best_s, best_t, best_distance
+
+
+class MapNetwork:
+    """
+    One parsed network with its warm lane geometry, reference line index and road bounds.
+    """
+
+    def __init__(self, name, file, step=STEP, cache=None):
+        self.name = name
+        self.file = file
+        self.step = step
+        self.namespace = os.path.abspath(file)
+        # Thread-safe, shared by the executor threads of all batches and possibly by several networks.
+        self.cache = cache if cache is not None else LaneGeometryCache()
+
+        self.road_network = load_xodr_and_parse(file)
+        self.roads = {road.id: road for road in self.road_network.roads}
+        self.index = ReferenceLineIndex(self.road_network, step=step)
+
+        bounds = []
+        for road in self.road_network.roads:
+            first, end = self.index.road_ranges.get(road.id, (0, 0))
+            points = [self.index.starts[first:end], self.index.starts[first:end] + self.index.directions[first:end]]
+            for section_data in self.get_sections(road.id).values():
+                for key in ("most_left_points", "most_right_points"):
+                    points.append(np.asarray(section_data[key]).reshape(-1, 2))
+            points = np.concatenate(points)
+            bounds.append((*points.min(axis=0), *points.max(axis=0)) if len(points) else (np.nan,) * 4)
+        self.bounds = np.array(bounds, dtype=np.float64).reshape(-1, 4)
+        self.bound_road_ids = np.array([road.id for road in self.road_network.roads], dtype=np.int64)
+
+    def get_road(self, road_id):
+        road = self.roads.get(road_id)
+        if road is None:
+            raise ServiceError(404, "Road {} not found in network {}".format(road_id, self.name))
+        return road
+
+    def get_sections(self, road_id):
+        """ Array-form section data of one road from the lane geometry cache: {(road id, section id): data}. """
+        road = self.get_road(road_id)
+        return get_lane_area_of_one_road_cached(road, step=self.step, cache=self.cache, namespace=self.namespace)
+
+    def get_road_geometry(self, road_id):
+        road = self.get_road(road_id)
+        sections = []
+        for (_, section_id), section_data in sorted(self.get_sections(road_id).items()):
+            reference_points = section_data["reference_points"]
+            lanes = dict()
+            for side in ("left_lanes_area", "right_lanes_area"):
+                for lane_id, lane_area in section_data[side].items():
+                    lanes[str(lane_id)] = {
+                        "type": section_data["types"].get(lane_id),
+                        "inner": np.asarray(lane_area["inner"]).tolist(),
+                        "outer": np.asarray(lane_area["outer"]).tolist(),
+                    }
+            sections.append({
+                "section": section_id,
+                "s": np.asarray(reference_points.get("s_road", [])).tolist(),
+                "reference_line": np.asarray(reference_points.get("position", [])).reshape(-1, 2).tolist(),
+                "lanes": lanes,
+            })
+        return {"network": self.name, "road": road.id, "length": road.planView.getLength(),
+                "junction": road.junction, "sections": sections}
+
+    def get_lane_boundaries(self, queries):
+        """
+        Points of lane boundaries, interpolated at s along the reference line. Queries of the same boundary are
+        interpolated together.
+        :param queries: List of (road id, lane id, s, side), side "inner" or "outer".
+        :return: List of result dictionaries or exceptions, an error only fails the queries it belongs to.
+        """
+        results = [None] * len(queries)
+        groups = dict()
+        for i, (road_id, lane_id, s, side) in enumerate(queries):
+            try:
+                road = self.get_road(road_id)
+                sections = sorted(road.lanes.laneSections, key=lambda x: x.sPos)
+                if not sections:
+                    raise ServiceError(404, "Road {} has no lane sections".format(road_id))
+                section = next((x for x in reversed(sections) if x.sPos <= s), sections[0])
+                groups.setdefault((road_id, section.idx, lane_id, side), []).append(i)
+            except Exception as e:
+                results[i] = e
+
+        for (road_id, section_id, lane_id, side), rows in groups.items():
+            s = np.array([queries[i][2] for i in rows])
+            try:
+                x, y = self._interpolate_boundary(road_id, section_id, lane_id, side, s)
+            except Exception as e:
+                for i in rows:
+                    results[i] = e
+                continue
+            for i, s_, x_, y_ in zip(rows, s, x, y):
+                results[i] = {"road": road_id, "section": section_id, "lane": lane_id, "side": side,
+                              "s": float(s_), "x": float(x_), "y": float(y_)}
+        return results
+
+    def _interpolate_boundary(self, road_id, section_id, lane_id, side, s):
+        """ :return: (x, y) arrays of one lane boundary at the road positions s. """
+        section_data = self.get_sections(road_id).get((road_id, section_id))
+        lanes_area = section_data["left_lanes_area" if lane_id > 0 else "right_lanes_area"] if section_data else {}
+        if lane_id not in lanes_area or "s_road" not in section_data["reference_points"]:
+            raise ServiceError(404, "Lane {} not found in section {} of road {}".format(lane_id, section_id, road_id))
+        s_road = section_data["reference_points"]["s_road"]
+        boundary = np.asarray(lanes_area[lane_id][side]).reshape(-1, 2)
+        return np.interp(s, s_road, boundary[:, 0]), np.interp(s, s_road, boundary[:, 1])
+
+    def locate(self, points):
+        """ :return: List of {"road", "s", "t", "distance"} of (x, y) points. """
+        road_ids, s, t, distances = self.index.locate(points)
+        return [{"road": int(road_id), "s": float(s_), "t": float(t_), "distance": float(distance)}
+                if np.isfinite(distance) else ServiceError(404, "No roads in network {}".format(self.name))
+                for road_id, s_, t_, distance in zip(road_ids, s, t, distances)]
+
+    def find_in_bboxes(self, bboxes):
+        """ :return: List of {"roads": [ids]} of (min x, min y, max x, max y) boxes. """
+        bboxes = np.asarray(bboxes, dtype=np.float64).reshape(-1, 4)
+        bounds = self.bounds
+        mask = ((bounds[None, :, 0] <= bboxes[:, None, 2]) & (bounds[None, :, 2] >= bboxes[:, None, 0]) &
+                (bounds[None, :, 1] <= bboxes[:, None, 3]) & (bounds[None, :, 3] >= bboxes[:, None, 1]))
+        return [{"roads": self.bound_road_ids[row].tolist()} for row in mask]
+
+    def describe(self):
+        return {"name": self.name, "file": self.file, "step": self.step, "roads": len(self.roads),
+                "junctions": len(self.road_network.junctions), "segments": len(self.index)}
+
+
+class RequestBatcher:
+    """
+    Collects the queries of concurrent requests for up to "max_delay" seconds (or "max_batch" queries) and answers
+    them with one call of "function" in a worker thread. The function maps a list of queries to a list of results;
+    results which are exceptions are raised in the requests.
+    """
+
+    def __init__(self, function, max_batch=MAX_BATCH, max_delay=MAX_DELAY):
+        self.function = function
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.batches = 0
+        self.queries = 0
+        self._queue = None
+        self._task = None
+
+    async def submit(self, query):
+        loop = asyncio.get_running_loop()
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._run())
+        future = loop.create_future()
+        await self._queue.put((query, future))
+        res = await future
+        if isinstance(res, Exception):
+            raise res
+        return res
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            items = [await self._queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(items) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    items.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                results = await loop.run_in_executor(None, self.function, [query for query, _ in items])
+            except Exception as e:
+                results = [e] * len(items)
+            for (_, future), res in zip(items, results):
+                if not future.done():
+                    future.set_result(res)
+            self.batches += 1
+            self.queries += len(items)
+
+    def stats(self):
+        return {"batches": self.batches, "queries": self.queries,
+                "mean_batch_size": self.queries / self.batches if self.batches else 0.0}
+
+
+def get_float(params, name):
+    if name not in params:
+        raise ServiceError(400, "Missing parameter " + name)
+    try:
+        return float(params[name])
+    except ValueError:
+        raise ServiceError(400, "Parameter {} is not a number: {}".format(name, params[name]))
+
+
+def get_int(params, name):
+    if name not in params:
+        raise ServiceError(400, "Missing parameter " + name)
+    try:
+        return int(params[name])
+    except ValueError:
+        raise ServiceError(400, "Parameter {} is not an integer: {}".format(name, params[name]))
+
+
+class MapService:
+    """
+    HTTP front end of several MapNetworks with one request batcher per network and query kind.
+    """
+
+    def __init__(self, networks, max_batch=MAX_BATCH, max_delay=MAX_DELAY):
+        self.networks = {network.name: network for network in networks}
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.requests = 0
+        self._batchers = dict()
+
+    def get_network(self, params):
+        name = params.get("network")
+        if name is None and len(self.networks) == 1:
+            return next(iter(self.networks.values()))
+        if name is None:
+            raise ServiceError(400, "Missing parameter network, loaded: " + ", ".join(self.networks))
+        if name not in self.networks:
+            raise ServiceError(404, "Network {} not loaded".format(name))
+        return self.networks[name]
+
+    def get_batcher(self, network, kind):
+        key = (network.name, kind)
+        if key not in self._batchers:
+            function = {"locate": network.locate, "bbox": network.find_in_bboxes,
+                        "lane_boundary": network.get_lane_boundaries}[kind]
+            self._batchers[key] = RequestBatcher(function, self.max_batch, self.max_delay)
+        return self._batchers[key]
+
+    async def handle(self, path, params):
+        """
+        Answer one request.
+        :return: (HTTP status, json payload)
+        """
+        self.requests += 1
+        try:
+            if path == "/networks":
+                return 200, [network.describe() for network in self.networks.values()]
+            if path == "/stats":
+                return 200, self.stats()
+
+            network = self.get_network(params)
+            if path == "/road":
+                road_id = get_int(params, "road")
+                loop = asyncio.get_running_loop()
+                return 200, await loop.run_in_executor(None, network.get_road_geometry, road_id)
+            if path == "/locate":
+                query = (get_float(params, "x"), get_float(params, "y"))
+                return 200, await self.get_batcher(network, "locate").submit(query)
+            if path == "/bbox":
+                query = tuple(get_float(params, name) for name in ("min_x", "min_y", "max_x", "max_y"))
+                return 200, await self.get_batcher(network, "bbox").submit(query)
+            if path == "/lane_boundary":
+                side = params.get("side", "outer")
+                if side not in ("inner", "outer"):
+                    raise ServiceError(400, "Parameter side must be inner or outer: " + side)
+                query = (get_int(params, "road"), get_int(params, "lane"), get_float(params, "s"), side)
+                return 200, await self.get_batcher(network, "lane_boundary").submit(query)
+            raise ServiceError(404, "Unknown path " + path)
+        except ServiceError as e:
+            return e.status, {"error": str(e)}
+        except Exception as e:
+            return 500, {"error": "{}: {}".format(type(e).__name__, e)}
+
+    def stats(self):
+        caches = {id(network.cache): network.cache for network in self.networks.values()}
+        return {
+            "requests": self.requests,
+            "batchers": {"{}/{}".format(*key): batcher.stats() for key, batcher in self._batchers.items()},
+            "caches": [{"entries": len(cache), "bytes": cache.current_bytes, "hits": cache.hits,
+                        "misses": cache.misses, "evictions": cache.evictions} for cache in caches.values()],
+        }
+
+    async def serve_connection(self, reader, writer):
+        """ HTTP/1.1 connection with keep-alive, requests on one connection are answered in order. """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = dict()
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                if int(headers.get("content-length", 0) or 0):
+                    await reader.readexactly(int(headers["content-length"]))
+
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._respond(writer, 400, {"error": "Malformed request line"}, keep_alive=False)
+                    break
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection == "keep-alive" or (version == "HTTP/1.1" and connection != "close")
+
+                if method != "GET":
+                    status, payload = 405, {"error": "Only GET is supported"}
+                else:
+                    url = urlsplit(target)
+                    params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+                    status, payload = await self.handle(url.path, params)
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode("utf-8")
+        head = "HTTP/1.1 {} {}\r\nContent-Type: application/json\r\nContent-Length: {}\r\nConnection: {}\r\n\r\n"
+        head = head.format(status, STATUS_TEXT.get(status, ""), len(body), "keep-alive" if keep_alive else "close")
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    async def start(self, host="127.0.0.1", port=8765, unix=None):
+        """ Start listening on a TCP port or a Unix socket, return the asyncio server. """
+        if unix is not None:
+            return await asyncio.start_unix_server(self.serve_connection, path=unix)
+        return await asyncio.start_server(self.serve_connection, host=host, port=port)
+
+
+def load_networks(files, step=STEP, cache_mb=DEFAULT_CACHE_MB):
+    """
+    Parse networks and warm one shared lane geometry cache.
+    :param files: Paths, or "name=path" to choose the network name (file name without extension by default).
+    :param step: Sample step of the reference lines.
+    :param cache_mb: Byte budget of the lane geometry cache in MiB.
+    :return: List of MapNetwork.
+    """
+    cache = LaneGeometryCache(max_bytes=cache_mb * 1024 ** 2)
+    networks = []
+    for file in files:
+        name, separator, path = file.partition("=")
+        if not separator or os.path.exists(file):
+            path = file
+            name = os.path.splitext(os.path.basename(file))[0]
+        networks.append(MapNetwork(name, path, step=step, cache=cache))
+    return networks
+
+
+async def serve(networks, host="127.0.0.1", port=8765, unix=None, max_batch=MAX_BATCH, max_delay=MAX_DELAY):
+    service = MapService(networks, max_batch=max_batch, max_delay=max_delay)
+    server = await service.start(host=host, port=port, unix=unix)
+    print("Serving {} on {}".format(", ".join(service.networks), unix or "http://{}:{}".format(host, port)))
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve road geometry queries of xodr files from memory.")
+    parser.add_argument("files", nargs="+", help="xodr files, optionally as name=path")
+    parser.add_argument("--host", default="127.0.0.1", help="Host to listen on.")
+    parser.add_argument("--port", type=int, default=8765, help="TCP port.")
+    parser.add_argument("--unix", default=None, help="Listen on this Unix socket instead of TCP.")
+    parser.add_argument("--step", type=float, default=STEP, help="Sample step of the reference lines.")
+    parser.add_argument("--cache-mb", type=float, default=DEFAULT_CACHE_MB, help="Lane geometry cache budget in MiB.")
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH, help="Most queries answered in one batch.")
+    parser.add_argument("--max-delay-ms", type=float, default=MAX_DELAY * 1e3,
+                        help="Longest wait for more queries of a batch in milliseconds.")
+    args = parser.parse_args(argv)
+
+    networks = load_networks(args.files, step=args.step, cache_mb=args.cache_mb)
+    try:
+        asyncio.run(serve(networks, host=args.host, port=args.port, unix=args.unix, max_batch=args.max_batch,
+                          max_delay=args.max_delay_ms / 1e3))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
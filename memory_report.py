@@ -0,0 +1,295 @@
+"""
+Memory accounting of parsed road networks and their lane geometry.
+
+Walks the object graph of an "OpenDrive" and of the "total_areas" of "get_all_lanes" and sums "sys.getsizeof" by
+category. Every object is counted once, in the category it is first reached from:
+    elements            parsed elements (roads, lane sections, lanes, widths, links, ...) with their attributes
+    geometries          plan view geometries with their start positions and coefficients
+    source_buffers      xodr source bytes kept for <userData> and vendor elements
+    reference_points    sampled reference line points of the sections (positions, s, headings, offsets)
+    boundaries          boundary points of the lanes, most outer points and lane lines (lists of tuples)
+    cached_arrays       numpy arrays of array-form sections (see "section_data_to_arrays" and the lane geometry cache)
+    sections            section dictionaries, keys and lane types
+    cache               entries of a lane geometry cache without their arrays
+Peak RSS is tracked per pipeline stage. On Linux the high-water mark is reset before every stage (/proc/self/clear_refs),
+elsewhere the peak is the process-wide one at the end of the stage. Python heap peaks per stage are added with
+"tracemalloc".
+
+Usage:
+    report = get_memory_report(road_network, total_areas)
+    print(format_categories(report))
+    python memory_report.py Export20241128.xodr --step 2 --arrays --json memory.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import types
+from contextlib import contextmanager
+
+import numpy as np
+
+from lane_geometry_cache import LaneGeometryCache
+from opendriveparser.elements.roadPlanView import Geometry
+from parse_and_visualize import STEP, get_all_lanes, load_xodr_and_parse
+
+CATEGORIES = ("elements", "geometries", "source_buffers", "reference_points", "boundaries", "cached_arrays",
+              "sections", "cache")
+
+# Category of the values of a section data dictionary, other keys count as "sections".
+SECTION_KEY_CATEGORIES = {
+    "left_lanes_area": "boundaries",
+    "right_lanes_area": "boundaries",
+    "most_left_points": "boundaries",
+    "most_right_points": "boundaries",
+    "lane_line_left": "boundaries",
+    "lane_line_right": "boundaries",
+    "reference_points": "reference_points",
+}
+
+# Shared objects which do not belong to the network.
+_SKIPPED_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+
+
+def get_array_nbytes(array):
+    """ Size of an array; "getsizeof" only includes the data buffer for arrays owning their memory. """
+    return sys.getsizeof(array) + (0 if array.base is None else array.nbytes)
+
+
+class MemoryCounter:
+    """
+    Sums object sizes by category. Objects already counted, also in earlier walks of the same counter, count zero.
+    """
+
+    def __init__(self):
+        self.categories = {category: {"bytes": 0, "objects": 0} for category in CATEGORIES}
+        self._seen = set()
+
+    def add(self, value, category, array_category=None):
+        """
+        Count a value and everything reachable from it.
+        :param value: Root object.
+        :param category: Category of the objects, plan view geometries below elements switch to "geometries".
+        :param array_category: Category of numpy arrays, category by default.
+        """
+        seen = self._seen
+        stack = [(value, category)]
+        while stack:
+            value, category = stack.pop()
+            if id(value) in seen or isinstance(value, _SKIPPED_TYPES):
+                continue
+            seen.add(id(value))
+
+            if isinstance(value, np.ndarray):
+                self._count(array_category or category, get_array_nbytes(value))
+                continue
+            if isinstance(value, (bytes, bytearray, memoryview)) and category in ("elements", "geometries"):
+                category = "source_buffers"
+            elif isinstance(value, Geometry):
+                category = "geometries"
+            self._count(category, sys.getsizeof(value))
+
+            if isinstance(value, dict):
+                for k, v in value.items():
+                    stack.append((k, category))
+                    stack.append((v, category))
+            elif isinstance(value, (list, tuple, set, frozenset)):
+                stack.extend((v, category) for v in value)
+            elif not isinstance(value, (str, bytes, bytearray, memoryview, int, float, complex, bool)):
+                attributes = getattr(value, "__dict__", None)
+                if attributes is not None:
+                    stack.append((attributes, category))
+                for cls in type(value).__mro__:
+                    for slot in cls.__dict__.get("__slots__", ()):
+                        if hasattr(value, slot):
+                            stack.append((getattr(value, slot), category))
+
+    def add_network(self, road_network):
+        self.add(road_network, "elements")
+
+    def add_total_areas(self, total_areas):
+        """ Count the sections of "get_all_lanes", in list or array form. """
+        # The values by key first, the rest of the section dictionaries is counted as "sections" afterwards.
+        for section_data in total_areas.values():
+            for key, category in SECTION_KEY_CATEGORIES.items():
+                if key in section_data:
+                    self.add(section_data[key], category, array_category="cached_arrays")
+        self.add(total_areas, "sections", array_category="cached_arrays")
+
+    def add_cache(self, cache):
+        self.add(cache, "cache", array_category="cached_arrays")
+
+    def _count(self, category, nbytes):
+        entry = self.categories[category]
+        entry["bytes"] += nbytes
+        entry["objects"] += 1
+
+    @property
+    def total(self):
+        return sum(entry["bytes"] for entry in self.categories.values())
+
+
+def get_memory_report(road_network=None, total_areas=None, cache=None):
+    """
+    Bytes by category of a parsed network, its lane geometry and a lane geometry cache.
+    :param road_network: Parsed road network.
+    :param total_areas: Result of "get_all_lanes".
+    :param cache: LaneGeometryCache.
+    :return: Dictionary {"categories": {category: {"bytes", "objects"}}, "total": bytes}
+    """
+    counter = MemoryCounter()
+    # The lane geometry first, so its sections are split by key before they are reached through the cache.
+    if total_areas is not None:
+        counter.add_total_areas(total_areas)
+    if road_network is not None:
+        counter.add_network(road_network)
+    if cache is not None:
+        counter.add_cache(cache)
+    return {"categories": counter.categories, "total": counter.total}
+
+
+def get_rss():
+    """ Current resident set size in bytes, None if unknown. """
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def get_peak_rss():
+    """ Peak resident set size in bytes, None if unknown. """
+    try:
+        with open("/proc/self/status") as fh:
+            for line in fh:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def reset_peak_rss():
+    """ Reset the peak resident set size to the current one (Linux only). :return: True on success. """
+    try:
+        with open("/proc/self/clear_refs", "w") as fh:
+            fh.write("5")
+        return True
+    except OSError:
+        return False
+
+
+class MemoryTracker:
+    """
+    Records RSS before and after, the peak RSS and optionally the Python heap peak of named pipeline stages.
+    """
+
+    def __init__(self, trace_python=False):
+        self.trace_python = trace_python
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name):
+        if self.trace_python:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            traced_before = tracemalloc.get_traced_memory()[0]
+
+        record = {"stage": name, "rss_before": get_rss(), "peak_reset": reset_peak_rss()}
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["seconds"] = time.perf_counter() - start
+            record["rss_after"] = get_rss()
+            record["peak_rss"] = get_peak_rss()
+            if self.trace_python:
+                current, peak = tracemalloc.get_traced_memory()
+                record["python_allocated"] = current - traced_before
+                record["python_peak"] = peak - traced_before
+            self.stages.append(record)
+
+
+def format_bytes(nbytes):
+    if nbytes is None:
+        return "-"
+    if abs(nbytes) < 1024 ** 2:
+        return "{:.1f} KiB".format(nbytes / 1024)
+    return "{:.1f} MiB".format(nbytes / 1024 ** 2)
+
+
+def format_categories(report):
+    lines = ["{:<20} {:>12} {:>14}".format("category", "objects", "size")]
+    for category, entry in report["categories"].items():
+        if entry["objects"]:
+            lines.append("{:<20} {:>12} {:>14}".format(category, entry["objects"], format_bytes(entry["bytes"])))
+    lines.append("{:<20} {:>12} {:>14}".format("total", "", format_bytes(report["total"])))
+    return "\n".join(lines)
+
+
+def format_stages(stages):
+    columns = ["seconds", "rss_before", "rss_after", "peak_rss"]
+    if any("python_peak" in record for record in stages):
+        columns += ["python_allocated", "python_peak"]
+    lines = ["{:<24}".format("stage") + "".join("{:>18}".format(column) for column in columns)]
+    for record in stages:
+        values = ["{:.2f}".format(record["seconds"])]
+        values += [format_bytes(record.get(column)) for column in columns[1:]]
+        name = record["stage"] if record["peak_reset"] else record["stage"] + " *"
+        lines.append("{:<24}".format(name) + "".join("{:>18}".format(value) for value in values))
+    if not all(record["peak_reset"] for record in stages):
+        lines.append("* peak RSS of the whole process so far")
+    return "\n".join(lines)
+
+
+def measure_pipeline(file, step=STEP, arrays=False, trace_python=False):
+    """
+    Load a file, calculate its lane geometry and account the memory of every stage and of the results.
+    :param file: xodr file.
+    :param step: Sample step of the reference lines.
+    :param arrays: Calculate the lanes in array form through a lane geometry cache instead of lists of tuples.
+    :param trace_python: Also record the Python heap peaks per stage with tracemalloc (slower).
+    :return: Dictionary with the stage records and the category report.
+    """
+    tracker = MemoryTracker(trace_python=trace_python)
+    cache = LaneGeometryCache(max_bytes=sys.maxsize) if arrays else None
+
+    with tracker.stage("load_xodr_and_parse"):
+        road_network = load_xodr_and_parse(file)
+    with tracker.stage("get_all_lanes"):
+        total_areas = get_all_lanes(road_network, step=step, cache=cache, namespace=file, progress=False)
+    with tracker.stage("accounting"):
+        report = get_memory_report(road_network, total_areas, cache)
+
+    return {"file": file, "step": step, "arrays": arrays, "stages": tracker.stages, **report}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report the memory used by a parsed xodr file and its lanes.")
+    parser.add_argument("file", help="xodr file")
+    parser.add_argument("--step", type=float, default=STEP, help="Sample step of the reference lines.")
+    parser.add_argument("--arrays", action="store_true", help="Calculate the lanes in array form.")
+    parser.add_argument("--tracemalloc", action="store_true", help="Also record Python heap peaks per stage.")
+    parser.add_argument("--json", default=None, help="Write the report to this json file.")
+    args = parser.parse_args(argv)
+
+    result = measure_pipeline(args.file, step=args.step, arrays=args.arrays, trace_python=args.tracemalloc)
+    print(format_stages(result["stages"]))
+    print()
+    print(format_categories(result))
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(result, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
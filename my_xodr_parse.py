@@ -689,11 +689,12 @@ def plot_planes_of_roads(total_areas, save_folder):
     """
 
 
-def process_one_file(file, step=0.1):
+def process_one_file(file, step=0.1, simplify_tolerance=None):
     """
     Load one .xodr file and calculate the railing positions with other important messages.
     :param file: Input file.
     :param step: Step of calculation.
+    :param simplify_tolerance: If given, simplify the lane boundaries with this error in metres before output.
     :return: None
     """
 
@@ -705,6 +706,11 @@ def process_one_file(file, step=0.1):
     road_network = load_xodr_and_parse(file)
     total_areas = get_all_lanes(road_network, step=step)
 
+    if simplify_tolerance:
+        from simplify_polylines import simplify_total_areas, summarize_report
+        total_areas, report = simplify_total_areas(total_areas, simplify_tolerance)
+        print(summarize_report(report))
+
     plot_planes_of_roads(total_areas, save_folder)
 
     # 把车道线数据保存到文件中
@@ -716,9 +722,9 @@ def save_lane_data_to_file(total_areas, save_folder):
     Save the lane data to file.
     :param total_areas:
     """
-    # import json
-    # save_file = os.path.join(save_folder, "lane_data.csv")
-    save_file = os.path.join("D:\\my_github_learn\\data_test", "lane_data.csv")
+    # Full boundary geometry can be exported with "export_arrow.py" (Parquet / Arrow IPC).
+    os.makedirs(save_folder, exist_ok=True)
+    save_file = os.path.join(save_folder, "lane_data.csv")
     with open(save_file, "w") as file:
         file.write("road_id,lane_id,start_point_x,start_point_y,end_point_x,end_point_y\n")
         for k, v in total_areas.items():
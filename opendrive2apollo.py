@@ -1 +0,0 @@
-import imap as imap
@@ -1,2 +1,2 @@
 
-from opendriveparser.parser import parse_opendrive
+from opendriveparser.parser import parse_opendrive, read_header
@@ -1,5 +1,8 @@
 
-class Junction(object):
+from opendriveparser.elements.userData import UserDataElement
+
+
+class Junction(UserDataElement):
     # TODO priority
     # TODO controller
 
@@ -1,4 +1,7 @@
 
+from opendriveparser.elements.userData import UserDataElement
+
+
 class OpenDrive(object):
 
     def __init__(self):
@@ -13,6 +16,13 @@ class OpenDrive(object):
     def header(self):
         return self._header
 
+    @header.setter
+    def header(self, value):
+        if not isinstance(value, Header):
+            raise TypeError("Value must be Header")
+
+        self._header = value
+
     @property
     def roads(self):
         return self._roads
@@ -41,7 +51,7 @@ class OpenDrive(object):
         return self._stations
 
 
-class Header(object):
+class Header(UserDataElement):
 
     def __init__(self):
         self._revMajor = None
@@ -54,3 +64,160 @@ class Header(object):
         self._east = None
         self._west = None
         self._vendor = None
+        self._geoReference = None
+        self._offset = None
+
+    @property
+    def revMajor(self):
+        return self._revMajor
+
+    @revMajor.setter
+    def revMajor(self, value):
+        self._revMajor = int(value) if value is not None else None
+
+    @property
+    def revMinor(self):
+        return self._revMinor
+
+    @revMinor.setter
+    def revMinor(self, value):
+        self._revMinor = int(value) if value is not None else None
+
+    @property
+    def name(self):
+        return self._name
+
+    @name.setter
+    def name(self, value):
+        self._name = str(value) if value is not None else None
+
+    @property
+    def version(self):
+        return self._version
+
+    @version.setter
+    def version(self, value):
+        self._version = str(value) if value is not None else None
+
+    @property
+    def date(self):
+        return self._date
+
+    @date.setter
+    def date(self, value):
+        self._date = str(value) if value is not None else None
+
+    @property
+    def north(self):
+        return self._north
+
+    @north.setter
+    def north(self, value):
+        self._north = float(value) if value is not None else None
+
+    @property
+    def south(self):
+        return self._south
+
+    @south.setter
+    def south(self, value):
+        self._south = float(value) if value is not None else None
+
+    @property
+    def east(self):
+        return self._east
+
+    @east.setter
+    def east(self, value):
+        self._east = float(value) if value is not None else None
+
+    @property
+    def west(self):
+        return self._west
+
+    @west.setter
+    def west(self, value):
+        self._west = float(value) if value is not None else None
+
+    @property
+    def vendor(self):
+        return self._vendor
+
+    @vendor.setter
+    def vendor(self, value):
+        self._vendor = str(value) if value is not None else None
+
+    @property
+    def geoReference(self):
+        """ PROJ string of the projection of the inertial x/y coordinates, None if not given """
+        return self._geoReference
+
+    @geoReference.setter
+    def geoReference(self, value):
+        if value is not None:
+            value = str(value).strip() or None
+
+        self._geoReference = value
+
+    @property
+    def offset(self):
+        return self._offset
+
+    @offset.setter
+    def offset(self, value):
+        if not isinstance(value, HeaderOffset):
+            raise TypeError("Value must be HeaderOffset")
+
+        self._offset = value
+
+    @property
+    def revision(self):
+        """ (revMajor, revMinor), e.g. (1, 4) """
+        return self._revMajor, self._revMinor
+
+    @property
+    def extent(self):
+        """ (west, south, east, north) of the inertial coordinates """
+        return self._west, self._south, self._east, self._north
+
+
+class HeaderOffset(object):
+    """ Offset of the inertial coordinates against the geoReference (OpenDRIVE 1.5+) """
+
+    def __init__(self):
+        self._x = 0.0
+        self._y = 0.0
+        self._z = 0.0
+        self._hdg = 0.0
+
+    @property
+    def x(self):
+        return self._x
+
+    @x.setter
+    def x(self, value):
+        self._x = float(value)
+
+    @property
+    def y(self):
+        return self._y
+
+    @y.setter
+    def y(self, value):
+        self._y = float(value)
+
+    @property
+    def z(self):
+        return self._z
+
+    @z.setter
+    def z(self, value):
+        self._z = float(value)
+
+    @property
+    def hdg(self):
+        return self._hdg
+
+    @hdg.setter
+    def hdg(self, value):
+        self._hdg = float(value)
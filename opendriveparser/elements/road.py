@@ -4,8 +4,10 @@ from opendriveparser.elements.roadLink import Link
 from opendriveparser.elements.roadLanes import Lanes
 from opendriveparser.elements.roadElevationProfile import ElevationProfile
 from opendriveparser.elements.roadLateralProfile import LateralProfile
+from opendriveparser.elements.roadObjects import RoadObjects
+from opendriveparser.elements.userData import UserDataElement
 
-class Road(object):
+class Road(UserDataElement):
 
     def __init__(self):
         self._id = None
@@ -20,6 +22,8 @@ class Road(object):
         self._elevationProfile = ElevationProfile()
         self._lateralProfile = LateralProfile()
         self._lanes = Lanes()
+        self._objects = RoadObjects()
+        self._signals = RoadObjects()
 
     @property
     def id(self):
@@ -74,3 +78,11 @@ class Road(object):
     @property
     def lanes(self):
         return self._lanes
+
+    @property
+    def objects(self):
+        return self._objects
+
+    @property
+    def signals(self):
+        return self._signals
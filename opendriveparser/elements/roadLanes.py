@@ -1,4 +1,8 @@
 
+import numpy as np
+
+from opendriveparser.elements.userData import UserDataElement
+
 
 class Lanes(object):
 
@@ -8,12 +12,12 @@ class Lanes(object):
 
     @property
     def laneOffsets(self):
-        self._laneOffsets.sort(key=lambda x: x.sPos)
+        self._laneOffsets = sorted(self._laneOffsets, key=lambda x: x.sPos)
         return self._laneOffsets
 
     @property
     def laneSections(self):
-        self._laneSections.sort(key=lambda x: x.sPos)
+        self._laneSections = sorted(self._laneSections, key=lambda x: x.sPos)
         return self._laneSections
 
     def getLaneSection(self, laneSectionIdx):
@@ -88,7 +92,7 @@ class LaneOffset(object):
         return [self._a, self._b, self._c, self._d]
 
 
-class LaneSection(object):
+class LaneSection(UserDataElement):
 
     def __init__(self):
         self._idx = None
@@ -169,7 +173,7 @@ class LeftLanes(object):
 
     @property
     def lanes(self):
-        self._lanes.sort(key=lambda x: x.id, reverse=self.sort_direction)
+        self._lanes = sorted(self._lanes, key=lambda x: x.id, reverse=self.sort_direction)
         return self._lanes
 
 class CenterLanes(LeftLanes):
@@ -179,7 +183,7 @@ class RightLanes(LeftLanes):
     sort_direction = True
 
 
-class Lane(object):
+class Lane(UserDataElement):
 
     laneTypes = [
         "none", "driving", "stop", "shoulder", "biking", "sidewalk", "border",
@@ -194,6 +198,9 @@ class Lane(object):
         self._link = LaneLink()
         self._widths = []
         self._borders = []
+        self._roadMarks = LaneRoadMarks()
+        self._materials = LaneMaterials()
+        self._speeds = LaneSpeeds()
 
     @property
     def id(self):
@@ -237,7 +244,7 @@ class Lane(object):
 
     @property
     def widths(self):
-        self._widths.sort(key=lambda x: x.sOffset)
+        self._widths = sorted(self._widths, key=lambda x: x.sOffset)
         return self._widths
 
     def getWidth(self, widthIdx):
@@ -261,6 +268,54 @@ class Lane(object):
     def borders(self):
         return self._borders
 
+    @property
+    def roadMarks(self):
+        return self._roadMarks
+
+    @roadMarks.setter
+    def roadMarks(self, value):
+        if not isinstance(value, LaneRoadMarks):
+            raise TypeError("Value must be LaneRoadMarks")
+
+        self._roadMarks = value
+
+    @property
+    def materials(self):
+        return self._materials
+
+    @materials.setter
+    def materials(self, value):
+        if not isinstance(value, LaneMaterials):
+            raise TypeError("Value must be LaneMaterials")
+
+        self._materials = value
+
+    @property
+    def speeds(self):
+        return self._speeds
+
+    @speeds.setter
+    def speeds(self, value):
+        if not isinstance(value, LaneSpeeds):
+            raise TypeError("Value must be LaneSpeeds")
+
+        self._speeds = value
+
+    def getWidths(self, sLaneSection):
+        """ Evaluate the width polynomials at many positions at once, NaN before the first width entry """
+
+        widths = self.widths
+        sLaneSection = np.asarray(sLaneSection, dtype=np.float64)
+        if not widths:
+            return np.full(sLaneSection.shape, np.nan)
+
+        sOffsets = np.array([width.sOffset for width in widths])
+        coeffs = np.array([width.coeffs for width in widths])
+        index = np.searchsorted(sOffsets, sLaneSection, side="right") - 1
+        ds = sLaneSection - sOffsets[np.maximum(index, 0)]
+        a, b, c, d = coeffs[np.maximum(index, 0)].T
+        return np.where(index >= 0, a + ds * (b + ds * (c + ds * d)), np.nan)
+
 
 class LaneLink(object):
 
@@ -350,3 +405,149 @@ class LaneWidth(object):
 
 class LaneBorder(LaneWidth):
     pass
+
+
+class LaneAttributeTable(object):
+    """ Piecewise constant records of one lane (e.g. road marks), stored column-wise in numpy arrays
+
+    Every record is valid from its sOffset up to the sOffset of the next record. Text columns are stored as int16
+    codes into the class-wide vocabulary of the column.
+    """
+
+    numericColumns = ()
+    textColumns = ()
+    vocabularies = {}
+
+    def __init__(self, records=()):
+        """ records: Iterable of dictionaries of the xml attributes, e.g. {"sOffset": "0", "type": "solid"} """
+
+        records = sorted(records, key=lambda x: float(x.get("sOffset", 0)))
+
+        self._sOffset = np.array([float(record.get("sOffset", 0)) for record in records], dtype=np.float64)
+        self._columns = dict()
+
+        for column in self.numericColumns:
+            self._columns[column] = np.array([self.toFloat(record.get(column)) for record in records], dtype=np.float64)
+
+        for column in self.textColumns:
+            self._columns[column] = np.array(
+                [self.encode(column, record.get(column)) for record in records], dtype=np.int16)
+
+    @staticmethod
+    def toFloat(value):
+        """ Missing or non-numeric values (e.g. speed max="no limit") become NaN """
+
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return np.nan
+
+    @classmethod
+    def encode(cls, column, value):
+        """ Code of a text value, new values are appended to the vocabulary. -1 stands for a missing value """
+
+        if value is None:
+            return -1
+
+        vocabulary = cls.vocabularies[column]
+        if value not in vocabulary:
+            vocabulary.append(value)
+
+        return vocabulary.index(value)
+
+    @classmethod
+    def decode(cls, column, codes):
+        """ Text values of an array of codes, None for missing values """
+
+        vocabulary = cls.vocabularies[column]
+        return [vocabulary[code] if code >= 0 else None for code in np.asarray(codes).ravel()]
+
+    def __len__(self):
+        return len(self._sOffset)
+
+    @property
+    def sOffset(self):
+        return self._sOffset
+
+    def column(self, name):
+        """ Array of one column, codes for text columns """
+        return self._columns[name]
+
+    def indexAt(self, sLaneSection):
+        """ Index of the record valid at every position, -1 before the first record """
+
+        return np.searchsorted(self._sOffset, np.asarray(sLaneSection, dtype=np.float64), side="right") - 1
+
+    def valuesAt(self, name, sLaneSection):
+        """ Values of one column at many positions at once: NaN (numeric) or -1 (text codes) where no record is valid """
+
+        index = self.indexAt(sLaneSection)
+        column = self._columns[name]
+
+        if not len(column):
+            missing = np.nan if name in self.numericColumns else -1
+            return np.full(index.shape, missing, dtype=column.dtype)
+
+        values = column[np.maximum(index, 0)]
+        if name in self.numericColumns:
+            return np.where(index >= 0, values, np.nan)
+
+        return np.where(index >= 0, values, -1).astype(column.dtype)
+
+    def records(self):
+        """ Decoded records as dictionaries, mainly for debugging """
+
+        for i in range(len(self)):
+            record = {"sOffset": float(self._sOffset[i])}
+
+            for column in self.numericColumns:
+                record[column] = float(self._columns[column][i])
+
+            for column in self.textColumns:
+                record[column] = self.decode(column, self._columns[column][i:i + 1])[0]
+
+            yield record
+
+
+class LaneRoadMarks(LaneAttributeTable):
+
+    numericColumns = ("width", "height")
+    textColumns = ("type", "weight", "color", "material", "laneChange")
+    vocabularies = {
+        "type": ["none", "solid", "broken", "solid solid", "solid broken", "broken solid", "broken broken",
+                 "botts dots", "grass", "curb", "custom", "edge"],
+        "weight": ["standard", "bold"],
+        "color": ["standard", "white", "yellow", "blue", "green", "red", "orange", "black", "violet"],
+        "material": ["standard"],
+        "laneChange": ["none", "increase", "decrease", "both"],
+    }
+
+
+class LaneMaterials(LaneAttributeTable):
+
+    numericColumns = ("friction", "roughness")
+    textColumns = ("surface",)
+    vocabularies = {
+        "surface": [],
+    }
+
+
+class LaneSpeeds(LaneAttributeTable):
+
+    numericColumns = ("max",)
+    textColumns = ("unit",)
+    vocabularies = {
+        "unit": ["m/s", "km/h", "mph"],
+    }
+
+    # Factors from the speed units to m/s.
+    unitFactors = {"m/s": 1.0, "km/h": 1 / 3.6, "mph": 0.44704}
+
+    def maxSpeedAt(self, sLaneSection):
+        """ Maximum speed in m/s at many positions at once, NaN where none is given """
+
+        maxSpeed = self.valuesAt("max", sLaneSection)
+        units = self.valuesAt("unit", sLaneSection)
+
+        factors = np.array([self.unitFactors.get(unit, 1.0) for unit in self.vocabularies["unit"]] + [1.0])
+        return maxSpeed * factors[units]
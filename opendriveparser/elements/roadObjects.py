@@ -0,0 +1,303 @@
+
+import numpy as np
+
+from opendriveparser.elements.userData import UserDataElement
+
+
+class RoadObject(UserDataElement):
+    """ Placement and size of an <object> along the reference line """
+
+    def __init__(self):
+        self._id = None
+        self._name = None
+        self._type = None
+        self._sPos = None
+        self._t = None
+        self._zOffset = 0.0
+        self._hdg = 0.0
+        self._orientation = None
+        self._height = None
+        self._width = None
+        self._length = None
+        self._validity = []
+
+    @property
+    def id(self):
+        return self._id
+
+    @id.setter
+    def id(self, value):
+        self._id = str(value)
+
+    @property
+    def name(self):
+        return self._name
+
+    @name.setter
+    def name(self, value):
+        self._name = str(value) if value is not None else None
+
+    @property
+    def type(self):
+        return self._type
+
+    @type.setter
+    def type(self, value):
+        self._type = str(value) if value is not None else None
+
+    @property
+    def sPos(self):
+        return self._sPos
+
+    @sPos.setter
+    def sPos(self, value):
+        self._sPos = float(value)
+
+    @property
+    def t(self):
+        return self._t
+
+    @t.setter
+    def t(self, value):
+        self._t = float(value)
+
+    @property
+    def zOffset(self):
+        return self._zOffset
+
+    @zOffset.setter
+    def zOffset(self, value):
+        self._zOffset = float(value) if value is not None else 0.0
+
+    @property
+    def hdg(self):
+        return self._hdg
+
+    @hdg.setter
+    def hdg(self, value):
+        self._hdg = float(value) if value is not None else 0.0
+
+    @property
+    def orientation(self):
+        return self._orientation
+
+    @orientation.setter
+    def orientation(self, value):
+        if value not in ["+", "-", "none", None]:
+            raise AttributeError("Orientation can only be +, - or none.")
+
+        self._orientation = value
+
+    @property
+    def height(self):
+        return self._height
+
+    @height.setter
+    def height(self, value):
+        self._height = float(value) if value is not None else None
+
+    @property
+    def width(self):
+        return self._width
+
+    @width.setter
+    def width(self, value):
+        self._width = float(value) if value is not None else None
+
+    @property
+    def length(self):
+        return self._length
+
+    @length.setter
+    def length(self, value):
+        self._length = float(value) if value is not None else None
+
+    @property
+    def validity(self):
+        """ List of (fromLane, toLane), empty if valid for all lanes """
+        return self._validity
+
+    def addValidity(self, fromLane, toLane):
+        self._validity.append((int(fromLane), int(toLane)))
+
+    def isValidForLane(self, laneId):
+        # Some exporters (e.g. RoadRunner) write fromLane="0" toLane="0" for items of the whole road.
+        if all(validity == (0, 0) for validity in self._validity):
+            return True
+
+        return any(min(fromLane, toLane) <= laneId <= max(fromLane, toLane) for fromLane, toLane in self._validity)
+
+
+class RoadSignal(RoadObject):
+    """ A <signal>, placed like an object, with type codes and an optional value """
+
+    def __init__(self):
+        super().__init__()
+        self._subtype = None
+        self._country = None
+        self._dynamic = False
+        self._value = None
+        self._unit = None
+        self._hOffset = 0.0
+
+    @property
+    def subtype(self):
+        return self._subtype
+
+    @subtype.setter
+    def subtype(self, value):
+        self._subtype = str(value) if value is not None else None
+
+    @property
+    def country(self):
+        return self._country
+
+    @country.setter
+    def country(self, value):
+        self._country = str(value) if value is not None else None
+
+    @property
+    def dynamic(self):
+        return self._dynamic
+
+    @dynamic.setter
+    def dynamic(self, value):
+        self._dynamic = value in ("yes", "true", True)
+
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        self._value = float(value) if value is not None else None
+
+    @property
+    def unit(self):
+        return self._unit
+
+    @unit.setter
+    def unit(self, value):
+        self._unit = str(value) if value is not None else None
+
+    @property
+    def hOffset(self):
+        return self._hOffset
+
+    @hOffset.setter
+    def hOffset(self, value):
+        self._hOffset = float(value) if value is not None else 0.0
+
+
+class RoadSignalReference(RoadObject):
+    """ A <signalReference>: a signal of (usually) another road applying to this road and its lanes at s, t
+
+    "id" is the id of the referenced signal, "signal" the RoadSignal itself once the network is parsed (None if it
+    does not exist). Name, type, subtype, value and unit are those of the referenced signal.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._signal = None
+
+    @property
+    def signal(self):
+        return self._signal
+
+    @signal.setter
+    def signal(self, value):
+        if value is not None and not isinstance(value, RoadSignal):
+            raise TypeError("Has to be of instance RoadSignal")
+
+        self._signal = value
+
+    @property
+    def name(self):
+        return self._signal.name if self._signal is not None else self._name
+
+    @name.setter
+    def name(self, value):
+        self._name = str(value) if value is not None else None
+
+    @property
+    def type(self):
+        return self._signal.type if self._signal is not None else self._type
+
+    @type.setter
+    def type(self, value):
+        self._type = str(value) if value is not None else None
+
+    @property
+    def subtype(self):
+        return self._signal.subtype if self._signal is not None else None
+
+    @property
+    def value(self):
+        return self._signal.value if self._signal is not None else None
+
+    @property
+    def unit(self):
+        return self._signal.unit if self._signal is not None else None
+
+
+class RoadObjects(object):
+    """ Objects or signals of one road, sorted by s, with an array of their s positions for binary search """
+
+    def __init__(self):
+        self._items = []
+        self._sPositions = None
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def add(self, item):
+        if not isinstance(item, RoadObject):
+            raise TypeError("Has to be of instance RoadObject")
+
+        self._items.append(item)
+        self._sPositions = None
+
+    @property
+    def items(self):
+        if self._sPositions is None:
+            self._items = sorted(self._items, key=lambda x: x.sPos)
+            self._sPositions = np.array([item.sPos for item in self._items], dtype=np.float64)
+
+        return self._items
+
+    @property
+    def sPositions(self):
+        self.items
+        return self._sPositions
+
+    def between(self, sStart, sEnd):
+        """ Items with sStart <= s <= sEnd, in order of s """
+
+        items = self.items
+        first = np.searchsorted(self._sPositions, sStart, side="left")
+        last = np.searchsorted(self._sPositions, sEnd, side="right")
+        return items[first:last]
+
+    def ahead(self, sPos, distance, laneId=None):
+        """ Items within distance ahead of sPos in the driving direction of a lane
+
+        Right lanes (negative ids) drive towards increasing s, left lanes towards decreasing s. Items are returned in
+        driving order. If laneId is given, only items valid for that lane and facing its traffic (orientation "+"
+        for right lanes, "-" for left lanes, or "none") are returned.
+        """
+
+        if laneId is not None and laneId > 0:
+            items = self.between(sPos - distance, sPos)[::-1]
+            orientation = "-"
+        else:
+            items = self.between(sPos, sPos + distance)
+            orientation = "+"
+
+        if laneId is None:
+            return items
+
+        return [item for item in items
+                if item.orientation in (orientation, "none", None) and item.isValidForLane(laneId)]
@@ -1,8 +1,6 @@
 
 import abc
 import numpy as np
-from eulerspiral import eulerspiral
-from eulerlib import *
 
 
 class PlanView(object):
@@ -43,6 +41,46 @@ class PlanView(object):
 
         raise Exception("Tried to calculate a position outside of the borders of the trajectory by s=" + str(sPos))
 
+    def calcPositions(self, sPositions):
+        """ Calculate positions and tangents at many s at once, each geometry is evaluated in one call """
+
+        sPositions = np.asarray(sPositions, dtype=np.float64)
+        positions = np.zeros(sPositions.shape + (2,))
+        tangents = np.zeros(sPositions.shape)
+        if not self._geometries:
+            return positions, tangents
+
+        lengths = np.array([geometry.getLength() for geometry in self._geometries])
+        starts = np.concatenate([[0.0], np.cumsum(lengths)[:-1]])
+        outside = (sPositions > starts[-1] + lengths[-1]) & ~np.isclose(sPositions, starts[-1] + lengths[-1])
+        if np.any(outside):
+            raise Exception("Tried to calculate a position outside of the borders of the trajectory by s=" +
+                            str(sPositions[outside][0]))
+
+        index = np.clip(np.searchsorted(starts, sPositions, side="right") - 1, 0, len(starts) - 1)
+        for geometryIdx in np.unique(index):
+            mask = index == geometryIdx
+            positions[mask], tangents[mask] = self._geometries[geometryIdx].calcPositions(
+                sPositions[mask] - starts[geometryIdx])
+
+        return positions, tangents
+
+    def getDiscontinuities(self):
+        """ Position gaps and heading jumps (in [-pi, pi)) from the end of every geometry to the start of the next """
+
+        if len(self._geometries) < 2:
+            return np.zeros(0), np.zeros(0)
+
+        ends = [geometry.calcPositions([geometry.getLength()]) for geometry in self._geometries[:-1]]
+        endPositions = np.concatenate([position for position, _ in ends])
+        endHeadings = np.concatenate([tangent for _, tangent in ends])
+        startPositions = np.array([geometry.getStartPosition() for geometry in self._geometries[1:]], dtype=np.float64)
+        startHeadings = np.array([geometry.getStartHeading() for geometry in self._geometries[1:]], dtype=np.float64)
+
+        gaps = np.hypot(*(startPositions - endPositions).T)
+        headingJumps = (startHeadings - endHeadings + np.pi) % (2 * np.pi) - np.pi
+        return gaps, headingJumps
+
 class Geometry(object):
     __metaclass__ = abc.ABCMeta
 
@@ -61,6 +99,24 @@ class Geometry(object):
         """ Calculates the position of the geometry as if the starting point is (0/0) """
         return
 
+    def getStartHeading(self):
+        return self.calcPosition(0.0)[1]
+
+    def setStart(self, startPosition, heading):
+        """ Move the start to startPosition and turn the geometry so that its start tangent is heading """
+
+        self._heading += float(heading) - self.getStartHeading()
+        self._startPosition = np.array(startPosition, dtype=np.float64)
+
+    def calcPositions(self, s):
+        """ Positions of shape (n, 2) and tangents of shape (n,) at an array of s """
+
+        s = np.asarray(s, dtype=np.float64).reshape(-1)
+        results = [self.calcPosition(x) for x in s]
+        positions = np.array([position for position, _ in results], dtype=np.float64).reshape(-1, 2)
+        tangents = np.array([tangent for _, tangent in results], dtype=np.float64)
+        return positions, tangents
+
 class Line(Geometry):
 
     def __init__(self, startPosition, heading, length,lineType="line"):
@@ -75,12 +131,22 @@ class Line(Geometry):
     def getLength(self):
         return self.length
 
+    def setStart(self, startPosition, heading):
+        self.startPosition = np.array(startPosition, dtype=np.float64)
+        self.heading = float(heading)
+
     def calcPosition(self, s):
         pos = self.startPosition + np.array([s * np.cos(self.heading), s * np.sin(self.heading)])
         tangent = self.heading
 
         return (pos, tangent)
 
+    def calcPositions(self, s):
+        s = np.asarray(s, dtype=np.float64).reshape(-1)
+        pos = self.startPosition + np.outer(s, [np.cos(self.heading), np.sin(self.heading)])
+
+        return (pos, np.full(s.shape, self.heading, dtype=np.float64))
+
 class Arc(Geometry):
 
     def __init__(self, startPosition, heading, length, curvature,lineType="arc"):
@@ -96,6 +162,10 @@ class Arc(Geometry):
     def getLength(self):
         return self.length
 
+    def setStart(self, startPosition, heading):
+        self.startPosition = np.array(startPosition, dtype=np.float64)
+        self.heading = float(heading)
+
     def calcPosition(self, s):
         c = self.curvature
         hdg = self.heading - np.pi / 2
@@ -111,6 +181,18 @@ class Arc(Geometry):
 
         return (pos, tangent)
 
+    def calcPositions(self, s):
+        s = np.asarray(s, dtype=np.float64).reshape(-1)
+        c = self.curvature
+        hdg = self.heading - np.pi / 2
+
+        a = 2 / c * np.sin(s * c / 2)
+        alpha = (np.pi - s * c) / 2 - hdg
+
+        pos = self.startPosition + np.stack([-1 * a * np.cos(alpha), a * np.sin(alpha)], axis=1)
+
+        return (pos, self.heading + s * self.curvature)
+
 class Spiral(Geometry):
 
     def __init__(self, startPosition, heading, length, curvStart, curvEnd,lineType="spiral"):
@@ -121,7 +203,17 @@ class Spiral(Geometry):
         self._curvEnd = curvEnd
         self.lineType = lineType
 
-        self._spiral = eulerspiral.EulerSpiral.createFromLengthAndCurvature(self._length, self._curvStart, self._curvEnd)
+        self._eulerSpiral = None
+
+    @property
+    def _spiral(self):
+        """ Euler spiral of the geometry, created on first use so eulerspiral is only imported when it is needed """
+        if self._eulerSpiral is None:
+            from eulerspiral import eulerspiral
+
+            self._eulerSpiral = eulerspiral.EulerSpiral.createFromLengthAndCurvature(self._length, self._curvStart,
+                                                                                     self._curvEnd)
+        return self._eulerSpiral
 
     def getStartPosition(self):
         return self._startPosition
@@ -225,3 +317,21 @@ class ParamPoly3(Geometry):
 
 
         return (self._startPosition + np.array([xrot, yrot]), self._heading + tangent)
+
+    def calcPositions(self, s):
+        s = np.asarray(s, dtype=np.float64).reshape(-1)
+        pos = (s / self._length) * self._pRange
+
+        coeffsU = [self._aU, self._bU, self._cU, self._dU]
+        coeffsV = [self._aV, self._bV, self._cV, self._dV]
+
+        x = np.polynomial.polynomial.polyval(pos, coeffsU)
+        y = np.polynomial.polynomial.polyval(pos, coeffsV)
+
+        xrot = x * np.cos(self._heading) - y * np.sin(self._heading)
+        yrot = x * np.sin(self._heading) + y * np.cos(self._heading)
+
+        dx = np.polynomial.polynomial.polyval(pos, coeffsU[1:] * np.array(np.arange(1, len(coeffsU))))
+        dy = np.polynomial.polynomial.polyval(pos, coeffsV[1:] * np.array(np.arange(1, len(coeffsV))))
+
+        return (self._startPosition + np.stack([xrot, yrot], axis=1), self._heading + np.arctan2(dy, dx))
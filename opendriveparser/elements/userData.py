@@ -0,0 +1,131 @@
+
+import re
+
+
+class RawXmlSpan(object):
+    """ Byte span of one xml element in the source buffer, decoded only on access """
+
+    __slots__ = ("_source", "_start", "_end", "_tag")
+
+    def __init__(self, source, start, end, tag):
+        self._source = source
+        self._start = start
+        self._end = end
+        self._tag = tag
+
+    def __repr__(self):
+        return "<RawXmlSpan {} [{}:{}]>".format(self._tag, self._start, self._end)
+
+    def __len__(self):
+        return self._end - self._start
+
+    @property
+    def tag(self):
+        return self._tag
+
+    @property
+    def start(self):
+        return self._start
+
+    @property
+    def end(self):
+        return self._end
+
+    @property
+    def raw(self):
+        return bytes(self._source[self._start:self._end])
+
+    @property
+    def text(self):
+        return self.raw.decode("utf-8")
+
+    @property
+    def element(self):
+        """ Freshly parsed element of the span, not shared with any document """
+        from lxml import etree
+
+        return etree.fromstring(self.raw)
+
+
+class UserDataElement(object):
+    """ Base of the elements that can keep their <userData> and unknown (vendor) child elements as byte spans """
+
+    @property
+    def userData(self):
+        return self.__dict__.setdefault("_userData", [])
+
+    @property
+    def extensions(self):
+        return self.__dict__.setdefault("_extensions", [])
+
+
+class UserDataSource(object):
+    """ Locates the elements of a parsed document in its source bytes
+
+    The n-th element of a tag in document order is matched to the n-th start tag of that name in the buffer, so
+    neither line numbers nor the document have to be kept. Only needed while parsing.
+    """
+
+    def __init__(self, buffer, rootNode):
+        self._buffer = buffer
+        self._rootNode = rootNode
+        self._indexes = dict()  # tag => {element: n}
+        self._starts = dict()  # tag => [byte offset of the n-th start tag]
+        self.capturedUserData = 0
+
+    def countUserData(self):
+        """ Number of <userData> blocks of the document, not counting blocks nested in other blocks """
+
+        return sum(1 for node in self._rootNode.iter("userData")
+                   if not any(ancestor.tag == "userData" for ancestor in node.iterancestors()))
+
+    def span(self, node):
+        """ RawXmlSpan of a element of the document, None if it cannot be located """
+
+        tag = node.tag
+        if not isinstance(tag, str):  # Comments and processing instructions
+            return None
+
+        if tag not in self._indexes:
+            self._indexes[tag] = {element: n for n, element in enumerate(self._rootNode.iter(tag))}
+            pattern = re.compile(b"<" + re.escape(tag.encode("utf-8")) + rb"(?=[\s/>])")
+            self._starts[tag] = [match.start() for match in pattern.finditer(self._buffer)]
+
+        starts = self._starts[tag]
+        if len(starts) != len(self._indexes[tag]):  # e.g. tags inside comments or CDATA
+            return None
+
+        start = starts[self._indexes[tag][node]]
+        return RawXmlSpan(self._buffer, start, self._findEnd(tag, start), tag)
+
+    def _findEnd(self, tag, start):
+        name = re.escape(tag.encode("utf-8"))
+        pattern = re.compile(rb"<(/?)" + name + rb"(?=[\s/>])[^>]*?(/?)>")
+        depth = 0
+        for match in pattern.finditer(self._buffer, start):
+            closing, selfClosing = match.group(1), match.group(2)
+            if closing:
+                depth -= 1
+            elif not selfClosing:
+                depth += 1
+            if depth == 0:
+                return match.end()
+
+        raise ValueError("Unterminated element <{}> at byte {}".format(tag, start))
+
+    def capture(self, node, newElement, knownTags):
+        """ Attach the <userData> and unknown children of node to newElement as byte spans """
+
+        for child in node:
+            if child.tag == "userData":
+                target = newElement.userData
+            elif isinstance(child.tag, str) and child.tag not in knownTags:
+                target = newElement.extensions
+            else:
+                continue
+
+            span = self.span(child)
+            if span is not None:
+                target.append(span)
+                if child.tag == "userData":
+                    self.capturedUserData += 1
@@ -1,20 +1,49 @@
 
+import warnings
+
 import numpy as np
-from lxml import etree
 
-from opendriveparser.elements.openDrive import OpenDrive
+from opendriveparser.elements.openDrive import OpenDrive, Header, HeaderOffset
 from opendriveparser.elements.road import Road
 from opendriveparser.elements.roadLink import Predecessor as RoadLinkPredecessor, Successor as RoadLinkSuccessor, Neighbor as RoadLinkNeighbor
 from opendriveparser.elements.roadType import Type as RoadType, Speed as RoadTypeSpeed
 from opendriveparser.elements.roadElevationProfile import Elevation as RoadElevationProfileElevation
 from opendriveparser.elements.roadLateralProfile import Superelevation as RoadLateralProfileSuperelevation, Crossfall as RoadLateralProfileCrossfall, Shape as RoadLateralProfileShape
-from opendriveparser.elements.roadLanes import LaneOffset as RoadLanesLaneOffset, Lane as RoadLaneSectionLane, LaneSection as RoadLanesSection, LaneWidth as RoadLaneSectionLaneWidth, LaneBorder as RoadLaneSectionLaneBorder
+from opendriveparser.elements.roadLanes import LaneOffset as RoadLanesLaneOffset, Lane as RoadLaneSectionLane, LaneSection as RoadLanesSection, LaneWidth as RoadLaneSectionLaneWidth, LaneBorder as RoadLaneSectionLaneBorder, LaneRoadMarks as RoadLaneSectionLaneRoadMarks, LaneMaterials as RoadLaneSectionLaneMaterials, LaneSpeeds as RoadLaneSectionLaneSpeeds
+from opendriveparser.elements.roadObjects import RoadObject, RoadSignal, RoadSignalReference
+from opendriveparser.elements.userData import UserDataSource
 from opendriveparser.elements.junction import Junction, Connection as JunctionConnection, LaneLink as JunctionConnectionLaneLink
+from opendriveparser import profiling
+
+
+
+# Child elements handled by the parser, other children (except <userData>) are captured as extensions.
+KNOWN_CHILD_TAGS = {
+    "header": {"geoReference", "offset"},
+    "road": {"link", "type", "planView", "elevationProfile", "lateralProfile", "lanes", "objects", "signals",
+             "surface", "railroad"},
+    "laneSection": {"left", "center", "right"},
+    "lane": {"link", "width", "border", "roadMark", "material", "visibility", "speed", "access", "height", "rule"},
+    "junction": {"connection", "priority", "controller", "surface"},
+    "object": {"validity", "repeat", "outline", "outlines", "material", "parkingSpace", "markings", "borders"},
+    "signal": {"validity", "dependency", "reference", "positionRoad", "positionInertial"},
+    "signalReference": {"validity"},
+    # Containers, their <userData> and unknown children go to the road.
+    "objects": {"object", "objectReference", "tunnel", "bridge"},
+    "signals": {"signal", "signalReference"},
+}
+
 
+@profiling.profiled()
+def parse_opendrive(rootNode, source=None):
+    """ Tries to parse XML tree, return OpenDRIVE object
 
+    If the source bytes of the document are given, <userData> and unknown vendor elements of the header, roads,
+    lane sections, lanes, objects, signals and junctions are kept as byte spans into them (see "userData" and
+    "extensions" of these elements). The xml tree is not referenced afterwards.
+    """
 
-def parse_opendrive(rootNode):
-    """ Tries to parse XML tree, return OpenDRIVE object """
+    from lxml import etree
 
     # Only accept xml element
     if not etree.iselement(rootNode):
@@ -23,367 +52,536 @@ def parse_opendrive(rootNode):
 
     newOpenDrive = OpenDrive()
 
+    userDataSource = UserDataSource(source, rootNode) if source is not None else None
+
     # Header
     header = rootNode.find("header")
 
     if header is not None:
-
-        # Reference
-        if header.find("geoReference") is not None:
-            pass
+        newOpenDrive.header = parse_opendrive_header(header, userDataSource)
 
     # Junctions
     for junction in rootNode.findall("junction"):
+        newOpenDrive.junctions.append(parse_opendrive_junction(junction, userDataSource))
 
-        newJunction = Junction()
+    # Load roads
+    for road in rootNode.findall("road"):
+        newOpenDrive.roads.append(parse_opendrive_road(road, userDataSource))
 
-        newJunction.id = int(junction.get("id"))
-        newJunction.name = str(junction.get("name"))
+    resolve_signal_references(newOpenDrive.roads)
 
-        for connection in junction.findall("connection"):
+    if userDataSource is not None:
+        missed = userDataSource.countUserData() - userDataSource.capturedUserData
+        if missed:
+            warnings.warn("{} <userData> blocks of the document were not captured".format(missed))
 
-            newConnection = JunctionConnection()
+    if profiling.is_enabled():
+        profiling.count("roads", len(newOpenDrive.roads))
+        profiling.count("junctions", len(newOpenDrive.junctions))
+        profiling.count("geometries", sum(len(road.planView._geometries) for road in newOpenDrive.roads))
 
-            newConnection.id = connection.get("id")
-            newConnection.incomingRoad = connection.get("incomingRoad")
-            newConnection.connectingRoad = connection.get("connectingRoad")
-            newConnection.contactPoint = connection.get("contactPoint")
+    return newOpenDrive
 
-            for laneLink in connection.findall("laneLink"):
 
-                newLaneLink = JunctionConnectionLaneLink()
+def resolve_signal_references(roads, signalRoads=None):
+    """ Point the signal references of roads at their signals, which are searched in signalRoads (roads by default) """
 
-                newLaneLink.fromId = laneLink.get("from")
-                newLaneLink.toId = laneLink.get("to")
+    signalRoads = roads if signalRoads is None else signalRoads
+    signals = {signal.id: signal for road in signalRoads for signal in road.signals if isinstance(signal, RoadSignal)}
+    for road in roads:
+        for signal in road.signals:
+            if isinstance(signal, RoadSignalReference):
+                signal.signal = signals.get(signal.id)
 
-                newConnection.addLaneLink(newLaneLink)
 
-            newJunction.addConnection(newConnection)
+def parse_opendrive_header(header, userDataSource=None):
+    """ Parse the header element, return Header object """
 
-        newOpenDrive.junctions.append(newJunction)
+    newHeader = Header()
 
+    newHeader.revMajor = header.get("revMajor")
+    newHeader.revMinor = header.get("revMinor")
+    newHeader.name = header.get("name")
+    newHeader.version = header.get("version")
+    newHeader.date = header.get("date")
+    newHeader.north = header.get("north")
+    newHeader.south = header.get("south")
+    newHeader.east = header.get("east")
+    newHeader.west = header.get("west")
+    newHeader.vendor = header.get("vendor")
 
+    # Reference
+    if header.find("geoReference") is not None:
+        newHeader.geoReference = header.find("geoReference").text
 
-    # Load roads
-    for road in rootNode.findall("road"):
+    # Offset
+    if header.find("offset") is not None:
+        offset = header.find("offset")
+
+        newOffset = HeaderOffset()
+
+        for name in ("x", "y", "z", "hdg"):
+            if offset.get(name) is not None:
+                setattr(newOffset, name, offset.get(name))
+
+        newHeader.offset = newOffset
+
+    if userDataSource is not None:
+        userDataSource.capture(header, newHeader, KNOWN_CHILD_TAGS["header"])
+
+    return newHeader
+
+
+def read_header(file):
+    """ Parse only the header of a .xodr file, return Header object or None
+
+    The file is parsed incrementally and reading stops at the end of the header (or the first road, junction or
+    controller if there is none), so only the leading bytes of even huge files are read.
+    """
+
+    from lxml import etree
+
+    with open(file, "rb") as fh:
+        for event, element in etree.iterparse(fh, events=("start", "end")):
+            if event == "end" and element.tag == "header":
+                return parse_opendrive_header(element)
+            if event == "start" and element.tag in ("road", "junction", "controller"):
+                break
+
+    return None
+
+
+def parse_opendrive_junction(junction, userDataSource=None):
+    """ Parse one junction element, return Junction object """
+
+    newJunction = Junction()
+
+    newJunction.id = int(junction.get("id"))
+    newJunction.name = str(junction.get("name"))
+
+    for connection in junction.findall("connection"):
+
+        newConnection = JunctionConnection()
+
+        newConnection.id = connection.get("id")
+        newConnection.incomingRoad = connection.get("incomingRoad")
+        newConnection.connectingRoad = connection.get("connectingRoad")
+        newConnection.contactPoint = connection.get("contactPoint")
+
+        for laneLink in connection.findall("laneLink"):
+
+            newLaneLink = JunctionConnectionLaneLink()
+
+            newLaneLink.fromId = laneLink.get("from")
+            newLaneLink.toId = laneLink.get("to")
+
+            newConnection.addLaneLink(newLaneLink)
 
-        newRoad = Road()
+        newJunction.addConnection(newConnection)
 
-        newRoad.id = int(road.get("id"))
-        newRoad.name = road.get("name")
-        newRoad.junction = int(road.get("junction")) if road.get("junction") != "-1" else None
+    if userDataSource is not None:
+        userDataSource.capture(junction, newJunction, KNOWN_CHILD_TAGS["junction"])
 
-        # TODO: Problems!!!!
-        newRoad.length = float(road.get("length"))
+    return newJunction
 
-        # Links
-        if road.find("link") is not None:
 
-            predecessor = road.find("link").find("predecessor")
+def parse_opendrive_road(road, userDataSource=None):
+    """ Parse one road element, return Road object """
 
-            if predecessor is not None:
+    newRoad = Road()
 
-                newPredecessor = RoadLinkPredecessor()
+    newRoad.id = int(road.get("id"))
+    newRoad.name = road.get("name")
+    newRoad.junction = int(road.get("junction")) if road.get("junction") != "-1" else None
 
-                newPredecessor.elementType = predecessor.get("elementType")
-                newPredecessor.elementId = predecessor.get("elementId")
-                newPredecessor.contactPoint = predecessor.get("contactPoint")
+    # TODO: Problems!!!!
+    newRoad.length = float(road.get("length"))
 
-                newRoad.link.predecessor = newPredecessor
+    # Links
+    if road.find("link") is not None:
 
+        predecessor = road.find("link").find("predecessor")
 
-            successor = road.find("link").find("successor")
+        if predecessor is not None:
 
-            if successor is not None:
+            newPredecessor = RoadLinkPredecessor()
 
-                newSuccessor = RoadLinkSuccessor()
+            newPredecessor.elementType = predecessor.get("elementType")
+            newPredecessor.elementId = predecessor.get("elementId")
+            newPredecessor.contactPoint = predecessor.get("contactPoint")
 
-                newSuccessor.elementType = successor.get("elementType")
-                newSuccessor.elementId = successor.get("elementId")
-                newSuccessor.contactPoint = successor.get("contactPoint")
+            newRoad.link.predecessor = newPredecessor
 
-                newRoad.link.successor = newSuccessor
 
-            for neighbor in road.find("link").findall("neighbor"):
+        successor = road.find("link").find("successor")
 
-                newNeighbor = RoadLinkNeighbor()
+        if successor is not None:
 
-                newNeighbor.side = neighbor.get("side")
-                newNeighbor.elementId = neighbor.get("elementId")
-                newNeighbor.direction = neighbor.get("direction")
+            newSuccessor = RoadLinkSuccessor()
 
-                newRoad.link.neighbors.append(newNeighbor)
+            newSuccessor.elementType = successor.get("elementType")
+            newSuccessor.elementId = successor.get("elementId")
+            newSuccessor.contactPoint = successor.get("contactPoint")
 
+            newRoad.link.successor = newSuccessor
 
-        # Type
-        for roadType in road.findall("type"):
+        for neighbor in road.find("link").findall("neighbor"):
 
-            newType = RoadType()
+            newNeighbor = RoadLinkNeighbor()
 
-            newType.sPos = roadType.get("s")
-            newType.type = roadType.get("type")
+            newNeighbor.side = neighbor.get("side")
+            newNeighbor.elementId = neighbor.get("elementId")
+            newNeighbor.direction = neighbor.get("direction")
+
+            newRoad.link.neighbors.append(newNeighbor)
+
+
+    # Type
+    for roadType in road.findall("type"):
+
+        newType = RoadType()
+
+        newType.sPos = roadType.get("s")
+        newType.type = roadType.get("type")
 
 #            if roadType.find("speed"):
-            #以下两种写法都行。
-            #if len(roadType.find("speed")) > 0:
-            if roadType.find("speed") is not None:
+        #以下两种写法都行。
+        #if len(roadType.find("speed")) > 0:
+        if roadType.find("speed") is not None:
 
-                newSpeed = RoadTypeSpeed()
+            newSpeed = RoadTypeSpeed()
 
-                newSpeed.max = roadType.find("speed").get("max")
-                newSpeed.unit = roadType.find("speed").get("unit")
+            newSpeed.max = roadType.find("speed").get("max")
+            newSpeed.unit = roadType.find("speed").get("unit")
 
-                newType.speed = newSpeed
+            newType.speed = newSpeed
 
-            newRoad.types.append(newType)
+        newRoad.types.append(newType)
 
 
-        # Plan view
-        for geometry in road.find("planView").findall("geometry"):
+    # Plan view
+    for geometry in road.find("planView").findall("geometry"):
 
-            startCoord = [float(geometry.get("x")), float(geometry.get("y"))]
+        startCoord = [float(geometry.get("x")), float(geometry.get("y"))]
 
-            if geometry.find("line") is not None:
-                newRoad.planView.addLine(startCoord, float(geometry.get("hdg")), float(geometry.get("length")))
+        if geometry.find("line") is not None:
+            newRoad.planView.addLine(startCoord, float(geometry.get("hdg")), float(geometry.get("length")))
 
-            elif geometry.find("spiral") is not None:
-                newRoad.planView.addSpiral(startCoord, float(geometry.get("hdg")), float(geometry.get("length")), float(geometry.find("spiral").get("curvStart")), float(geometry.find("spiral").get("curvEnd")))
+        elif geometry.find("spiral") is not None:
+            newRoad.planView.addSpiral(startCoord, float(geometry.get("hdg")), float(geometry.get("length")), float(geometry.find("spiral").get("curvStart")), float(geometry.find("spiral").get("curvEnd")))
 
-            elif geometry.find("arc") is not None:
-                newRoad.planView.addArc(startCoord, float(geometry.get("hdg")), float(geometry.get("length")), float(geometry.find("arc").get("curvature")))
+        elif geometry.find("arc") is not None:
+            newRoad.planView.addArc(startCoord, float(geometry.get("hdg")), float(geometry.get("length")), float(geometry.find("arc").get("curvature")))
 
-            elif geometry.find("poly3") is not None:
-                raise NotImplementedError()
+        elif geometry.find("poly3") is not None:
+            raise NotImplementedError()
 
-            elif geometry.find("paramPoly3") is not None:
-                if geometry.find("paramPoly3").get("pRange"):
+        elif geometry.find("paramPoly3") is not None:
+            if geometry.find("paramPoly3").get("pRange"):
 
-                    if geometry.find("paramPoly3").get("pRange") == "arcLength":
-                        pMax = float(geometry.get("length"))
-                    else:
-                        pMax = None
+                if geometry.find("paramPoly3").get("pRange") == "arcLength":
+                    pMax = float(geometry.get("length"))
                 else:
                     pMax = None
+            else:
+                pMax = None
 
-                newRoad.planView.addParamPoly3( \
-                    startCoord, \
-                    float(geometry.get("hdg")), \
-                    float(geometry.get("length")), \
-                    float(geometry.find("paramPoly3").get("aU")), \
-                    float(geometry.find("paramPoly3").get("bU")), \
-                    float(geometry.find("paramPoly3").get("cU")), \
-                    float(geometry.find("paramPoly3").get("dU")), \
-                    float(geometry.find("paramPoly3").get("aV")), \
-                    float(geometry.find("paramPoly3").get("bV")), \
-                    float(geometry.find("paramPoly3").get("cV")), \
-                    float(geometry.find("paramPoly3").get("dV")), \
-                    pMax \
-                )
+            newRoad.planView.addParamPoly3( \
+                startCoord, \
+                float(geometry.get("hdg")), \
+                float(geometry.get("length")), \
+                float(geometry.find("paramPoly3").get("aU")), \
+                float(geometry.find("paramPoly3").get("bU")), \
+                float(geometry.find("paramPoly3").get("cU")), \
+                float(geometry.find("paramPoly3").get("dU")), \
+                float(geometry.find("paramPoly3").get("aV")), \
+                float(geometry.find("paramPoly3").get("bV")), \
+                float(geometry.find("paramPoly3").get("cV")), \
+                float(geometry.find("paramPoly3").get("dV")), \
+                pMax \
+            )
 
-            else:
-                raise Exception("invalid xml")
+        else:
+            raise Exception("invalid xml")
 
 
-        # Elevation profile
-        if road.find("elevationProfile") is not None:
+    # Elevation profile
+    if road.find("elevationProfile") is not None:
 
-            for elevation in road.find("elevationProfile").findall("elevation"):
+        for elevation in road.find("elevationProfile").findall("elevation"):
 
-                newElevation = RoadElevationProfileElevation()
+            newElevation = RoadElevationProfileElevation()
 
-                newElevation.sPos = elevation.get("s")
-                newElevation.a = elevation.get("a")
-                newElevation.b = elevation.get("b")
-                newElevation.c = elevation.get("c")
-                newElevation.d = elevation.get("d")
+            newElevation.sPos = elevation.get("s")
+            newElevation.a = elevation.get("a")
+            newElevation.b = elevation.get("b")
+            newElevation.c = elevation.get("c")
+            newElevation.d = elevation.get("d")
 
-                newRoad.elevationProfile.elevations.append(newElevation)
+            newRoad.elevationProfile.elevations.append(newElevation)
 
 
-        # Lateral profile
-        if road.find("lateralProfile") is not None:
+    # Lateral profile
+    if road.find("lateralProfile") is not None:
 
-            for superelevation in road.find("lateralProfile").findall("superelevation"):
+        for superelevation in road.find("lateralProfile").findall("superelevation"):
 
-                newSuperelevation = RoadLateralProfileSuperelevation()
+            newSuperelevation = RoadLateralProfileSuperelevation()
 
-                newSuperelevation.sPos = superelevation.get("s")
-                newSuperelevation.a = superelevation.get("a")
-                newSuperelevation.b = superelevation.get("b")
-                newSuperelevation.c = superelevation.get("c")
-                newSuperelevation.d = superelevation.get("d")
+            newSuperelevation.sPos = superelevation.get("s")
+            newSuperelevation.a = superelevation.get("a")
+            newSuperelevation.b = superelevation.get("b")
+            newSuperelevation.c = superelevation.get("c")
+            newSuperelevation.d = superelevation.get("d")
 
-                newRoad.lateralProfile.superelevations.append(newSuperelevation)
+            newRoad.lateralProfile.superelevations.append(newSuperelevation)
 
-            for crossfall in road.find("lateralProfile").findall("crossfall"):
+        for crossfall in road.find("lateralProfile").findall("crossfall"):
 
-                newCrossfall = RoadLateralProfileCrossfall()
+            newCrossfall = RoadLateralProfileCrossfall()
 
-                newCrossfall.side = crossfall.get("side")
-                newCrossfall.sPos = crossfall.get("s")
-                newCrossfall.a = crossfall.get("a")
-                newCrossfall.b = crossfall.get("b")
-                newCrossfall.c = crossfall.get("c")
-                newCrossfall.d = crossfall.get("d")
+            newCrossfall.side = crossfall.get("side")
+            newCrossfall.sPos = crossfall.get("s")
+            newCrossfall.a = crossfall.get("a")
+            newCrossfall.b = crossfall.get("b")
+            newCrossfall.c = crossfall.get("c")
+            newCrossfall.d = crossfall.get("d")
 
-                newRoad.lateralProfile.crossfalls.append(newCrossfall)
+            newRoad.lateralProfile.crossfalls.append(newCrossfall)
 
-            for shape in road.find("lateralProfile").findall("shape"):
+        for shape in road.find("lateralProfile").findall("shape"):
 
-                newShape = RoadLateralProfileShape()
+            newShape = RoadLateralProfileShape()
 
-                newShape.sPos = shape.get("s")
-                newShape.t = shape.get("t")
-                newShape.a = shape.get("a")
-                newShape.b = shape.get("b")
-                newShape.c = shape.get("c")
-                newShape.d = shape.get("d")
+            newShape.sPos = shape.get("s")
+            newShape.t = shape.get("t")
+            newShape.a = shape.get("a")
+            newShape.b = shape.get("b")
+            newShape.c = shape.get("c")
+            newShape.d = shape.get("d")
 
-                newRoad.lateralProfile.shapes.append(newShape)
+            newRoad.lateralProfile.shapes.append(newShape)
 
 
-        # Lanes
-        lanes = road.find("lanes")
+    # Lanes
+    lanes = road.find("lanes")
 
-        if lanes is None:
-            raise Exception("Road must have lanes element")
+    if lanes is None:
+        raise Exception("Road must have lanes element")
 
-        # Lane offset
-        for laneOffset in lanes.findall("laneOffset"):
+    # Lane offset
+    for laneOffset in lanes.findall("laneOffset"):
 
-            newLaneOffset = RoadLanesLaneOffset()
+        newLaneOffset = RoadLanesLaneOffset()
 
-            newLaneOffset.sPos = laneOffset.get("s")
-            newLaneOffset.a = laneOffset.get("a")
-            newLaneOffset.b = laneOffset.get("b")
-            newLaneOffset.c = laneOffset.get("c")
-            newLaneOffset.d = laneOffset.get("d")
+        newLaneOffset.sPos = laneOffset.get("s")
+        newLaneOffset.a = laneOffset.get("a")
+        newLaneOffset.b = laneOffset.get("b")
+        newLaneOffset.c = laneOffset.get("c")
+        newLaneOffset.d = laneOffset.get("d")
 
-            newRoad.lanes.laneOffsets.append(newLaneOffset)
+        newRoad.lanes.laneOffsets.append(newLaneOffset)
 
 
-        # Lane sections
-        for laneSectionIdx, laneSection in enumerate(road.find("lanes").findall("laneSection")):
+    # Lane sections
+    for laneSectionIdx, laneSection in enumerate(road.find("lanes").findall("laneSection")):
 
-            newLaneSection = RoadLanesSection()
+        newLaneSection = RoadLanesSection()
 
-            # Manually enumerate lane sections for referencing purposes
-            newLaneSection.idx = laneSectionIdx
+        # Manually enumerate lane sections for referencing purposes
+        newLaneSection.idx = laneSectionIdx
 
-            newLaneSection.sPos = laneSection.get("s")
-            newLaneSection.singleSide = laneSection.get("singleSide")
+        newLaneSection.sPos = laneSection.get("s")
+        newLaneSection.singleSide = laneSection.get("singleSide")
 
-            sides = dict(
-                left=newLaneSection.leftLanes,
-                center=newLaneSection.centerLanes,
-                right=newLaneSection.rightLanes
-                )
+        sides = dict(
+            left=newLaneSection.leftLanes,
+            center=newLaneSection.centerLanes,
+            right=newLaneSection.rightLanes
+            )
 
-            for sideTag, newSideLanes in sides.items():
+        for sideTag, newSideLanes in sides.items():
 
-                side = laneSection.find(sideTag)
+            side = laneSection.find(sideTag)
 
-                # It is possible one side is not present
-                if side is None:
-                    continue
+            # It is possible one side is not present
+            if side is None:
+                continue
 
-                for lane in side.findall("lane"):
+            for lane in side.findall("lane"):
 
-                    newLane = RoadLaneSectionLane()
+                newLane = RoadLaneSectionLane()
 
-                    newLane.id = lane.get("id")
-                    newLane.type = lane.get("type")
-                    newLane.level = lane.get("level")
+                newLane.id = lane.get("id")
+                newLane.type = lane.get("type")
+                newLane.level = lane.get("level")
 
-                    # Lane Links
-                    if lane.find("link") is not None:
+                # Lane Links
+                if lane.find("link") is not None:
 
-                        if lane.find("link").find("predecessor") is not None:
-                            newLane.link.predecessorId = lane.find("link").find("predecessor").get("id")
+                    if lane.find("link").find("predecessor") is not None:
+                        newLane.link.predecessorId = lane.find("link").find("predecessor").get("id")
 
-                        if lane.find("link").find("successor") is not None:
-                            newLane.link.successorId = lane.find("link").find("successor").get("id")
+                    if lane.find("link").find("successor") is not None:
+                        newLane.link.successorId = lane.find("link").find("successor").get("id")
 
-                    # Width
-                    for widthIdx, width in enumerate(lane.findall("width")):
+                # Width
+                for widthIdx, width in enumerate(lane.findall("width")):
 
-                        newWidth = RoadLaneSectionLaneWidth()
+                    newWidth = RoadLaneSectionLaneWidth()
 
-                        newWidth.idx = widthIdx
-                        newWidth.sOffset = width.get("sOffset")
-                        newWidth.a = width.get("a")
-                        newWidth.b = width.get("b")
-                        newWidth.c = width.get("c")
-                        newWidth.d = width.get("d")
+                    newWidth.idx = widthIdx
+                    newWidth.sOffset = width.get("sOffset")
+                    newWidth.a = width.get("a")
+                    newWidth.b = width.get("b")
+                    newWidth.c = width.get("c")
+                    newWidth.d = width.get("d")
 
-                        newLane.widths.append(newWidth)
+                    newLane.widths.append(newWidth)
 
-                    # Border
-                    for borderIdx, border in enumerate(lane.findall("border")):
+                # Border
+                for borderIdx, border in enumerate(lane.findall("border")):
 
-                        newBorder = RoadLaneSectionLaneBorder()
+                    newBorder = RoadLaneSectionLaneBorder()
 
-                        newBorder.idx = borderIdx
-                        newBorder.sPos = border.get("sOffset")
-                        newBorder.a = border.get("a")
-                        newBorder.b = border.get("b")
-                        newBorder.c = border.get("c")
-                        newBorder.d = border.get("d")
+                    newBorder.idx = borderIdx
+                    newBorder.sPos = border.get("sOffset")
+                    newBorder.a = border.get("a")
+                    newBorder.b = border.get("b")
+                    newBorder.c = border.get("c")
+                    newBorder.d = border.get("d")
 
-                        newLane.borders.append(newBorder)
+                    newLane.borders.append(newBorder)
 
-                    # Road Marks
-                    # TODO
+                # Road Marks
+                newLane.roadMarks = RoadLaneSectionLaneRoadMarks(roadMark.attrib for roadMark in lane.findall("roadMark"))
 
-                    # Material
-                    # TODO
+                # Material
+                newLane.materials = RoadLaneSectionLaneMaterials(material.attrib for material in lane.findall("material"))
 
-                    # Visiblility
-                    # TODO
+                # Visiblility
+                # TODO
 
-                    # Speed
-                    # TODO
+                # Speed
+                newLane.speeds = RoadLaneSectionLaneSpeeds(speed.attrib for speed in lane.findall("speed"))
 
-                    # Access
-                    # TODO
+                # Access
+                # TODO
 
-                    # Lane Height
-                    # TODO
+                # Lane Height
+                # TODO
 
-                    # Rules
-                    # TODO
+                # Rules
+                # TODO
 
-                    newSideLanes.append(newLane)
+                if userDataSource is not None:
+                    userDataSource.capture(lane, newLane, KNOWN_CHILD_TAGS["lane"])
 
-            newRoad.lanes.laneSections.append(newLaneSection)
+                newSideLanes.append(newLane)
 
+        if userDataSource is not None:
+            userDataSource.capture(laneSection, newLaneSection, KNOWN_CHILD_TAGS["laneSection"])
 
-        # OpenDrive does not provide lane section lengths by itself, calculate them by ourselves
-        for laneSection in newRoad.lanes.laneSections:
+        newRoad.lanes.laneSections.append(newLaneSection)
 
-            # Last lane section in road
-            if laneSection.idx + 1 >= len(newRoad.lanes.laneSections):
-                laneSection.length = newRoad.planView.getLength() - laneSection.sPos
 
-            # All but the last lane section end at the succeeding one
-            else:
-                laneSection.length = newRoad.lanes.laneSections[laneSection.idx + 1].sPos - laneSection.sPos
+    # OpenDrive does not provide lane section lengths by itself, calculate them by ourselves
+    for laneSection in newRoad.lanes.laneSections:
 
-        # OpenDrive does not provide lane width lengths by itself, calculate them by ourselves
-        for laneSection in newRoad.lanes.laneSections:
-            for lane in laneSection.allLanes:
-                widthsPoses = np.array([x.sOffset for x in lane.widths] + [laneSection.length])
-                widthsLengths = widthsPoses[1:] - widthsPoses[:-1]
-                
-                for widthIdx, width in enumerate(lane.widths):
-                    width.length = widthsLengths[widthIdx]
+        # Last lane section in road
+        if laneSection.idx + 1 >= len(newRoad.lanes.laneSections):
+            laneSection.length = newRoad.planView.getLength() - laneSection.sPos
 
-        # Objects
-        # TODO
+        # All but the last lane section end at the succeeding one
+        else:
+            laneSection.length = newRoad.lanes.laneSections[laneSection.idx + 1].sPos - laneSection.sPos
 
-        # Signals
-        # TODO
+    # OpenDrive does not provide lane width lengths by itself, calculate them by ourselves
+    for laneSection in newRoad.lanes.laneSections:
+        for lane in laneSection.allLanes:
+            widthsPoses = np.array([x.sOffset for x in lane.widths] + [laneSection.length])
+            widthsLengths = widthsPoses[1:] - widthsPoses[:-1]
+            
+            for widthIdx, width in enumerate(lane.widths):
+                width.length = widthsLengths[widthIdx]
 
-        newOpenDrive.roads.append(newRoad)
+    # Objects
+    if road.find("objects") is not None:
 
-    return newOpenDrive
+        for roadObject in road.find("objects").findall("object"):
+
+            newObject = RoadObject()
+
+            parse_opendrive_road_object(roadObject, newObject)
+            newObject.hdg = roadObject.get("hdg")
+            newObject.length = roadObject.get("length")
+
+            if userDataSource is not None:
+                userDataSource.capture(roadObject, newObject, KNOWN_CHILD_TAGS["object"])
+
+            newRoad.objects.add(newObject)
+
+        if userDataSource is not None:
+            userDataSource.capture(road.find("objects"), newRoad, KNOWN_CHILD_TAGS["objects"])
+
+    # Signals
+    if road.find("signals") is not None:
+
+        for signal in road.find("signals").findall("signal"):
+
+            newSignal = RoadSignal()
+
+            parse_opendrive_road_object(signal, newSignal)
+            newSignal.hOffset = signal.get("hOffset")
+            newSignal.subtype = signal.get("subtype")
+            newSignal.country = signal.get("country")
+            newSignal.dynamic = signal.get("dynamic")
+            newSignal.value = signal.get("value")
+            newSignal.unit = signal.get("unit")
+
+            if userDataSource is not None:
+                userDataSource.capture(signal, newSignal, KNOWN_CHILD_TAGS["signal"])
+
+            newRoad.signals.add(newSignal)
+
+        for signalReference in road.find("signals").findall("signalReference"):
+
+            newSignalReference = RoadSignalReference()
+
+            newSignalReference.id = signalReference.get("id")
+            newSignalReference.sPos = signalReference.get("s")
+            newSignalReference.t = signalReference.get("t")
+            newSignalReference.orientation = signalReference.get("orientation")
+
+            for validity in signalReference.findall("validity"):
+                newSignalReference.addValidity(validity.get("fromLane"), validity.get("toLane"))
+
+            if userDataSource is not None:
+                userDataSource.capture(signalReference, newSignalReference, KNOWN_CHILD_TAGS["signalReference"])
+
+            newRoad.signals.add(newSignalReference)
+
+        if userDataSource is not None:
+            userDataSource.capture(road.find("signals"), newRoad, KNOWN_CHILD_TAGS["signals"])
+
+    if userDataSource is not None:
+        userDataSource.capture(road, newRoad, KNOWN_CHILD_TAGS["road"])
+
+    return newRoad
+
+
+def parse_opendrive_road_object(roadObject, newObject):
+    """ Parse the attributes common to objects and signals """
+
+    newObject.id = roadObject.get("id")
+    newObject.name = roadObject.get("name")
+    newObject.type = roadObject.get("type")
+    newObject.sPos = roadObject.get("s")
+    newObject.t = roadObject.get("t")
+    newObject.zOffset = roadObject.get("zOffset")
+    newObject.orientation = roadObject.get("orientation")
+    newObject.height = roadObject.get("height")
+    newObject.width = roadObject.get("width")
+
+    for validity in roadObject.findall("validity"):
+        newObject.addValidity(validity.get("fromLane"), validity.get("toLane"))
@@ -0,0 +1,228 @@
+"""
+Stage-level timing and counters for the processing pipeline.
+
+The pipeline stages (loading, parsing, reference point sampling, lane areas, export, plotting) are wrapped in named
+spans of the global profiler. It is disabled by default; a disabled span is one shared no-op object, so the
+instrumentation costs an attribute lookup per stage and nothing per point. Enable it in code or by setting the
+environment variable XODR_PROFILE=1.
+
+Usage:
+    from opendriveparser import profiling
+    profiling.enable()
+    total_areas = get_all_lanes(load_xodr_and_parse(file))
+    print(profiling.format_summary())
+    profiling.write_chrome_trace("trace.json")  # Open in chrome://tracing or https://ui.perfetto.dev
+
+    with profiling.span("my_stage"):
+        profiling.count("roads", len(roads))
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+
+
+class _NullSpan:
+    """ Span of the disabled profiler. """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """ One timed run of a named stage, recorded by the profiler on exit. """
+    __slots__ = ("profiler", "name", "start", "depth")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = None
+        self.depth = 0
+
+    def __enter__(self):
+        local = self.profiler._local
+        self.depth = getattr(local, "depth", 0)
+        local.depth = self.depth + 1
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        end = time.perf_counter()
+        self.profiler._local.depth = self.depth
+        self.profiler._record(self.name, self.start, end - self.start, self.depth)
+        return False
+
+
+class Profiler:
+    """
+    Collects spans (name, start, duration, nesting depth, thread) and named counters.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.events = []
+        self.counters = dict()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        """ Drop all recorded spans and counters. """
+        with self._lock:
+            self.events = []
+            self.counters = dict()
+            self._origin = time.perf_counter()
+
+    def span(self, name):
+        """
+        Context manager timing one run of a stage.
+        :param name: Name of the stage.
+        :return: Span, or a no-op span if the profiler is disabled.
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name)
+
+    def count(self, name, value=1):
+        """ Add value to a named counter. """
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def _record(self, name, start, duration, depth):
+        with self._lock:
+            self.events.append((name, start - self._origin, duration, depth, threading.get_ident()))
+
+    def summary(self):
+        """
+        Aggregate the spans by name, in order of their first start.
+        :return: List of dictionaries with name, depth, calls, total, mean and max (seconds).
+        """
+        rows = dict()
+        for name, _, duration, depth, _ in sorted(self.events, key=lambda event: event[1]):
+            row = rows.get(name)
+            if row is None:
+                row = rows[name] = {"name": name, "depth": depth, "calls": 0, "total": 0.0, "max": 0.0}
+            row["calls"] += 1
+            row["total"] += duration
+            row["max"] = max(row["max"], duration)
+            row["depth"] = min(row["depth"], depth)
+        for row in rows.values():
+            row["mean"] = row["total"] / row["calls"]
+        return list(rows.values())
+
+    def format_summary(self):
+        """ Summary table of the spans (indented by nesting depth) followed by the counters. """
+        lines = ["{:<40} {:>8} {:>11} {:>11} {:>11}".format("span", "calls", "total [s]", "mean [ms]", "max [ms]")]
+        for row in self.summary():
+            lines.append("{:<40} {:>8} {:>11.4f} {:>11.3f} {:>11.3f}".format(
+                "  " * row["depth"] + row["name"], row["calls"], row["total"], row["mean"] * 1e3, row["max"] * 1e3))
+        if self.counters:
+            lines.append("")
+            lines.append("{:<40} {:>8}".format("counter", "value"))
+            for name, value in self.counters.items():
+                lines.append("{:<40} {:>8}".format(name, value))
+        return "\n".join(lines)
+
+    def to_chrome_trace(self):
+        """
+        Spans as complete ("X") events and counters as one counter ("C") event in the Chrome trace event format.
+        :return: Dictionary, see https://docs.google.com/document/d/1CvAClvFfyA5R-PhYUmn5OOQtYMH4h6I0nSsKchNAySU
+        """
+        pid = os.getpid()
+        events = [{"name": name, "ph": "X", "ts": start * 1e6, "dur": duration * 1e6, "pid": pid, "tid": tid}
+                  for name, start, duration, _, tid in self.events]
+        if self.counters:
+            end = max((start + duration for _, start, duration, _, _ in self.events), default=0.0)
+            events.append({"name": "counters", "ph": "C", "ts": end * 1e6, "pid": pid, "tid": 0,
+                           "args": dict(self.counters)})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, file):
+        """
+        Write the trace as json.
+        :param file: Path or writable text file object.
+        """
+        if hasattr(file, "write"):
+            json.dump(self.to_chrome_trace(), file)
+        else:
+            with open(file, "w") as fh:
+                json.dump(self.to_chrome_trace(), fh)
+
+
+PROFILER = Profiler(enabled=os.environ.get("XODR_PROFILE", "") not in ("", "0"))
+
+
+def enable():
+    PROFILER.enable()
+
+
+def disable():
+    PROFILER.disable()
+
+
+def reset():
+    PROFILER.reset()
+
+
+def is_enabled():
+    return PROFILER.enabled
+
+
+def span(name):
+    """ Span of the global profiler, see "Profiler.span". """
+    if not PROFILER.enabled:
+        return _NULL_SPAN
+    return Span(PROFILER, name)
+
+
+def count(name, value=1):
+    """ Add value to a counter of the global profiler. """
+    if PROFILER.enabled:
+        PROFILER.count(name, value)
+
+
+def profiled(name=None):
+    """
+    Decorator wrapping every call of a function in a span.
+    :param name: Span name, defaults to the function name.
+    """
+    def decorator(function):
+        span_name = name or function.__name__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not PROFILER.enabled:
+                return function(*args, **kwargs)
+            with Span(PROFILER, span_name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def summary():
+    return PROFILER.summary()
+
+
+def format_summary():
+    return PROFILER.format_summary()
+
+
+def write_chrome_trace(file):
+    PROFILER.write_chrome_trace(file)
@@ -4,10 +4,10 @@
 
 import os
 
-from lxml import etree
-from tqdm import tqdm
+import numpy as np
 
-from opendriveparser import parse_opendrive
+from opendriveparser import parse_opendrive, profiling
+from lane_geometry_cache import LANE_GEOMETRY_CACHE
 from math import pi, sin, cos
 
 # Prepare the input file.
@@ -51,15 +51,27 @@ COLOR_REFERECE_LINE = "#0000EE"
 # STEP = 0.1
 STEP = 2
 
-def load_xodr_and_parse(file=XODR_FILE):
+@profiling.profiled()
+def load_xodr_and_parse(file=XODR_FILE, user_data=False):
     """
     Load and parse .xodr file.
     :param file:
+    :param user_data: Keep <userData> and vendor elements as byte spans into the file content, see "Road.userData".
     :return:
     """
+    from lxml import etree
+
+    if user_data:
+        with open(file, 'rb') as fh:
+            source = fh.read()
+        with profiling.span("xml_parse"):
+            root_node = etree.fromstring(source, etree.XMLParser(huge_tree=True))
+        return parse_opendrive(root_node, source=source)
+
     with open(file, 'r') as fh:
         parser = etree.XMLParser()
-        root_node = etree.parse(fh, parser).getroot()
+        with profiling.span("xml_parse"):
+            root_node = etree.parse(fh, parser).getroot()
         road_network = parse_opendrive(root_node)
     return road_network
 
@@ -135,7 +147,7 @@ def get_all_reference_points_of_one_road(geometries, step=0.01):
 
 def get_width(widths, s):
     assert isinstance(widths, list), TypeError(type(widths))
-    widths.sort(key=lambda x: x.sOffset)
+    widths = sorted(widths, key=lambda x: x.sOffset)
     current_width = None
     # EPS = 1e-5
     milestones = [width.sOffset for width in widths] + [float("inf")]
@@ -153,7 +165,7 @@ def get_lane_offset(lane_offsets, section_s, length=float("inf")):
     assert isinstance(lane_offsets, list), TypeError(type(lane_offsets))
     if not lane_offsets:
         return 0
-    lane_offsets.sort(key=lambda x: x.sPos)
+    lane_offsets = sorted(lane_offsets, key=lambda x: x.sPos)
     current_offset = 0
     EPS = 1e-5
     milestones = [lane_offset.sPos for lane_offset in lane_offsets] + [length + EPS]
@@ -190,6 +202,28 @@ class LaneOffsetCalculate:
         return 0
 
 
+def get_lane_attributes_of_section(lane_section, s_lane_section):
+    """
+    Evaluate the width, road mark and speed tables of every lane of one section at many positions at once.
+    :param lane_section:
+    :param s_lane_section: Positions relative to the start of the lane section.
+    :return: {lane id: {"width", "road_mark_type", "road_mark_color", "road_mark_width", "max_speed"}}, one array
+        entry per position. Road mark type / color are codes, see "LaneRoadMarks.decode". Speeds are in m/s.
+    """
+    s_lane_section = np.asarray(s_lane_section, dtype=np.float64)
+    res = dict()
+    for lane in lane_section.allLanes:
+        road_marks = lane.roadMarks
+        res[lane.id] = {
+            "width": lane.getWidths(s_lane_section),
+            "road_mark_type": road_marks.valuesAt("type", s_lane_section),
+            "road_mark_color": road_marks.valuesAt("color", s_lane_section),
+            "road_mark_width": road_marks.valuesAt("width", s_lane_section),
+            "max_speed": lane.speeds.maxSpeedAt(s_lane_section),
+        }
+    return res
+
+
 def calculate_area_of_one_left_lane(left_lane, points, most_left_points):
     inner_points = most_left_points[:]
 
@@ -394,61 +428,145 @@ def get_lane_area_of_one_road(road, step=0.01):
     lane_sections = road.lanes.laneSections
     lane_sections = list(sorted(lane_sections, key=lambda x: x.sPos))  # Sort the lane sections by start position.
 
-    reference_points = get_all_reference_points_of_one_road(geometries, step=step)  # Extract the reference points.
+    with profiling.span("reference_points"):
+        reference_points = get_all_reference_points_of_one_road(geometries, step=step)  # Extract the reference points.
 
-    # Calculate the offsets of center lane.
-    reference_points = [{**point, "lane_offset": lane_offset_calculate.calculate_offset(point["s_road"])}
-                        for point in reference_points]
+        # Calculate the offsets of center lane.
+        reference_points = [{**point, "lane_offset": lane_offset_calculate.calculate_offset(point["s_road"])}
+                            for point in reference_points]
 
-    # Calculate the points of center lane based on reference points and offsets.
-    reference_points = calculate_points_of_reference_line_of_one_section(reference_points)
+        # Calculate the points of center lane based on reference points and offsets.
+        reference_points = calculate_points_of_reference_line_of_one_section(reference_points)
 
-    # Calculate the distance of each point starting from the current section along the direction of the reference line.
-    reference_points = calculate_s_lane_section(reference_points, lane_sections)
+        # Calculate the distance of each point starting from the current section along the direction of the reference line.
+        reference_points = calculate_s_lane_section(reference_points, lane_sections)
 
-    total_areas = dict()
-    for lane_section in lane_sections:
-        section_start = lane_section.sPos  # Start position of the section in current road.
-        section_end = lane_section.sPos + lane_section.length  # End position of the section in current road.
+    with profiling.span("lane_areas"):
+        total_areas = dict()
+        for lane_section in lane_sections:
+            section_start = lane_section.sPos  # Start position of the section in current road.
+            section_end = lane_section.sPos + lane_section.length  # End position of the section in current road.
 
-        # Filter out the points belonging to current lane section.
-        current_reference_points = list(filter(lambda x: section_start <= x["s_road"] < section_end, reference_points))
+            # Filter out the points belonging to current lane section.
+            current_reference_points = list(filter(lambda x: section_start <= x["s_road"] < section_end, reference_points))
 
-        # Calculate the boundary point of every lane in current lane section.
-        area = calculate_lane_area_within_one_lane_section(lane_section, current_reference_points)
-        left_lanes_area, right_lanes_area, most_left_points, most_right_points = area
+            # Calculate the boundary point of every lane in current lane section.
+            area = calculate_lane_area_within_one_lane_section(lane_section, current_reference_points)
+            left_lanes_area, right_lanes_area, most_left_points, most_right_points = area
 
-        # Extract types and indexes.
-        types = {lane.id: lane.type for lane in lane_section.allLanes if lane.id != 0}
-        index = (road.id, lane_section.idx)
+            # Extract types and indexes.
+            types = {lane.id: lane.type for lane in lane_section.allLanes if lane.id != 0}
+            index = (road.id, lane_section.idx)
 
-        # Convert dict list to list dict of the reference points information.
-        uncompressed_lane_section_data = uncompress_dict_list(current_reference_points)
+            # Convert dict list to list dict of the reference points information.
+            uncompressed_lane_section_data = uncompress_dict_list(current_reference_points)
 
-        # Integrate all the information of current lane section of current road.
-        section_data = {
-            "left_lanes_area": left_lanes_area,
-            "right_lanes_area": right_lanes_area,
-            "most_left_points": most_left_points,
-            "most_right_points": most_right_points,
-            "types": types,
-            "reference_points": uncompressed_lane_section_data,  # 这些是lane section的信息
-        }
+            # Integrate all the information of current lane section of current road.
+            section_data = {
+                "left_lanes_area": left_lanes_area,
+                "right_lanes_area": right_lanes_area,
+                "most_left_points": most_left_points,
+                "most_right_points": most_right_points,
+                "types": types,
+                "reference_points": uncompressed_lane_section_data,  # 这些是lane section的信息
+            }
+
+            # Get all lane lines with their left and right lanes.
+            lane_line = get_lane_line(section_data)
+            section_data.update(lane_line)
 
-        # Get all lane lines with their left and right lanes.
-        lane_line = get_lane_line(section_data)
-        section_data.update(lane_line)
+            total_areas[index] = section_data
 
-        total_areas[index] = section_data
+    if profiling.is_enabled():
+        profiling.count("reference_points", len(reference_points))
+        profiling.count("lane_sections", len(lane_sections))
+        profiling.count("lanes", sum(len(section_data["types"]) for section_data in total_areas.values()))
 
     return total_areas
 
 
-def get_all_lanes(road_network, step=0.1):
+def points_to_array(points):
+    """
+    Convert a list of (x, y) points to a read-only float array of shape (n, 2).
+    :param points:
+    :return:
+    """
+    array = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    array.setflags(write=False)
+    return array
+
+
+def section_data_to_arrays(section_data):
+    """
+    Convert the section data of "get_lane_area_of_one_road" to array form, i.e. every list of boundary points becomes
+    an (n, 2) array and every reference point attribute becomes an array. The inner boundary of a lane shares its array
+    with the outer boundary of the neighbouring inner lane.
+    :param section_data:
+    :return: Section data with the same keys.
+    """
+    res = dict(section_data)
+
+    for side, most_key in (("left_lanes_area", "most_left_points"), ("right_lanes_area", "most_right_points")):
+        lanes_area = dict()
+        previous_outer = None
+        for lane_id, lane_area in section_data[side].items():
+            inner = previous_outer if previous_outer is not None else points_to_array(lane_area["inner"])
+            outer = points_to_array(lane_area["outer"])
+            lanes_area[lane_id] = {**lane_area, "inner": inner, "outer": outer}
+            previous_outer = outer
+        res[side] = lanes_area
+        res[most_key] = previous_outer if previous_outer is not None else points_to_array(section_data[most_key])
+
+    reference_points = dict()
+    for k, v in section_data["reference_points"].items():
+        array = points_to_array(v) if k.startswith("position") else np.asarray(v)
+        array.setflags(write=False)
+        reference_points[k] = array
+    res["reference_points"] = reference_points
+
+    lane_line = get_lane_line(res)
+    res.update(lane_line)
+    return res
+
+
+def get_lane_area_of_one_road_cached(road, step=0.01, cache=None, namespace=None):
+    """
+    Same as "get_lane_area_of_one_road" but the sections are looked up in (and stored to) a lane geometry cache.
+    :param road:
+    :param step:
+    :param cache: LaneGeometryCache, the process-wide cache by default.
+    :param namespace: Distinguishes roads with equal ids of different networks, e.g. the file path.
+    :return: A dictionary of array-form section data: {(road id, lane section id): section data}
+    """
+    if cache is None:
+        cache = LANE_GEOMETRY_CACHE
+
+    res = dict()
+    for lane_section in road.lanes.laneSections:
+        section_data = cache.get((namespace, road.id, step, lane_section.idx))
+        if section_data is None:
+            break
+        res[(road.id, lane_section.idx)] = section_data
+    else:
+        return res
+
+    res = dict()
+    for index, section_data in get_lane_area_of_one_road(road, step=step).items():
+        section_data = section_data_to_arrays(section_data)
+        cache.put((namespace, road.id, step, index[1]), section_data)
+        res[index] = section_data
+    return res
+
+
+@profiling.profiled()
+def get_all_lanes(road_network, step=0.1, cache=None, namespace=None, progress=True):
     """
     Get all lanes of one road network.
     :param road_network: Parsed road network.
     :param step: Step of calculation.
+    :param cache: Optional LaneGeometryCache. If given, the sections are served from the cache in array form.
+    :param namespace: Cache namespace of the road network, e.g. the file path.
+    :param progress: Show a progress bar.
     :return: Dictionary with the following format:
         keys: (road id, lane section id)
         values: dict(left_lanes_area, right_lanes_area, most_left_points, most_right_points, types, reference_points)
@@ -456,9 +574,16 @@ def get_all_lanes(road_network, step=0.1):
     roads = road_network.roads
     total_areas_all_roads = dict()
 
-    for road in tqdm(roads, desc="Calculating boundary points."):
-        lanes_of_one_road = get_lane_area_of_one_road(road, step=step)
-        total_areas_all_roads = {**total_areas_all_roads, **lanes_of_one_road}
+    if progress:
+        from tqdm import tqdm
+        roads = tqdm(roads, desc="Calculating boundary points.")
+
+    for road in roads:
+        if cache is None:
+            lanes_of_one_road = get_lane_area_of_one_road(road, step=step)
+        else:
+            lanes_of_one_road = get_lane_area_of_one_road_cached(road, step=step, cache=cache, namespace=namespace)
+        total_areas_all_roads.update(lanes_of_one_road)
 
     return total_areas_all_roads
 
@@ -492,110 +617,96 @@ def rescale_color(hex_color, rate=0.5):
     return new_hex_color
 
 
-def plot_planes_of_roads(total_areas, save_folder):
+def iterate_lane_areas(section_data):
     """
-    Plot the roads.
-    :param total_areas:
-    :param save_folder:
-    :return:
+    Iterate over all lanes of one section.
+    :param section_data: Section data of "get_lane_area_of_one_road", in list or array form.
+    :return: Generator of (lane id, lane type, inner points, outer points).
     """
+    types = section_data["types"]
+    for lanes_area in (section_data["left_lanes_area"], section_data["right_lanes_area"]):
+        for lane_id, lane_area in lanes_area.items():
+            inner_points = np.asarray(lane_area["inner"], dtype=np.float64).reshape(-1, 2)
+            outer_points = np.asarray(lane_area["outer"], dtype=np.float64).reshape(-1, 2)
+            yield lane_id, types[lane_id], inner_points, outer_points
 
-    import matplotlib.pyplot as plt
-    plt.cla()
-
-    plt.figure(figsize=(160, 90))
-    area_select = 10  # select one from 10 boundary points for accelerating.
-
-    all_types = set()
 
-    # Plot lane area.
+def gather_lane_geometry(total_areas):
     """
-    for k, v in tqdm(total_areas.items(), desc="Ploting Roads"):
-        left_lanes_area = v["left_lanes_area"]
-        right_lanes_area = v["right_lanes_area"]
-
-        types = v["types"]
-
-        for left_lane_id, left_lane_area in left_lanes_area.items():
-            type_of_lane = types[left_lane_id]
-            all_types.add(type_of_lane)
-            lane_color = TYPE_COLOR_DICT[type_of_lane]
-            inner_points = left_lane_area["inner"]
-            outer_points = left_lane_area["outer"]
-
-            points_of_one_road = inner_points + outer_points[::-1]
-            xs = [i for i, _ in points_of_one_road]
-            ys = [i for _, i in points_of_one_road]
-            plt.fill(xs, ys, color=lane_color, label=type_of_lane)
-            plt.scatter(xs[::area_select], ys[::area_select], color=rescale_color(lane_color, 0.5), s=1)
-
-        for right_lane_id, right_lane_area in right_lanes_area.items():
-            type_of_lane = types[right_lane_id]
-            all_types.add(type_of_lane)
-
-            lane_color = TYPE_COLOR_DICT[type_of_lane]
-            inner_points = right_lane_area["inner"]
-            outer_points = right_lane_area["outer"]
-
-            points_of_one_road = inner_points + outer_points[::-1]
-            xs = [i for i, _ in points_of_one_road]
-            ys = [i for _, i in points_of_one_road]
-            plt.fill(xs, ys, color=lane_color, label=type_of_lane)
-            plt.scatter(xs[::area_select], ys[::area_select], color=rescale_color(lane_color, 0.5), s=1)
+    Gather the lane polygons and lines of all sections, grouped by color, for batched rendering.
+    :param total_areas: Result of "get_all_lanes".
+    :return: Dictionary with
+        polygons: {fill color: [polygon array]}
+        boundaries: {edge color: [polyline array]}
+        center_lanes: [polyline array]
+        reference_lines: [polyline array]
+        types: set of lane types
     """
-    # Plot boundaries
-    for k, v in tqdm(total_areas.items(), desc="Ploting Edges"):
-        left_lanes_area = v["left_lanes_area"]
-        right_lanes_area = v["right_lanes_area"]
+    polygons = dict()
+    boundaries = dict()
+    center_lanes = []
+    reference_lines = []
+    all_types = set()
 
-        types = v["types"]
-        for left_lane_id, left_lane_area in left_lanes_area.items():
-            type_of_lane = types[left_lane_id]
+    for k, v in total_areas.items():
+        for lane_id, type_of_lane, inner_points, outer_points in iterate_lane_areas(v):
+            if len(inner_points) < 2:
+                continue
             all_types.add(type_of_lane)
-            lane_color = TYPE_COLOR_DICT[type_of_lane]
-            inner_points = left_lane_area["inner"]
-            outer_points = left_lane_area["outer"]
-            points_of_one_road = inner_points + outer_points[::-1]
-            xs = [i for i, _ in points_of_one_road]
-            ys = [i for _, i in points_of_one_road]
-            plt.plot(xs,ys)
-            plt.show()
-            plt.scatter(xs[::area_select], ys[::area_select], color=rescale_color(lane_color, 0.5), s=1)
-
-        for right_lane_id, right_lane_area in right_lanes_area.items():
-            type_of_lane = types[right_lane_id]
-            all_types.add(type_of_lane)
-            lane_color = TYPE_COLOR_DICT[type_of_lane]
-            inner_points = right_lane_area["inner"]
-            outer_points = right_lane_area["outer"]
-            points_of_one_road = inner_points + outer_points[::-1]
-            xs = [i for i, _ in points_of_one_road]
-            ys = [i for _, i in points_of_one_road]
-            plt.scatter(xs[::area_select], ys[::area_select], color=rescale_color(lane_color, 0.5), s=1)
-
-    # Plot center lane and reference line.
-    """
-    saved_ceter_lanes = dict()
-    for k, v in tqdm(total_areas.items(), desc="Ploting Reference and center"):
+            lane_color = TYPE_COLOR_DICT.get(type_of_lane, TYPE_COLOR_DICT["none"])  # e.g. "special1" has no color.
+            polygons.setdefault(lane_color, []).append(np.concatenate([inner_points, outer_points[::-1]]))
+            boundaries.setdefault(rescale_color(lane_color, 0.5), []).append(outer_points)
 
         reference_points = v["reference_points"]
-        if not reference_points:
-            continue
-        position_reference_points = reference_points["position"]
-        position_center_lane = reference_points["position_center_lane"]
+        if len(reference_points.get("position", [])) >= 2:
+            reference_lines.append(np.asarray(reference_points["position"], dtype=np.float64))
+            center_lanes.append(np.asarray(reference_points["position_center_lane"], dtype=np.float64))
+
+    return {
+        "polygons": polygons,
+        "boundaries": boundaries,
+        "center_lanes": center_lanes,
+        "reference_lines": reference_lines,
+        "types": all_types,
+    }
 
-        position_reference_points_xs = [x for x, y in position_reference_points]
-        position_reference_points_ys = [y for x, y in position_reference_points]
-        position_center_lane_xs = [x for x, y in position_center_lane]
-        position_center_lane_ys = [y for x, y in position_center_lane]
 
-        saved_ceter_lanes[k] = position_center_lane
-        plt.scatter(position_reference_points_xs, position_reference_points_ys, color=COLOR_REFERECE_LINE, s=3)
-        plt.scatter(position_center_lane_xs, position_center_lane_ys, color=COLOR_CENTER_LANE, s=2)
+@profiling.profiled("plot")
+def plot_planes_of_roads(total_areas, save_folder, show=False):
+    """
+    Plot the roads. All lanes are drawn with a few PolyCollection / LineCollection artists, one per color, so the
+    number of draw calls does not grow with the size of the map.
+    :param total_areas:
+    :param save_folder:
+    :param show: Show the figure after saving it.
+    :return:
     """
+
     import matplotlib.pyplot as plt
+    from matplotlib.collections import LineCollection, PolyCollection
     from matplotlib.patches import Patch
 
+    plt.cla()
+
+    plt.figure(figsize=(160, 90))
+    ax = plt.gca()
+
+    geometry = gather_lane_geometry(total_areas)
+    all_types = geometry["types"]
+
+    # Plot lane areas.
+    for lane_color, polygons in geometry["polygons"].items():
+        ax.add_collection(PolyCollection(polygons, facecolors=lane_color, edgecolors="none"))
+
+    # Plot boundaries.
+    for edge_color, lines in geometry["boundaries"].items():
+        ax.add_collection(LineCollection(lines, colors=edge_color, linewidths=0.5))
+
+    # Plot center lane and reference line.
+    ax.add_collection(LineCollection(geometry["reference_lines"], colors=COLOR_REFERECE_LINE, linewidths=0.5))
+    ax.add_collection(LineCollection(geometry["center_lanes"], colors=COLOR_CENTER_LANE, linewidths=0.5))
+    ax.autoscale_view()
+
     # Create legend.
     legend_dict = {
         # k: Patch(facecolor=v, edgecolor=v, alpha=0.3) for k, v in type_color_dict.items() if k in all_types
@@ -612,18 +723,22 @@ def plot_planes_of_roads(total_areas, save_folder):
     plt.xlabel("x")
     plt.ylabel("y")
     plt.axis("equal")
-    plt.show()
 
     os.makedirs(save_folder, exist_ok=True)
     save_pdf_file = os.path.join(save_folder, "lanes.pdf")
     plt.savefig(save_pdf_file)
+    if show:
+        plt.show()
+    plt.close()
 
 
-def process_one_file(file, step=0.1):
+def process_one_file(file, step=0.1, simplify_tolerance=None, profile=False):
     """
     Load one .xodr file and calculate the railing positions with other important messages.
     :param file: Input file.
     :param step: Step of calculation.
+    :param simplify_tolerance: If given, simplify the lane boundaries with this error in metres before output.
+    :param profile: Time the stages, print a summary and write a Chrome trace "profile.json" next to the plot.
     :return: None
     """
 
@@ -632,11 +747,25 @@ def process_one_file(file, step=0.1):
     n, e = os.path.splitext(ne)
     save_folder = os.path.join(d, n)
 
+    if profile:
+        profiling.reset()
+        profiling.enable()
+
     road_network = load_xodr_and_parse(file)
     total_areas = get_all_lanes(road_network, step=step)
 
+    if simplify_tolerance:
+        from simplify_polylines import simplify_total_areas, summarize_report
+        total_areas, report = simplify_total_areas(total_areas, simplify_tolerance)
+        print(summarize_report(report))
+
     plot_planes_of_roads(total_areas, save_folder)
 
+    if profile:
+        profiling.disable()
+        print(profiling.format_summary())
+        profiling.write_chrome_trace(os.path.join(save_folder, "profile.json"))
+
 
 def main():
     process_one_file(file=XODR_FILE)
@@ -0,0 +1,178 @@
+"""
+Headless rasterizer of lane polygons.
+
+Lane polygons are scan-converted straight into a NumPy RGBA buffer (even-odd rule, sampled at pixel centers) and
+written as PNG without matplotlib. All polygons of one color are filled in a single vectorized pass: every edge is
+intersected with the scanlines it crosses, the intersections are sorted and paired into spans, and the spans are
+accumulated into a coverage mask. Optional supersampling with box downsampling gives anti-aliased edges.
+
+Usage:
+    python rasterize.py Export20241128.xodr --output lanes.png --size 4096 --supersample 2
+"""
+
+import argparse
+import struct
+import time
+import zlib
+
+import numpy as np
+
+from parse_and_visualize import STEP, gather_lane_geometry, get_all_lanes, load_xodr_and_parse
+from simplify_polylines import simplify_total_areas, summarize_report
+
+
+def hex_to_rgba(hex_color, alpha=255):
+    return int(hex_color[1:3], 16), int(hex_color[3:5], 16), int(hex_color[5:7], 16), alpha
+
+
+def fill_polygons_mask(polygons, height, width):
+    """
+    Rasterize polygons given in pixel coordinates into a boolean coverage mask.
+    :param polygons: List of arrays of shape (n, 2) with columns (column, row).
+    :param height:
+    :param width:
+    :return: Boolean array of shape (height, width).
+    """
+    polygons = [polygon for polygon in polygons if len(polygon) >= 3]
+    if not polygons:
+        return np.zeros((height, width), dtype=bool)
+
+    lengths = np.array([len(polygon) for polygon in polygons])
+    points = np.concatenate(polygons)
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    polygon_ids = np.repeat(np.arange(len(polygons)), lengths)
+
+    # Edges from every vertex to the next one, closing every polygon.
+    next_index = np.arange(len(points)) + 1
+    next_index[starts + lengths - 1] = starts
+    x0, y0 = points[:, 0], points[:, 1]
+    x1, y1 = points[next_index, 0], points[next_index, 1]
+
+    # Scanlines at the pixel centers r + 0.5 crossed by every edge, half-open in y.
+    row_start = np.clip(np.ceil(np.minimum(y0, y1) - 0.5), 0, height).astype(np.int64)
+    row_end = np.clip(np.ceil(np.maximum(y0, y1) - 0.5), 0, height).astype(np.int64)
+    counts = row_end - row_start
+    crossing = counts > 0
+    if not crossing.any():
+        return np.zeros((height, width), dtype=bool)
+    x0, y0, x1, y1 = x0[crossing], y0[crossing], x1[crossing], y1[crossing]
+    row_start, counts, edge_polygon_ids = row_start[crossing], counts[crossing], polygon_ids[crossing]
+
+    edge_index = np.repeat(np.arange(len(counts)), counts)
+    offsets = np.arange(len(edge_index)) - np.repeat(np.cumsum(counts) - counts, counts)
+    rows = row_start[edge_index] + offsets
+    y_center = rows + 0.5
+    xs = x0[edge_index] + (y_center - y0[edge_index]) * (x1[edge_index] - x0[edge_index]) / (
+            y1[edge_index] - y0[edge_index])
+    ids = edge_polygon_ids[edge_index]
+
+    # Sort the intersections by polygon, row and x and pair them into spans.
+    order = np.lexsort((xs, rows, ids))
+    rows, xs = rows[order], xs[order]
+    span_rows = rows[0::2]
+    span_start = np.clip(np.ceil(xs[0::2] - 0.5), 0, width).astype(np.int64)
+    span_end = np.clip(np.ceil(xs[1::2] - 0.5), 0, width).astype(np.int64)
+    valid = span_end > span_start
+    span_rows, span_start, span_end = span_rows[valid], span_start[valid], span_end[valid]
+
+    # Accumulate +1 at the span starts and -1 at the span ends of every row.
+    diff = np.bincount(span_rows * (width + 1) + span_start, minlength=height * (width + 1))
+    diff -= np.bincount(span_rows * (width + 1) + span_end, minlength=height * (width + 1))
+    coverage = np.cumsum(diff.reshape(height, width + 1), axis=1)[:, :width]
+    return coverage > 0
+
+
+def write_png(file, rgba):
+    """
+    Write an RGBA uint8 array of shape (height, width, 4) as PNG.
+    :param file:
+    :param rgba:
+    :return:
+    """
+    height, width, _ = rgba.shape
+    raw = np.zeros((height, width * 4 + 1), dtype=np.uint8)  # Filter type 0 at the start of every row.
+    raw[:, 1:] = rgba.reshape(height, width * 4)
+
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xffffffff)
+
+    with open(file, "wb") as fh:
+        fh.write(b"\x89PNG\r\n\x1a\n")
+        fh.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)))
+        fh.write(chunk(b"IDAT", zlib.compress(raw.tobytes(), 6)))
+        fh.write(chunk(b"IEND", b""))
+
+
+def rasterize_lanes(total_areas, size=2048, supersample=1, background=(255, 255, 255, 255), margin=0.02):
+    """
+    Rasterize the lane polygons of the "get_all_lanes" result, colored by lane type.
+    :param total_areas:
+    :param size: Length of the longer image side in pixels.
+    :param supersample: Render at this many times the resolution and box-downsample for anti-aliasing.
+    :param background: RGBA background color.
+    :param margin: Margin around the network as fraction of its size.
+    :return: RGBA uint8 array of shape (height, width, 4).
+    """
+    polygons = gather_lane_geometry(total_areas)["polygons"]
+    if not polygons:
+        raise ValueError("No lane polygons to rasterize.")
+
+    all_points = np.concatenate([np.concatenate(items) for items in polygons.values()])
+    xmin, ymin = all_points.min(axis=0)
+    xmax, ymax = all_points.max(axis=0)
+    span = max(xmax - xmin, ymax - ymin) * (1 + 2 * margin)
+    center_x, center_y = (xmin + xmax) / 2, (ymin + ymax) / 2
+    resolution = span / size  # Metres per output pixel.
+    width = max(1, int(np.ceil((xmax - xmin) * (1 + 2 * margin) / resolution)))
+    height = max(1, int(np.ceil((ymax - ymin) * (1 + 2 * margin) / resolution)))
+
+    scale = supersample / resolution
+    high_width, high_height = width * supersample, height * supersample
+    image = np.empty((high_height, high_width, 4), dtype=np.float32)
+    image[:] = background
+    image[..., :3] *= image[..., 3:] / 255  # Composite premultiplied colors so downsampling stays correct.
+
+    for lane_color, items in polygons.items():
+        pixel_polygons = [
+            np.column_stack([(polygon[:, 0] - center_x) * scale + high_width / 2,
+                             (center_y - polygon[:, 1]) * scale + high_height / 2])
+            for polygon in items
+        ]
+        mask = fill_polygons_mask(pixel_polygons, high_height, high_width)
+        image[mask] = hex_to_rgba(lane_color)
+
+    if supersample > 1:
+        image = image.reshape(height, supersample, width, supersample, 4).mean(axis=(1, 3))
+    alpha = image[..., 3:]
+    image[..., :3] = np.where(alpha > 0, image[..., :3] * 255 / np.maximum(alpha, 1e-9), 0)
+    return np.clip(np.round(image), 0, 255).astype(np.uint8)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rasterize the lanes of a .xodr file into a PNG image.")
+    parser.add_argument("file", help="Input .xodr file.")
+    parser.add_argument("--output", default=None, help="Output PNG file, <file name>.png by default.")
+    parser.add_argument("--step", type=float, default=STEP, help="Sample step of the reference lines.")
+    parser.add_argument("--size", type=int, default=2048, help="Length of the longer image side in pixels.")
+    parser.add_argument("--supersample", type=int, default=1, help="Anti-aliasing factor, e.g. 2 or 4.")
+    parser.add_argument("--transparent", action="store_true", help="Transparent instead of white background.")
+    parser.add_argument("--simplify", type=float, default=None, help="Simplify boundaries with this error in metres.")
+    args = parser.parse_args(argv)
+
+    output = args.output or args.file.rsplit(".", 1)[0] + ".png"
+    road_network = load_xodr_and_parse(args.file)
+    total_areas = get_all_lanes(road_network, step=args.step)
+    if args.simplify:
+        total_areas, report = simplify_total_areas(total_areas, args.simplify)
+        print(summarize_report(report))
+
+    start = time.perf_counter()
+    background = (0, 0, 0, 0) if args.transparent else (255, 255, 255, 255)
+    rgba = rasterize_lanes(total_areas, size=args.size, supersample=args.supersample, background=background)
+    write_png(output, rgba)
+    print("{}x{} image written to {} in {:.2f}s".format(rgba.shape[1], rgba.shape[0], output,
+                                                        time.perf_counter() - start))
+
+
+if __name__ == "__main__":
+    main()
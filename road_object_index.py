@@ -0,0 +1,163 @@
+"""
+Spatial index of the objects and signals of a road network.
+
+Every <object>, <signal> and <signalReference> is placed at its (s, t) position of the reference line of its road and stored in an
+implicit KD-tree, so radius and nearest queries take O(log n) plus the number of results. Queries along a road use
+the s-sorted arrays of "road.objects" / "road.signals" instead, e.g. "road.signals.ahead(s, 100, lane_id)".
+
+Usage:
+    index = RoadObjectIndex(road_network)
+    for road, signal, distance in index.within(x, y, 50, kind="signal"):
+        ...
+"""
+
+import heapq
+
+import numpy as np
+
+# Ranges of at most this many points are searched by brute force.
+LEAF_SIZE = 16
+
+
+def get_object_position(road, road_object):
+    """
+    Position of an object or signal in map coordinates.
+    :param road:
+    :param road_object: RoadObject or RoadSignal.
+    :return: (x, y)
+    """
+    s = min(max(road_object.sPos, 0.0), road.planView.getLength())
+    position, tangent = road.planView.calc(s)
+    return (position[0] - np.sin(tangent) * road_object.t,
+            position[1] + np.cos(tangent) * road_object.t)
+
+
+class KDTree:
+    """
+    Static 2D KD-tree stored as a permutation of the points: the median of every range [lo, hi) sits at its middle
+    and splits the range by x on even and by y on odd depths.
+    """
+
+    def __init__(self, points):
+        self.points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        self.order = np.arange(len(self.points))
+        stack = [(0, len(self.points), 0)]
+        while stack:
+            lo, hi, depth = stack.pop()
+            if hi - lo <= LEAF_SIZE:
+                continue
+            mid = (lo + hi) // 2
+            axis = depth % 2
+            segment = self.order[lo:hi]
+            self.order[lo:hi] = segment[np.argpartition(self.points[segment, axis], mid - lo)]
+            stack.append((lo, mid, depth + 1))
+            stack.append((mid + 1, hi, depth + 1))
+        self.sorted_points = self.points[self.order]
+
+    def __len__(self):
+        return len(self.points)
+
+    def query_radius(self, x, y, radius):
+        """
+        :return: (indexes of the points within radius, their distances), unsorted.
+        """
+        query = np.array([x, y], dtype=np.float64)
+        indexes = []
+        stack = [(0, len(self.points), 0)]
+        while stack:
+            lo, hi, depth = stack.pop()
+            if hi - lo <= LEAF_SIZE:
+                if hi > lo:
+                    distances = np.hypot(*(self.sorted_points[lo:hi] - query).T)
+                    indexes.append(lo + np.flatnonzero(distances <= radius))
+                continue
+            mid = (lo + hi) // 2
+            axis = depth % 2
+            delta = query[axis] - self.sorted_points[mid, axis]
+            if np.hypot(*(self.sorted_points[mid] - query)) <= radius:
+                indexes.append(np.array([mid]))
+            if delta <= radius:
+                stack.append((lo, mid, depth + 1))
+            if delta >= -radius:
+                stack.append((mid + 1, hi, depth + 1))
+
+        rows = np.concatenate(indexes) if indexes else np.zeros(0, dtype=np.int64)
+        return self.order[rows], np.hypot(*(self.sorted_points[rows] - query).T)
+
+    def query_nearest(self, x, y, k=1):
+        """
+        :return: (indexes of the k nearest points, their distances), nearest first.
+        """
+        query = np.array([x, y], dtype=np.float64)
+        best = []  # Max-heap of (-distance, row).
+        stack = [(0, len(self.points), 0)]
+        while stack:
+            lo, hi, depth = stack.pop()
+            if hi - lo <= LEAF_SIZE:
+                for row in range(lo, hi):
+                    distance = np.hypot(*(self.sorted_points[row] - query))
+                    if len(best) < k:
+                        heapq.heappush(best, (-distance, row))
+                    elif distance < -best[0][0]:
+                        heapq.heapreplace(best, (-distance, row))
+                continue
+            mid = (lo + hi) // 2
+            axis = depth % 2
+            distance = np.hypot(*(self.sorted_points[mid] - query))
+            if len(best) < k:
+                heapq.heappush(best, (-distance, mid))
+            elif distance < -best[0][0]:
+                heapq.heapreplace(best, (-distance, mid))
+            delta = query[axis] - self.sorted_points[mid, axis]
+            near, far = ((lo, mid), (mid + 1, hi)) if delta <= 0 else ((mid + 1, hi), (lo, mid))
+            # The far side is pushed first so the near side is searched first.
+            if len(best) < k or abs(delta) < -best[0][0]:
+                stack.append((*far, depth + 1))
+            stack.append((*near, depth + 1))
+
+        best.sort(reverse=True)
+        rows = np.array([row for _, row in best], dtype=np.int64)
+        return self.order[rows], np.array([-distance for distance, _ in best])
+
+
+class RoadObjectIndex:
+    """
+    Global spatial index of all objects and signals of a road network.
+    """
+
+    def __init__(self, road_network):
+        self.entries = []  # (road, object or signal, kind)
+        positions = []
+        for road in road_network.roads:
+            for kind, items in (("object", road.objects), ("signal", road.signals)):
+                for item in items:
+                    self.entries.append((road, item, kind))
+                    positions.append(get_object_position(road, item))
+        self.positions = np.array(positions, dtype=np.float64).reshape(-1, 2)
+        self.tree = KDTree(self.positions)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def within(self, x, y, radius, kind=None):
+        """
+        Objects and signals within radius of a point.
+        :param x:
+        :param y:
+        :param radius: In metres.
+        :param kind: "object", "signal" or None for both.
+        :return: List of (road, object or signal, distance), nearest first.
+        """
+        indexes, distances = self.tree.query_radius(x, y, radius)
+        order = np.argsort(distances, kind="stable")
+        return [(self.entries[i][0], self.entries[i][1], float(distance))
+                for i, distance in zip(indexes[order], distances[order])
+                if kind is None or self.entries[i][2] == kind]
+
+    def nearest(self, x, y, k=1):
+        """
+        The k nearest objects and signals of a point.
+        :return: List of (road, object or signal, distance), nearest first.
+        """
+        indexes, distances = self.tree.query_nearest(x, y, k)
+        return [(self.entries[i][0], self.entries[i][1], float(distance)) for i, distance in zip(indexes, distances)]
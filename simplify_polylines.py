@@ -0,0 +1,160 @@
+"""
+Polyline simplification of lane boundaries.
+
+The boundaries of "get_all_lanes" keep every sample of the fixed step. Before rendering or export they can be reduced
+with Douglas-Peucker (maximum perpendicular error in metres) or Visvalingam-Whyatt (the tolerance in metres is
+turned into an effective-area threshold of tolerance^2).
+"""
+
+import numpy as np
+
+from parse_and_visualize import get_lane_line
+
+
+def douglas_peucker_mask(points, tolerance):
+    """
+    Douglas-Peucker simplification. The distances of all points of a segment are calculated at once.
+    :param points: Array of shape (n, 2).
+    :param tolerance: Maximum distance of a removed point to the simplified polyline, in metres.
+    :return: Boolean mask of the kept points.
+    """
+    n = len(points)
+    keep = np.zeros(n, dtype=bool)
+    if n == 0:
+        return keep
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        start, end = points[first], points[last]
+        inner = points[first + 1:last]
+        dx, dy = end - start
+        chord = np.hypot(dx, dy)
+        if chord > 0:
+            distances = np.abs(dx * (inner[:, 1] - start[1]) - dy * (inner[:, 0] - start[0])) / chord
+        else:
+            distances = np.hypot(inner[:, 0] - start[0], inner[:, 1] - start[1])
+        index = int(np.argmax(distances))
+        if distances[index] > tolerance:
+            index += first + 1
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+    return keep
+
+
+def visvalingam_mask(points, tolerance):
+    """
+    Visvalingam-Whyatt simplification, batched: in every round every other point of each run of consecutive points
+    whose triangle area is below the threshold is removed at once, so no two neighbours go in the same round.
+    :param points: Array of shape (n, 2).
+    :param tolerance: In metres, the effective-area threshold is tolerance^2.
+    :return: Boolean mask of the kept points.
+    """
+    n = len(points)
+    indexes = np.arange(n)
+    threshold = tolerance ** 2
+    while len(indexes) > 2:
+        p = points[indexes]
+        areas = 0.5 * np.abs((p[1:-1, 0] - p[:-2, 0]) * (p[2:, 1] - p[:-2, 1])
+                             - (p[2:, 0] - p[:-2, 0]) * (p[1:-1, 1] - p[:-2, 1]))
+        candidates = areas < threshold
+        if not candidates.any():
+            break
+        run_starts = candidates & ~np.concatenate([[False], candidates[:-1]])
+        position = np.arange(len(candidates))
+        position_in_run = position - np.maximum.accumulate(np.where(run_starts, position, 0))
+        remove = candidates & (position_in_run % 2 == 0)
+        indexes = np.delete(indexes, np.flatnonzero(remove) + 1)
+    keep = np.zeros(n, dtype=bool)
+    keep[indexes] = True
+    return keep
+
+
+SIMPLIFY_METHODS = {
+    "douglas_peucker": douglas_peucker_mask,
+    "visvalingam": visvalingam_mask,
+}
+
+
+def simplify_polyline(points, tolerance, method="douglas_peucker"):
+    """
+    Simplify one polyline. Lists of (x, y) tuples stay lists, arrays stay arrays.
+    :param points: List of (x, y) or array of shape (n, 2).
+    :param tolerance: In metres.
+    :param method: "douglas_peucker" or "visvalingam".
+    :return: Simplified polyline of the same kind.
+    """
+    array = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    if len(array) <= 2 or tolerance <= 0:
+        return points
+    simplified = array[SIMPLIFY_METHODS[method](array, tolerance)]
+    if isinstance(points, np.ndarray):
+        return simplified
+    return [tuple(point) for point in simplified.tolist()]
+
+
+def simplify_section_data(section_data, tolerance, method="douglas_peucker"):
+    """
+    Simplify all lane boundaries of one section. A shared boundary is simplified once and reused by both lanes.
+    :param section_data: Section data of "get_lane_area_of_one_road", in list or array form.
+    :param tolerance: In metres.
+    :param method: "douglas_peucker" or "visvalingam".
+    :return: (simplified section data, number of boundary points before, number after)
+    """
+    res = dict(section_data)
+    before = 0
+    after = 0
+    for side, most_key in (("left_lanes_area", "most_left_points"), ("right_lanes_area", "most_right_points")):
+        lanes_area = dict()
+        previous_outer = None
+        for lane_id, lane_area in section_data[side].items():
+            if previous_outer is None:
+                inner = simplify_polyline(lane_area["inner"], tolerance, method)
+                before += len(lane_area["inner"])
+                after += len(inner)
+            else:
+                inner = previous_outer
+            outer = simplify_polyline(lane_area["outer"], tolerance, method)
+            before += len(lane_area["outer"])
+            after += len(outer)
+            lanes_area[lane_id] = {**lane_area, "inner": inner, "outer": outer}
+            if "middle" in lane_area:
+                lanes_area[lane_id]["middle"] = simplify_polyline(lane_area["middle"], tolerance, method)
+            previous_outer = outer
+        res[side] = lanes_area
+        if previous_outer is not None:
+            res[most_key] = previous_outer
+
+    res.update(get_lane_line(res))
+    return res, before, after
+
+
+def simplify_total_areas(total_areas, tolerance, method="douglas_peucker"):
+    """
+    Simplify all lane boundaries of the "get_all_lanes" result.
+    :param total_areas:
+    :param tolerance: In metres.
+    :param method: "douglas_peucker" or "visvalingam".
+    :return: (simplified total areas, report {road id: {"points", "simplified_points", "reduction"}})
+    """
+    res = dict()
+    report = dict()
+    for index, section_data in total_areas.items():
+        res[index], before, after = simplify_section_data(section_data, tolerance, method)
+        road_report = report.setdefault(index[0], {"points": 0, "simplified_points": 0})
+        road_report["points"] += before
+        road_report["simplified_points"] += after
+    for road_report in report.values():
+        points = road_report["points"]
+        road_report["reduction"] = 1 - road_report["simplified_points"] / points if points else 0.0
+    return res, report
+
+
+def summarize_report(report):
+    points = sum(road_report["points"] for road_report in report.values())
+    simplified_points = sum(road_report["simplified_points"] for road_report in report.values())
+    return "{} roads: {} -> {} boundary points ({:.1%} removed)".format(
+        len(report), points, simplified_points, 1 - simplified_points / points if points else 0.0)
@@ -0,0 +1,222 @@
+"""
+Render the lane geometry of a road network as a z/x/y pyramid of PNG tiles.
+
+The square extent of the network is split into 2^z x 2^z tiles at zoom level z. Lower zoom levels use boundaries
+simplified with Douglas-Peucker (the tolerance is one pixel of that level), and only tiles intersecting the bounding
+box of at least one road are rendered. Tiles are rendered in parallel by a pool of worker processes, each keeping one
+figure alive.
+
+Usage:
+    python tile_render.py Export20241128.xodr --output-dir tiles --max-zoom 6
+The output folder contains "<z>/<x>/<y>.png", "metadata.json" and a minimal "index.html" viewer.
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from parse_and_visualize import (STEP, TYPE_COLOR_DICT, get_all_lanes, iterate_lane_areas, load_xodr_and_parse,
+                                 rescale_color)
+from simplify_polylines import simplify_polyline
+
+TILE_SIZE = 256  # Pixels.
+
+
+def collect_road_features(total_areas):
+    """
+    Group the lanes of the "get_all_lanes" result by road.
+    :param total_areas:
+    :return: List of (bounding box (xmin, ymin, xmax, ymax), [(fill color, edge color, inner, outer)]).
+    """
+    roads = dict()
+    for (road_id, _), section_data in total_areas.items():
+        lanes = roads.setdefault(road_id, [])
+        for lane_id, type_of_lane, inner_points, outer_points in iterate_lane_areas(section_data):
+            if len(inner_points) < 2:
+                continue
+            lane_color = TYPE_COLOR_DICT.get(type_of_lane, TYPE_COLOR_DICT["none"])
+            lanes.append((lane_color, rescale_color(lane_color, 0.5), inner_points, outer_points))
+
+    features = []
+    for road_id, lanes in roads.items():
+        if not lanes:
+            continue
+        points = np.concatenate([np.concatenate([inner, outer]) for _, _, inner, outer in lanes])
+        bbox = (*points.min(axis=0), *points.max(axis=0))
+        features.append((bbox, lanes))
+    return features
+
+
+def get_tiles_of_bbox(bbox, origin, tile_length, n_tiles):
+    """
+    Get the tiles intersecting a bounding box. Tile y indexes count from the top (north) like web maps.
+    :param bbox: (xmin, ymin, xmax, ymax)
+    :param origin: (xmin, ymax) of the whole extent.
+    :param tile_length: Side length of one tile in metres.
+    :param n_tiles: Number of tiles per side.
+    :return: Generator of (x, y).
+    """
+    x0 = int(np.clip((bbox[0] - origin[0]) // tile_length, 0, n_tiles - 1))
+    x1 = int(np.clip((bbox[2] - origin[0]) // tile_length, 0, n_tiles - 1))
+    y0 = int(np.clip((origin[1] - bbox[3]) // tile_length, 0, n_tiles - 1))
+    y1 = int(np.clip((origin[1] - bbox[1]) // tile_length, 0, n_tiles - 1))
+    for x in range(x0, x1 + 1):
+        for y in range(y0, y1 + 1):
+            yield x, y
+
+
+# State of every worker process.
+_WORKER = dict()
+
+
+def _init_worker(features):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure(figsize=(1, 1), dpi=TILE_SIZE)
+    ax = fig.add_axes((0, 0, 1, 1))
+    ax.set_axis_off()
+    _WORKER.update(features=features, figure=fig, axes=ax, simplified=dict())
+
+
+def _get_simplified_lanes(feature_index, zoom, tolerance):
+    key = (feature_index, zoom)
+    if key not in _WORKER["simplified"]:
+        _, lanes = _WORKER["features"][feature_index]
+        _WORKER["simplified"][key] = [
+            (fill, edge, simplify_polyline(inner, tolerance), simplify_polyline(outer, tolerance))
+            for fill, edge, inner, outer in lanes
+        ]
+    return _WORKER["simplified"][key]
+
+
+def _render_tile(task):
+    from matplotlib.collections import LineCollection, PolyCollection
+
+    zoom, x, y, feature_indexes, origin, tile_length, output_dir = task
+    fig, ax = _WORKER["figure"], _WORKER["axes"]
+    tolerance = tile_length / TILE_SIZE
+
+    polygons = dict()
+    lines = dict()
+    for feature_index in feature_indexes:
+        for fill, edge, inner, outer in _get_simplified_lanes(feature_index, zoom, tolerance):
+            polygons.setdefault(fill, []).append(np.concatenate([inner, outer[::-1]]))
+            lines.setdefault(edge, []).append(outer)
+
+    for collection in list(ax.collections):
+        collection.remove()
+    for color, items in polygons.items():
+        ax.add_collection(PolyCollection(items, facecolors=color, edgecolors="none", antialiased=False))
+    for color, items in lines.items():
+        ax.add_collection(LineCollection(items, colors=color, linewidths=0.3))
+    ax.set_xlim(origin[0] + x * tile_length, origin[0] + (x + 1) * tile_length)
+    ax.set_ylim(origin[1] - (y + 1) * tile_length, origin[1] - y * tile_length)
+
+    tile_folder = os.path.join(output_dir, str(zoom), str(x))
+    os.makedirs(tile_folder, exist_ok=True)
+    fig.savefig(os.path.join(tile_folder, "{}.png".format(y)), dpi=TILE_SIZE, transparent=True)
+    return zoom
+
+
+def render_tiles(total_areas, output_dir, min_zoom=0, max_zoom=5, workers=None):
+    """
+    Render the tile pyramid of the "get_all_lanes" result.
+    :param total_areas:
+    :param output_dir:
+    :param min_zoom:
+    :param max_zoom:
+    :param workers: Number of worker processes, CPU count by default.
+    :return: Metadata dictionary, also written to "metadata.json".
+    """
+    features = collect_road_features(total_areas)
+    if not features:
+        raise ValueError("No lane geometry to render.")
+
+    bboxes = np.array([bbox for bbox, _ in features])
+    xmin, ymin = bboxes[:, :2].min(axis=0)
+    xmax, ymax = bboxes[:, 2:].max(axis=0)
+    extent = max(xmax - xmin, ymax - ymin) * 1.001  # Keep the far edges inside the last tile.
+    origin = (float(xmin), float(ymax))
+
+    tasks = []
+    for zoom in range(min_zoom, max_zoom + 1):
+        n_tiles = 2 ** zoom
+        tile_length = extent / n_tiles
+        tiles = dict()
+        for feature_index, (bbox, _) in enumerate(features):
+            for tile in get_tiles_of_bbox(bbox, origin, tile_length, n_tiles):
+                tiles.setdefault(tile, []).append(feature_index)
+        for (x, y), feature_indexes in sorted(tiles.items()):
+            tasks.append((zoom, x, y, feature_indexes, origin, tile_length, output_dir))
+
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    counts = dict()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(features,)) as executor:
+        for zoom in executor.map(_render_tile, tasks, chunksize=max(1, len(tasks) // (8 * workers))):
+            counts[zoom] = counts.get(zoom, 0) + 1
+
+    metadata = {
+        "origin": origin,  # Top-left corner (x min, y max) of tile 0/0/0 in map coordinates.
+        "extent": extent,  # Side length of tile 0/0/0 in metres.
+        "tile_size": TILE_SIZE,
+        "min_zoom": min_zoom,
+        "max_zoom": max_zoom,
+        "tiles_per_zoom": {str(zoom): counts.get(zoom, 0) for zoom in range(min_zoom, max_zoom + 1)},
+        "seconds": time.perf_counter() - start,
+    }
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, "metadata.json"), "w") as fh:
+        json.dump(metadata, fh, indent=2)
+    with open(os.path.join(output_dir, "index.html"), "w") as fh:
+        fh.write(VIEWER_HTML.format(min_zoom=min_zoom, max_zoom=max_zoom, tile_size=TILE_SIZE))
+    return metadata
+
+
+VIEWER_HTML = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<link rel="stylesheet" href="https://unpkg.com/leaflet@1.9.4/dist/leaflet.css">
+<script src="https://unpkg.com/leaflet@1.9.4/dist/leaflet.js"></script>
+<style>html, body, #map {{ height: 100%; margin: 0; }}</style>
+</head>
+<body>
+<div id="map"></div>
+<script>
+var map = L.map("map", {{crs: L.CRS.Simple, minZoom: {min_zoom}, maxZoom: {max_zoom}}});
+L.tileLayer("{{z}}/{{x}}/{{y}}.png", {{tileSize: {tile_size}, minZoom: {min_zoom}, maxZoom: {max_zoom}, noWrap: true}}).addTo(map);
+map.fitBounds([[-{tile_size}, 0], [0, {tile_size}]]);
+</script>
+</body>
+</html>
+"""
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render a .xodr file as a z/x/y pyramid of PNG tiles.")
+    parser.add_argument("file", help="Input .xodr file.")
+    parser.add_argument("--output-dir", default=None, help="Output folder, <file name>_tiles by default.")
+    parser.add_argument("--step", type=float, default=STEP, help="Sample step of the reference lines.")
+    parser.add_argument("--min-zoom", type=int, default=0)
+    parser.add_argument("--max-zoom", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes.")
+    args = parser.parse_args(argv)
+
+    output_dir = args.output_dir or os.path.splitext(args.file)[0] + "_tiles"
+    road_network = load_xodr_and_parse(args.file)
+    total_areas = get_all_lanes(road_network, step=args.step)
+    metadata = render_tiles(total_areas, output_dir, min_zoom=args.min_zoom, max_zoom=args.max_zoom,
+                            workers=args.workers)
+    print("{} tiles written to {} in {:.2f}s".format(
+        sum(metadata["tiles_per_zoom"].values()), output_dir, metadata["seconds"]))
+
+
+if __name__ == "__main__":
+    main()
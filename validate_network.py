@@ -0,0 +1,304 @@
+"""
+Validation of the topology and geometry of a parsed road network.
+
+All checks run in one pass over the roads and junctions, with dictionaries of the road, junction and lane ids for
+the link lookups and one vectorized comparison per road for the geometry ends:
+    dangling_link          road link to a road or junction that does not exist                          error
+    dangling_connection    junction connection with a missing incoming or connecting road              error
+    dangling_lane_link     lane link to a lane that does not exist in the linked lane section          warning
+    link_mismatch          road A links to road B, but B does not link back to A at that contact point  warning
+    connection_mismatch    connecting road of a junction that does not belong to the junction          warning
+    geometry_length        plan view geometry of length <= 0                                           error
+    geometry_gap           position gap between consecutive plan view geometries above tolerance       warning
+    heading_jump           heading jump between consecutive plan view geometries above tolerance       warning
+    road_length            road length differs from the length of its plan view                        warning
+    lane_section_length    lane section of length <= 0                                                 error
+    missing_width          lane without a width at the start of its lane section (get_width is None)   error
+Errors make the lane geometry calculation fail or produce wrong areas, warnings are suspicious data.
+
+Usage:
+    report = validate_network(road_network)
+    if not report.ok:
+        print(report.summary())
+    python validate_network.py Export20241128.xodr --json report.json
+"""
+
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+from parse_and_visualize import load_xodr_and_parse
+
+ERROR = "error"
+WARNING = "warning"
+
+# Default tolerances of the plan view continuity checks.
+POSITION_TOLERANCE = 1e-3  # m
+HEADING_TOLERANCE = 1e-3  # rad
+ROAD_LENGTH_TOLERANCE = 1e-2  # m
+
+
+class ValidationIssue:
+
+    def __init__(self, severity, code, message, road_id=None, junction_id=None, **details):
+        self.severity = severity
+        self.code = code
+        self.message = message
+        self.road_id = road_id
+        self.junction_id = junction_id
+        self.details = details
+
+    def __repr__(self):
+        return "<ValidationIssue {} {}: {}>".format(self.severity, self.code, self.message)
+
+    def to_dict(self):
+        return {
+            "severity": self.severity,
+            "code": self.code,
+            "message": self.message,
+            "road_id": self.road_id,
+            "junction_id": self.junction_id,
+            **self.details,
+        }
+
+
+class ValidationReport:
+
+    def __init__(self, issues, roads, junctions, seconds):
+        self.issues = issues
+        self.roads = roads
+        self.junctions = junctions
+        self.seconds = seconds
+
+    @property
+    def errors(self):
+        return [issue for issue in self.issues if issue.severity == ERROR]
+
+    @property
+    def warnings(self):
+        return [issue for issue in self.issues if issue.severity == WARNING]
+
+    @property
+    def ok(self):
+        """ True if there are no errors. """
+        return not self.errors
+
+    def counts(self):
+        """ Number of issues by code. """
+        res = dict()
+        for issue in self.issues:
+            res[issue.code] = res.get(issue.code, 0) + 1
+        return res
+
+    def summary(self):
+        lines = ["{} roads, {} junctions checked in {:.3f}s: {} errors, {} warnings".format(
+            self.roads, self.junctions, self.seconds, len(self.errors), len(self.warnings))]
+        for code, count in sorted(self.counts().items()):
+            lines.append("    {:<20} {}".format(code, count))
+        return "\n".join(lines)
+
+    def to_dict(self):
+        return {
+            "ok": self.ok,
+            "roads": self.roads,
+            "junctions": self.junctions,
+            "seconds": self.seconds,
+            "counts": self.counts(),
+            "issues": [issue.to_dict() for issue in self.issues],
+        }
+
+
+def get_back_link(road, contact_point):
+    """ Road link of a road at its start or end. """
+    return road.link.predecessor if contact_point == "start" else road.link.successor
+
+
+def get_contact_section(road, contact_point):
+    lane_sections = road.lanes.laneSections
+    if not lane_sections:
+        return None
+    return lane_sections[0] if contact_point == "start" else lane_sections[-1]
+
+
+def validate_network(road_network, position_tolerance=POSITION_TOLERANCE, heading_tolerance=HEADING_TOLERANCE,
+                     road_length_tolerance=ROAD_LENGTH_TOLERANCE):
+    """
+    Check the topology and geometry of a parsed network.
+    :param road_network: Parsed road network.
+    :param position_tolerance: Largest accepted gap between consecutive plan view geometries in metres.
+    :param heading_tolerance: Largest accepted heading jump between consecutive plan view geometries in radians.
+    :param road_length_tolerance: Largest accepted difference of road length and plan view length in metres.
+    :return: ValidationReport
+    """
+    start = time.perf_counter()
+    issues = []
+    roads = {road.id: road for road in road_network.roads}
+    junctions = {junction.id: junction for junction in road_network.junctions}
+    # (road id, lane section idx) => set of lane ids
+    lane_ids = {(road.id, lane_section.idx): {lane.id for lane in lane_section.allLanes}
+                for road in road_network.roads for lane_section in road.lanes.laneSections}
+
+    def check_lane_link(road, lane_section, lane_id, other_road, other_section, other_lane_id, description):
+        if other_section is None or other_lane_id in lane_ids[(other_road.id, other_section.idx)]:
+            return
+        issues.append(ValidationIssue(
+            WARNING, "dangling_lane_link",
+            "{} of lane {} (section {}) is lane {} of road {} section {}, which does not exist".format(
+                description, lane_id, lane_section.idx, other_lane_id, other_road.id, other_section.idx),
+            road_id=road.id, lane_section=lane_section.idx, lane_id=lane_id))
+
+    for road in road_network.roads:
+        lane_sections = road.lanes.laneSections
+
+        # Road links.
+        for road_link, side in ((road.link.predecessor, "start"), (road.link.successor, "end")):
+            if road_link is None:
+                continue
+            description = "predecessor" if side == "start" else "successor"
+            if road_link.elementType == "road":
+                other_road = roads.get(road_link.elementId)
+                if other_road is None:
+                    issues.append(ValidationIssue(ERROR, "dangling_link", "{} road {} does not exist".format(
+                        description, road_link.elementId), road_id=road.id))
+                    continue
+
+                contact_point = road_link.contactPoint or "start"
+                back_link = get_back_link(other_road, contact_point)
+                linked_back = back_link is not None and (
+                    (back_link.elementType == "road" and back_link.elementId == road.id) or
+                    (back_link.elementType == "junction" and back_link.elementId == road.junction))
+                if not linked_back:
+                    issues.append(ValidationIssue(
+                        WARNING, "link_mismatch", "{} is road {} ({}), which links to {} there".format(
+                            description, other_road.id, contact_point, back_link or "nothing"), road_id=road.id))
+
+                section = get_contact_section(road, side)
+                other_section = get_contact_section(other_road, contact_point)
+                for lane in section.allLanes if section is not None else []:
+                    other_lane_id = lane.link.predecessorId if side == "start" else lane.link.successorId
+                    if lane.id != 0 and other_lane_id is not None:
+                        check_lane_link(road, section, lane.id, other_road, other_section, other_lane_id, description)
+
+            elif road_link.elementId not in junctions:
+                issues.append(ValidationIssue(ERROR, "dangling_link", "{} junction {} does not exist".format(
+                    description, road_link.elementId), road_id=road.id))
+
+        # Plan view.
+        geometries = road.planView._geometries
+        lengths = np.array([geometry.getLength() for geometry in geometries], dtype=np.float64)
+        for index in np.flatnonzero(~(lengths > 0)):
+            issues.append(ValidationIssue(ERROR, "geometry_length", "geometry {} has length {}".format(
+                index, lengths[index]), road_id=road.id, geometry=int(index)))
+
+        gaps, heading_jumps = road.planView.getDiscontinuities()
+        for index in np.flatnonzero(gaps > position_tolerance):
+            issues.append(ValidationIssue(WARNING, "geometry_gap", "gap of {:.4f} m after geometry {}".format(
+                gaps[index], index), road_id=road.id, geometry=int(index), value=float(gaps[index])))
+        for index in np.flatnonzero(np.abs(heading_jumps) > heading_tolerance):
+            issues.append(ValidationIssue(
+                WARNING, "heading_jump", "heading jump of {:.5f} rad after geometry {}".format(
+                    heading_jumps[index], index), road_id=road.id, geometry=int(index),
+                value=float(heading_jumps[index])))
+
+        road_length = getattr(road, "length", None)
+        if road_length is not None and abs(road_length - lengths.sum()) > road_length_tolerance:
+            issues.append(ValidationIssue(WARNING, "road_length", "length {} but plan view length {}".format(
+                road_length, lengths.sum()), road_id=road.id, value=float(road_length - lengths.sum())))
+
+        # Lane sections and lanes.
+        for position, lane_section in enumerate(lane_sections):
+            if not lane_section.length > 0:
+                issues.append(ValidationIssue(
+                    ERROR, "lane_section_length", "lane section {} at s={} has length {}".format(
+                        lane_section.idx, lane_section.sPos, lane_section.length),
+                    road_id=road.id, lane_section=lane_section.idx))
+
+            for lane in lane_section.allLanes:
+                if lane.id == 0:
+                    continue
+                if np.isnan(lane.getWidths([0.0])[0]):
+                    issues.append(ValidationIssue(
+                        ERROR, "missing_width", "lane {} of lane section {} has no width at its start{}".format(
+                            lane.id, lane_section.idx, " (only <border>)" if lane.borders else ""),
+                        road_id=road.id, lane_section=lane_section.idx, lane_id=lane.id))
+
+                if position + 1 < len(lane_sections) and lane.link.successorId is not None:
+                    check_lane_link(road, lane_section, lane.id, road, lane_sections[position + 1],
+                                    lane.link.successorId, "successor")
+                if position > 0 and lane.link.predecessorId is not None:
+                    check_lane_link(road, lane_section, lane.id, road, lane_sections[position - 1],
+                                    lane.link.predecessorId, "predecessor")
+
+    for junction in road_network.junctions:
+        for connection in junction.connections:
+            incoming_road = roads.get(connection.incomingRoad)
+            connecting_road = roads.get(connection.connectingRoad)
+            if incoming_road is None or connecting_road is None:
+                issues.append(ValidationIssue(
+                    ERROR, "dangling_connection", "connection {}: {} road {} does not exist".format(
+                        connection.id, "incoming" if incoming_road is None else "connecting",
+                        connection.incomingRoad if incoming_road is None else connection.connectingRoad),
+                    junction_id=junction.id, connection=connection.id))
+                continue
+
+            if connecting_road.junction != junction.id:
+                issues.append(ValidationIssue(
+                    WARNING, "connection_mismatch", "connection {}: road {} belongs to junction {}".format(
+                        connection.id, connecting_road.id, connecting_road.junction),
+                    junction_id=junction.id, connection=connection.id))
+
+            # Side of the incoming road that touches the junction.
+            side = "end" if (incoming_road.link.successor is not None and
+                             incoming_road.link.successor.elementType == "junction" and
+                             incoming_road.link.successor.elementId == junction.id) else "start"
+            section = get_contact_section(incoming_road, side)
+            connecting_section = get_contact_section(connecting_road, connection.contactPoint or "start")
+            for lane_link in connection.laneLinks:
+                if section is not None and lane_link.fromId not in lane_ids[(incoming_road.id, section.idx)]:
+                    issues.append(ValidationIssue(
+                        WARNING, "dangling_lane_link", "connection {}: incoming lane {} of road {} does not exist"
+                        .format(connection.id, lane_link.fromId, incoming_road.id),
+                        junction_id=junction.id, connection=connection.id))
+                if (connecting_section is not None and
+                        lane_link.toId not in lane_ids[(connecting_road.id, connecting_section.idx)]):
+                    issues.append(ValidationIssue(
+                        WARNING, "dangling_lane_link", "connection {}: connecting lane {} of road {} does not exist"
+                        .format(connection.id, lane_link.toId, connecting_road.id),
+                        junction_id=junction.id, connection=connection.id))
+
+    return ValidationReport(issues, len(roads), len(junctions), time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the topology and geometry of xodr files.")
+    parser.add_argument("files", nargs="+", help="xodr files")
+    parser.add_argument("--position-tolerance", type=float, default=POSITION_TOLERANCE,
+                        help="Largest accepted gap between plan view geometries in metres.")
+    parser.add_argument("--heading-tolerance", type=float, default=HEADING_TOLERANCE,
+                        help="Largest accepted heading jump between plan view geometries in radians.")
+    parser.add_argument("--json", default=None, help="Write the reports of all files to this json file.")
+    parser.add_argument("--verbose", action="store_true", help="Print every issue.")
+    args = parser.parse_args(argv)
+
+    reports = dict()
+    for file in args.files:
+        report = validate_network(load_xodr_and_parse(file), position_tolerance=args.position_tolerance,
+                                  heading_tolerance=args.heading_tolerance)
+        reports[file] = report
+        print("{}: {}".format(file, report.summary()))
+        if args.verbose:
+            for issue in report.issues:
+                print("    {} {} road={} junction={}: {}".format(
+                    issue.severity, issue.code, issue.road_id, issue.junction_id, issue.message))
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump({file: report.to_dict() for file, report in reports.items()}, fh, indent=2)
+    return 0 if all(report.ok for report in reports.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())